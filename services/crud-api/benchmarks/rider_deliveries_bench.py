@@ -0,0 +1,110 @@
+"""
+라이더 배송 신청 목록 직렬화 벤치마크
+
+배송 신청 N건(기본 1,000)을 한 라이더에게 만들어 두고, 목록 응답을 만드는 두 방식을 비교합니다.
+- legacy: 행마다 User 두 개 + RiderDeliveryResponse를 만들고 FastAPI처럼 response_model로 다시 검증
+- serializer: 저장 시 검증된 JSON을 그대로 dict로 옮겨 JSONResponse로 렌더링
+
+    python -m benchmarks.rider_deliveries_bench --deliveries 1000
+"""
+
+import argparse
+import json
+import statistics
+import time
+import uuid
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from database.models import Base, User as UserRow, Order, RiderDelivery
+from database.service import DatabaseService
+from models.auth import User
+from models.rider import (
+    DeliveryParty, RiderDeliveryResponse, RiderDeliveryListResponse, serialize_delivery_list
+)
+
+
+def seed(session, n_deliveries: int) -> None:
+    session.execute(insert(UserRow), [{
+        "id": "rider", "email": "rider@example.com", "password_hash": "x", "name": "rider",
+        "phone": "010", "kakao_open_profile": "k", "role": "rider"
+    }])
+    party = DeliveryParty(
+        id="someone", name="홍길동", phone="010-0000-0000", address="서울시 서초구 서초대로 456",
+        kakao_open_profile="https://open.kakao.com/o/someone"
+    ).model_dump()
+    orders, deliveries = [], []
+    for i in range(n_deliveries):
+        order_id = str(uuid.uuid4())
+        orders.append({"id": order_id, "user_id": "rider", "total_amount": 10000, "delivery_type": "delivery"})
+        deliveries.append({
+            "id": str(uuid.uuid4()), "order_id": order_id, "rider_id": "rider", "delivery_fee": 3000 + i,
+            "status": "pending", "seller_info": party, "buyer_info": party
+        })
+    session.execute(insert(Order), orders)
+    session.execute(insert(RiderDelivery), deliveries)
+    session.commit()
+
+
+def _legacy_user(info):
+    return User(
+        id=info["id"], role="user", email="", name=info["name"], phone=info["phone"],
+        address=info["address"], kakao_open_profile=info["kakao_open_profile"], created_at=""
+    )
+
+
+def legacy(deliveries):
+    """이전 라우터 코드 + FastAPI response_model 검증/직렬화 경로"""
+    response = RiderDeliveryListResponse(items=[
+        RiderDeliveryResponse(
+            id=d.id, order_id=d.order_id, rider_id=d.rider_id, delivery_fee=d.delivery_fee, status=d.status,
+            seller_info=_legacy_user(d.seller_info), buyer_info=_legacy_user(d.buyer_info),
+            created_at=d.created_at.isoformat() if d.created_at else "",
+            updated_at=d.updated_at.isoformat() if d.updated_at else None
+        ) for d in deliveries
+    ], total=len(deliveries))
+    validated = RiderDeliveryListResponse.model_validate(response.model_dump())
+    return JSONResponse(content=validated.model_dump(mode="json")).body
+
+
+def serializer(deliveries):
+    return JSONResponse(content=serialize_delivery_list(deliveries, len(deliveries))).body
+
+
+def timed(fn, repeats: int):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deliveries", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    seed(session, args.deliveries)
+
+    service = DatabaseService(session)
+    deliveries = service.get_rider_deliveries("rider", limit=args.deliveries)
+    assert len(deliveries) == args.deliveries
+    expected, actual = json.loads(legacy(deliveries)), json.loads(serializer(deliveries))
+    assert expected["items"] == actual["items"], "serializer output differs from the pydantic path"
+
+    print(f"{'path':>10} {'p50':>10} {'p95':>10}  ({args.deliveries} deliveries, serialization only)")
+    for name, fn in (("legacy", legacy), ("serializer", serializer)):
+        p50, p95 = timed(lambda: fn(deliveries), args.repeats)
+        print(f"{name:>10} {p50:>8.2f}ms {p95:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+라이더 반경 검색 벤치마크
+
+SQLite 파일에 배송 가능 주문 N건(기본 100k)을 서울 일대에 흩어 놓고,
+/rider/available-orders?lat=&lng=&radius= 가 쓰는 서비스 쿼리의 지연 시간을 측정합니다.
+비교 대상은 인덱스 없이 전체 주문 좌표를 읽어 haversine으로 거르는 방식입니다.
+
+    python -m benchmarks.rider_nearby_bench --orders 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from database.models import Base, User, Category, Product, Order, OrderItem
+from database.service import DatabaseService
+from geo import geohash
+
+SEOUL = (37.5665, 126.9780)
+SPREAD_DEGREES = 0.15  # 약 ±15km
+
+
+def seed(session, n_orders: int, n_products: int = 2000) -> None:
+    rnd = random.Random(42)
+    session.execute(insert(Category), [{"id": "cat1", "name": "침대"}])
+    session.execute(insert(User), [{
+        "id": "buyer", "email": "buyer@example.com", "password_hash": "x", "name": "buyer",
+        "phone": "010", "kakao_open_profile": "k", "address": "서울"
+    }, {
+        "id": "seller", "email": "seller@example.com", "password_hash": "x", "name": "seller",
+        "phone": "010", "kakao_open_profile": "k", "address": "서울"
+    }])
+
+    products = []
+    for i in range(n_products):
+        lat = SEOUL[0] + rnd.uniform(-SPREAD_DEGREES, SPREAD_DEGREES)
+        lng = SEOUL[1] + rnd.uniform(-SPREAD_DEGREES, SPREAD_DEGREES)
+        products.append({
+            "id": f"p{i}", "title": f"product {i}", "price_amount": 10000, "category_id": "cat1",
+            "seller_id": "seller", "location": "서울", "lat": lat, "lng": lng,
+            "geohash": geohash.encode(lat, lng), "images": []
+        })
+    session.execute(insert(Product), products)
+
+    batch_orders, batch_items = [], []
+    for i in range(n_orders):
+        product = products[rnd.randrange(n_products)]
+        order_id = str(uuid.UUID(int=rnd.getrandbits(128)))
+        batch_orders.append({
+            "id": order_id, "user_id": "buyer", "status": "paid", "total_amount": 10000,
+            "delivery_type": "delivery", "shipping_address": "서울",
+            "pickup_lat": product["lat"], "pickup_lng": product["lng"], "pickup_geohash": product["geohash"]
+        })
+        batch_items.append({
+            "id": f"i{i}", "order_id": order_id, "product_id": product["id"], "quantity": 1, "price": 10000
+        })
+        if len(batch_orders) == 10000:
+            session.execute(insert(Order), batch_orders)
+            session.execute(insert(OrderItem), batch_items)
+            batch_orders, batch_items = [], []
+    if batch_orders:
+        session.execute(insert(Order), batch_orders)
+        session.execute(insert(OrderItem), batch_items)
+    session.commit()
+
+
+def full_scan(session, lat: float, lng: float, radius_km: float, limit: int):
+    rows = session.query(Order.id, Order.pickup_lat, Order.pickup_lng).filter(
+        Order.status.in_(["pending", "paid"]), Order.delivery_type == "delivery"
+    ).all()
+    within = sorted(
+        (geohash.haversine_km(lat, lng, r.pickup_lat, r.pickup_lng), r.id) for r in rows
+    )
+    return [order_id for d, order_id in within if d <= radius_km][:limit]
+
+
+def timed(fn, repeats: int):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--database-url", default=None, help="기본값: 임시 SQLite 파일")
+    args = parser.parse_args(argv)
+
+    tmpdir = tempfile.mkdtemp()
+    url = args.database_url or f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    start = time.perf_counter()
+    seed(session, args.orders)
+    print(f"seeded {args.orders} open orders in {time.perf_counter() - start:.1f}s ({url})")
+
+    service = DatabaseService(session)
+    rnd = random.Random(7)
+    print(f"{'radius_km':>9} {'matches':>8} {'indexed p50':>12} {'indexed p95':>12} {'full scan p50':>14}")
+    for radius in (1.0, 3.0, 5.0, 10.0):
+        lat = SEOUL[0] + rnd.uniform(-0.05, 0.05)
+        lng = SEOUL[1] + rnd.uniform(-0.05, 0.05)
+        page = service.get_available_orders_near(lat, lng, radius, limit=20)
+        expected = full_scan(session, lat, lng, radius, 20)
+        assert [o.id for o, _ in page] == expected, "indexed result differs from full scan"
+        session.expire_all()
+        p50, p95 = timed(lambda: (service.get_available_orders_near(lat, lng, radius, limit=20), session.expire_all()), args.repeats)
+        scan_p50, _ = timed(lambda: full_scan(session, lat, lng, radius, 20), max(3, args.repeats // 5))
+        print(f"{radius:>9.1f} {len(page):>8} {p50:>10.1f}ms {p95:>10.1f}ms {scan_p50:>12.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
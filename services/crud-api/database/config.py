@@ -36,6 +36,14 @@ def create_tables():
     from .models import Base
     Base.metadata.create_all(bind=engine)
 
+    # create_all은 기존 테이블을 바꾸지 않으므로 새 컬럼/인덱스는 멱등 DDL로 추가
+    from .migrations import upgrade_schema
+    upgrade_schema(engine, Base.metadata)
+
+    # PostGIS가 있으면 픽업 좌표 GiST 인덱스 생성
+    from geo.spatial import ensure_spatial_indexes
+    ensure_spatial_indexes(engine)
+
 # Dependency to get database session
 def get_db():
     db = SessionLocal()
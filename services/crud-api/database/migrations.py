@@ -0,0 +1,107 @@
+"""
+기존 데이터베이스 스키마 보정
+
+Base.metadata.create_all은 없는 테이블만 만들고 이미 있는 테이블은 바꾸지 않습니다.
+운영 Postgres처럼 데이터가 남아 있는 DB에서는 모델에 새로 추가된 컬럼과 인덱스를
+여기서 멱등 DDL(ADD COLUMN IF NOT EXISTS / CREATE INDEX IF NOT EXISTS)로 맞춥니다.
+새 UniqueConstraint(uq_wishlist_user_product)는 중복 행을 먼저 정리한 뒤 UNIQUE INDEX로 추가합니다.
+create_tables가 시작할 때마다 호출하며, 여러 워커가 동시에 실행해도 안전합니다.
+"""
+
+import logging
+from sqlalchemy import UniqueConstraint, inspect
+from sqlalchemy.schema import CreateIndex
+
+logger = logging.getLogger(__name__)
+
+
+def _add_column_sql(engine, table, column) -> str:
+    column_type = column.type.compile(dialect=engine.dialect)
+    if engine.dialect.name == "postgresql":
+        return f'ALTER TABLE "{table.name}" ADD COLUMN IF NOT EXISTS "{column.name}" {column_type}'
+    # SQLite는 ADD COLUMN IF NOT EXISTS를 지원하지 않음 (인스펙터로 없는 컬럼만 추가)
+    return f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+
+
+def add_missing_columns(engine, metadata) -> int:
+    """이미 있는 테이블에 모델에만 있는 컬럼을 추가합니다 (nullable, 기본값 없음). 추가한 컬럼 수를 반환"""
+    inspector = inspect(engine)
+    added = 0
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                conn.exec_driver_sql(_add_column_sql(engine, table, column))
+                logger.info(f"Added column {table.name}.{column.name}")
+                added += 1
+    return added
+
+
+def create_missing_indexes(engine, metadata) -> None:
+    """모델에 선언된 인덱스를 CREATE INDEX IF NOT EXISTS로 만듭니다"""
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def add_missing_unique_constraints(engine, metadata) -> dict:
+    """
+    기존 테이블에 없는 UniqueConstraint를 같은 이름의 UNIQUE INDEX로 추가합니다
+    (ON CONFLICT 대상으로 동일하게 동작, SQLite는 ALTER TABLE ADD CONSTRAINT 미지원).
+    추가 전에 중복 행은 가장 먼저 만들어진 행(created_at, 기본 키 순)만 남기고 지웁니다.
+
+    Returns:
+        테이블 이름 → 지운 중복 행 수
+    """
+    inspector = inspect(engine)
+    removed = {}
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        existing |= {constraint["name"] for constraint in inspector.get_unique_constraints(table.name)}
+        for constraint in table.constraints:
+            if not isinstance(constraint, UniqueConstraint) or not constraint.name or constraint.name in existing:
+                continue
+            columns = ", ".join(f'"{column.name}"' for column in constraint.columns)
+            order = [f'"{column.name}"' for column in table.primary_key.columns]
+            if "created_at" in table.columns:
+                order.insert(0, '"created_at"')
+            pk = f'"{table.primary_key.columns.values()[0].name}"'
+            with engine.begin() as conn:
+                result = conn.exec_driver_sql(
+                    f'DELETE FROM "{table.name}" WHERE {pk} IN ('
+                    f'SELECT {pk} FROM (SELECT {pk}, ROW_NUMBER() OVER '
+                    f'(PARTITION BY {columns} ORDER BY {", ".join(order)}) AS duplicate_rank '
+                    f'FROM "{table.name}") ranked WHERE duplicate_rank > 1)'
+                )
+                conn.exec_driver_sql(
+                    f'CREATE UNIQUE INDEX IF NOT EXISTS "{constraint.name}" ON "{table.name}" ({columns})'
+                )
+            removed[table.name] = removed.get(table.name, 0) + max(result.rowcount, 0)
+            logger.info(f"Added unique constraint {constraint.name} "
+                        f"(removed {result.rowcount} duplicate rows from {table.name})")
+    return removed
+
+
+def recount_likes(engine) -> None:
+    """products.likes_count를 wishlist_items 개수로 다시 계산 (중복 찜을 지운 뒤)"""
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            'UPDATE products SET likes_count = '
+            '(SELECT COUNT(*) FROM wishlist_items WHERE wishlist_items.product_id = products.id)'
+        )
+
+
+def upgrade_schema(engine, metadata) -> None:
+    add_missing_columns(engine, metadata)
+    create_missing_indexes(engine, metadata)
+    removed = add_missing_unique_constraints(engine, metadata)
+    if removed.get("wishlist_items"):
+        # 중복 찜으로 두 번 올라간 likes_count 보정
+        recount_likes(engine)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, Text, JSON, ForeignKey
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, Text, JSON, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -14,6 +14,9 @@ class User(Base):
     name = Column(String, nullable=False)
     phone = Column(String, nullable=False)
     address = Column(String)  # 자유롭게 입력하는 주소
+    lat = Column(Float)  # 주소 geocoding 결과
+    lng = Column(Float)
+    geohash = Column(String(12), index=True)
     kakao_open_profile = Column(String, nullable=False)  # 카카오톡 오픈프로필 링크
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
@@ -48,12 +51,19 @@ class Product(Base):
     category_id = Column(String, ForeignKey("categories.id"))
     seller_id = Column(String, ForeignKey("users.id"))
     location = Column(String)  # 단순한 문자열 주소
+    lat = Column(Float)  # location geocoding 결과
+    lng = Column(Float)
+    geohash = Column(String(12), index=True)
     attributes = Column(JSON)  # Store as JSON
     stock = Column(Integer, default=1)
     is_featured = Column(Boolean, default=False)
-    likes_count = Column(Integer, default=0)
+    likes_count = Column(Integer, default=0)  # 찜 추가/삭제 시 원자적으로 증감
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        Index("ix_products_likes_created", "likes_count", "created_at"),  # sort=popular
+    )
+    
     # Relationships
     category = relationship("Category", back_populates="products")
     seller = relationship("User", back_populates="products")
@@ -71,9 +81,20 @@ class Order(Base):
     total_currency = Column(String, default="KRW")
     shipping_address = Column(String)  # 단순한 문자열 주소
     delivery_type = Column(String, default="pickup")  # "pickup" 또는 "delivery"
+    shipping_fee = Column(Float, default=0)  # 주문 시점 배송비 견적 (total_amount에 포함)
+    seller_info = Column(JSON)  # 판매자 연락처 스냅샷 (이름, 주소, 카카오톡 URL) - 배송 신청들이 참조
+    buyer_info = Column(JSON)   # 구매자 연락처 스냅샷 (배송 주소 사용)
+    pickup_lat = Column(Float)  # 픽업 지점 (첫 번째 상품 위치)
+    pickup_lng = Column(Float)
+    pickup_geohash = Column(String(12))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    __table_args__ = (
+        Index("ix_orders_delivery_status_created", "delivery_type", "status", "created_at"),  # 라이더 배송 가능 주문 피드
+        Index("ix_orders_pickup_geohash", "delivery_type", "status", "pickup_geohash"),  # 반경 검색 (PostGIS 없을 때)
+    )
+    
     # Relationships
     user = relationship("User", back_populates="orders")
     items = relationship("OrderItem", back_populates="order")
@@ -84,7 +105,7 @@ class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(String, primary_key=True, index=True)
-    order_id = Column(String, ForeignKey("orders.id"))
+    order_id = Column(String, ForeignKey("orders.id"), index=True)
     product_id = Column(String, ForeignKey("products.id"))
     quantity = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)
@@ -102,6 +123,11 @@ class WishlistItem(Base):
     product_id = Column(String, ForeignKey("products.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        UniqueConstraint("user_id", "product_id", name="uq_wishlist_user_product"),  # 중복 찜 방지 (upsert 대상)
+        Index("ix_wishlist_user_created", "user_id", "created_at"),  # 찜 목록 페이지 조회
+    )
+    
     # Relationships
     user = relationship("User", back_populates="wishlist_items")
     product = relationship("Product", back_populates="wishlist_items")
@@ -120,6 +146,25 @@ class Notification(Base):
     type = Column(String, default="info")
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_notifications_user_created", "user_id", "created_at"),  # 알림 피드 keyset 페이지네이션
+        Index("ix_notifications_read_created", "is_read", "created_at"),  # 보관 작업 대상 조회
+    )
+
+
+class NotificationArchive(Base):
+    """오래된 읽은 알림을 옮겨두는 콜드 테이블"""
+    __tablename__ = "notifications_archive"
+    
+    id = Column(String, primary_key=True, index=True)
+    user_id = Column(String, index=True)
+    title = Column(String, nullable=False)
+    message = Column(Text, nullable=False)
+    type = Column(String, default="info")
+    is_read = Column(Boolean, default=True)
+    created_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
 class ActiveToken(Base):
@@ -140,11 +185,17 @@ class RiderDelivery(Base):
     rider_id = Column(String, ForeignKey("users.id"), nullable=False)
     delivery_fee = Column(Float, nullable=False)  # 라이더가 제안한 배송비
     status = Column(String, default="pending")  # pending, accepted, rejected, in_progress, completed
-    seller_info = Column(JSON)  # 판매자 정보 (이름, 주소, 카카오톡 URL)
-    buyer_info = Column(JSON)   # 구매자 정보 (이름, 주소, 카카오톡 URL)
+    seller_info = Column(JSON)  # 예전 신청만: 판매자 정보 복사본 (새 신청은 Order.seller_info 참조)
+    buyer_info = Column(JSON)   # 예전 신청만: 구매자 정보 복사본 (새 신청은 Order.buyer_info 참조)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    
+    __table_args__ = (
+        Index("ix_rider_deliveries_rider_created", "rider_id", "created_at"),  # 내 배송 신청 목록
+        Index("ix_rider_deliveries_order_created", "order_id", "created_at"),  # 주문별 배송 신청 목록
+    )
+    
     # Relationships
     order = relationship("Order", back_populates="rider_deliveries")
     rider = relationship("User", foreign_keys=[rider_id])
@@ -0,0 +1,76 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy import and_, or_, select, union_all
+from sqlalchemy.orm import Query
+
+
+class InvalidCursor(ValueError):
+    """커서가 가리키는 행이 (보관 테이블에도) 없음 - 라우터에서 400"""
+
+
+def _pivot_select(model, cursor_id: str, owner: Optional[Dict[str, Any]]):
+    statement = select(model.created_at).where(model.id == cursor_id)
+    for column, value in (owner or {}).items():
+        statement = statement.where(getattr(model, column) == value)
+    return statement
+
+
+def cursor_pivot(model, cursor_id: str, archive_model=None, owner: Optional[Dict[str, Any]] = None):
+    """커서 행의 created_at 스칼라 서브쿼리. archive_model이 있으면 보관된 행에서도 찾음
+
+    owner({컬럼: 값})가 있으면 그 목록에 속한 행만 커서로 인정합니다
+    (다른 사용자의 알림 id로 그 행의 시각 순서를 알아내지 못하도록).
+    """
+    statement = _pivot_select(model, cursor_id, owner)
+    if archive_model is not None:
+        statement = union_all(statement, _pivot_select(archive_model, cursor_id, owner)).subquery().select()
+    return statement.limit(1).scalar_subquery()
+
+
+def keyset_filter(model, cursor_id: str, older: bool = True, archive_model=None,
+                  owner: Optional[Dict[str, Any]] = None):
+    """(created_at, id) 기준 keyset 조건.
+
+    커서는 행의 id이며, 기준 시각은 같은 문장 안의 PK 서브쿼리로 가져오므로
+    DB에 저장된 값끼리 비교합니다 (드라이버별 datetime 직렬화 차이 없음).
+    """
+    pivot = cursor_pivot(model, cursor_id, archive_model, owner)
+    if older:
+        return or_(model.created_at < pivot, and_(model.created_at == pivot, model.id < cursor_id))
+    return or_(model.created_at > pivot, and_(model.created_at == pivot, model.id > cursor_id))
+
+
+def _check_cursor(query: Query, model, cursor_id: str, archive_model=None,
+                  owner: Optional[Dict[str, Any]] = None) -> None:
+    """커서 행이 없으면 기준 시각이 NULL이 되어 빈 페이지가 조용히 돌아가므로 먼저 확인"""
+    if query.session.execute(select(cursor_pivot(model, cursor_id, archive_model, owner))).scalar() is None:
+        raise InvalidCursor(f"Unknown cursor: {cursor_id}")
+
+
+def paginate_keyset(query: Query, model, limit: int, before: Optional[str] = None,
+                    after: Optional[str] = None, skip: int = 0, archive_model=None,
+                    owner: Optional[Dict[str, Any]] = None) -> List:
+    """최신순 목록을 커서(before/after) 또는 offset으로 잘라 반환합니다.
+
+    - before: 커서보다 오래된 항목 (다음 페이지)
+    - after: 커서보다 새로운 항목 (새로 도착한 항목), 결과는 여전히 최신순
+    - archive_model: 커서 행이 보관 테이블로 옮겨졌을 때 기준 시각을 찾을 모델
+    - owner: 커서 행이 가져야 할 컬럼 값 (예: {"user_id": ...}). 다른 목록의 행은 InvalidCursor
+
+    Raises:
+        InvalidCursor: 커서 행을 찾을 수 없음 (다른 목록의 행 포함)
+    """
+    cursor_id = after or before
+    if cursor_id:
+        _check_cursor(query, model, cursor_id, archive_model, owner)
+    if after:
+        rows = query.filter(keyset_filter(model, after, older=False, archive_model=archive_model, owner=owner)).order_by(
+            model.created_at.asc(), model.id.asc()
+        ).limit(limit).all()
+        rows.reverse()
+        return rows
+    if before:
+        query = query.filter(keyset_filter(model, before, older=True, archive_model=archive_model, owner=owner))
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if skip and not before:
+        query = query.offset(skip)
+    return query.limit(limit).all()
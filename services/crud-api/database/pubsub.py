@@ -0,0 +1,204 @@
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_CHANNEL = "notifications"
+
+
+def _offer(queue: asyncio.Queue, payload: Dict[str, Any]) -> None:
+    """Enqueue without blocking; a slow client drops events instead of stalling publishers."""
+    try:
+        queue.put_nowait(payload)
+    except asyncio.QueueFull:
+        logger.warning("Notification stream queue full, dropping event")
+
+
+class InProcessBroker:
+    """In-process pub/sub keyed by user id.
+
+    Publishers may run in the threadpool (sync endpoints) while subscribers live on the
+    event loop, so delivery always goes through ``call_soon_threadsafe``.
+    """
+
+    def __init__(self, max_queue_size: int = 100):
+        self.max_queue_size = max_queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, user_id: str, payload: Dict[str, Any]) -> None:
+        self._dispatch(user_id, payload)
+
+    def _dispatch(self, user_id: str, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, payload)
+            except RuntimeError:
+                # 이미 종료된 이벤트 루프
+                pass
+
+    def subscriber_count(self, user_id: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(user_id, ()))
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: str):
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        entry = (loop, queue)
+        with self._lock:
+            self._subscribers[user_id].add(entry)
+        try:
+            yield queue
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(user_id)
+                if subscribers is not None:
+                    subscribers.discard(entry)
+                    if not subscribers:
+                        del self._subscribers[user_id]
+
+    def close(self) -> None:
+        pass
+
+
+class PostgresBroker(InProcessBroker):
+    """Fans out across workers through Postgres LISTEN/NOTIFY.
+
+    ``publish`` issues ``pg_notify`` and every worker (including this one) receives it on a
+    background listener thread, which hands it to the local in-process subscribers.
+    """
+
+    def __init__(self, dsn: str, channel: str = NOTIFICATION_CHANNEL, max_queue_size: int = 100):
+        super().__init__(max_queue_size=max_queue_size)
+        self.dsn = dsn
+        self.channel = channel
+        self._publish_conn = None
+        self._publish_lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        # close()가 select 대기 중인 리스너를 바로 깨우기 위한 self-pipe
+        self._wakeup_r, self._wakeup_w = os.pipe()
+
+    def _connect(self):
+        import psycopg2
+
+        conn = psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        return conn
+
+    def publish(self, user_id: str, payload: Dict[str, Any]) -> None:
+        message = json.dumps({"user_id": user_id, "payload": payload}, ensure_ascii=False)
+        with self._publish_lock:
+            try:
+                if self._publish_conn is None or self._publish_conn.closed:
+                    self._publish_conn = self._connect()
+                with self._publish_conn.cursor() as cur:
+                    cur.execute("SELECT pg_notify(%s, %s)", (self.channel, message))
+            except Exception as e:
+                logger.error(f"pg_notify failed: {str(e)}")
+                self._publish_conn = None
+
+    def _listen(self) -> None:
+        while not self._stopped.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN "{self.channel}"')
+                while not self._stopped.is_set():
+                    readable, _, _ = select.select([conn, self._wakeup_r], [], [], 5.0)
+                    if self._wakeup_r in readable:
+                        break
+                    if not readable:
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            message = json.loads(notify.payload)
+                        except json.JSONDecodeError:
+                            continue
+                        self._dispatch(message["user_id"], message["payload"])
+            except Exception as e:
+                logger.error(f"Notification listener error: {str(e)}")
+                self._stopped.wait(1.0)
+            finally:
+                # 재연결마다 새 연결을 열므로 이전 연결은 반드시 닫음
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def _ensure_listener(self) -> None:
+        if self._listener is None or not self._listener.is_alive():
+            self._listener = threading.Thread(target=self._listen, name="notification-listener", daemon=True)
+            self._listener.start()
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: str):
+        self._ensure_listener()
+        async with super().subscribe(user_id) as queue:
+            yield queue
+
+    def close(self) -> None:
+        """Stop the listener thread (it closes its own connection) and close the publish connection."""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        os.write(self._wakeup_w, b"\0")  # select 대기 중인 리스너를 바로 깨움
+        with self._publish_lock:
+            if self._publish_conn is not None:
+                self._publish_conn.close()
+                self._publish_conn = None
+        if self._listener is not None:
+            self._listener.join(timeout=1.0)
+        os.close(self._wakeup_r)
+        os.close(self._wakeup_w)
+
+
+_broker: Optional[InProcessBroker] = None
+_broker_lock = threading.Lock()
+
+
+def create_broker() -> InProcessBroker:
+    """Build the broker selected by NOTIFICATION_BROKER (memory | postgres)."""
+    kind = os.getenv("NOTIFICATION_BROKER", "memory").lower()
+    if kind == "postgres":
+        from .config import DATABASE_URL
+
+        return PostgresBroker(DATABASE_URL)
+    return InProcessBroker()
+
+
+def get_notification_broker() -> InProcessBroker:
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = create_broker()
+    return _broker
+
+
+def close_notification_broker() -> None:
+    """Close the process-wide broker on application shutdown."""
+    set_notification_broker(None)
+
+
+def set_notification_broker(broker: Optional[InProcessBroker]) -> None:
+    """Swap the process-wide broker (tests, custom transports)."""
+    global _broker
+    with _broker_lock:
+        if _broker is not None and _broker is not broker:
+            _broker.close()
+        _broker = broker
@@ -1,15 +1,25 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timezone
+from sqlalchemy.orm import Session, contains_eager, joinedload, selectinload
+from sqlalchemy import case, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime, timezone, timedelta
+import logging
 import uuid
 from .models import (
     User, Category, Product, Order, OrderItem, 
-    WishlistItem, Notification, ActiveToken, RiderDelivery
+    WishlistItem, Notification, NotificationArchive, ActiveToken, RiderDelivery
 )
 from .config import get_db
+from .pagination import paginate_keyset
+from geo import geohash, get_geocoder
+from geo.spatial import postgis_available, geography_point
+from .pubsub import get_notification_broker
+from models.rider import DeliveryParty
+from pricing import FeeQuote, item_factor, quote
 from passlib.context import CryptContext
 
+logger = logging.getLogger(__name__)
+
 # Configure bcrypt to truncate passwords >72 bytes instead of raising ValueError
 pwd_context = CryptContext(
     schemes=["bcrypt"],
@@ -21,6 +31,24 @@ class DatabaseService:
     def __init__(self, db: Session):
         self.db = db
     
+    def _locate(self, address: Optional[str], allow_remote: bool = False) -> Dict[str, Any]:
+        """주소를 geocoding해 lat/lng/geohash 컬럼 값으로 반환 (실패 시 None - 백필 작업이 재시도)
+
+        원격 geocoder(kakao)는 allow_remote일 때만 호출합니다. 요청 경로에서는 좌표를 비워 두고
+        geocode_in_background / jobs.geocode_backfill이 채웁니다.
+        """
+        coords = None
+        geocoder = get_geocoder()
+        if address and isinstance(address, str) and (allow_remote or not geocoder.remote):
+            try:
+                coords = geocoder.geocode(address)
+            except Exception:
+                coords = None
+        if not coords:
+            return {"lat": None, "lng": None, "geohash": None}
+        lat, lng = coords
+        return {"lat": lat, "lng": lng, "geohash": geohash.encode(lat, lng)}
+    
     # User operations
     def create_user(self, email: str, password: str, name: str, phone: str, kakao_open_profile: str, role: str = "user", address: str = None) -> User:
         user_id = str(uuid.uuid4())
@@ -34,7 +62,8 @@ class DatabaseService:
             phone=phone,
             kakao_open_profile=kakao_open_profile,
             role=role,
-            address=address
+            address=address,
+            **self._locate(address)
         )
         self.db.add(user)
         self.db.commit()
@@ -93,6 +122,8 @@ class DatabaseService:
             query = query.order_by(Product.price_amount.asc())
         elif sort == "price_desc":
             query = query.order_by(Product.price_amount.desc())
+        elif sort == "popular":
+            query = query.order_by(Product.likes_count.desc(), Product.created_at.desc())
         elif sort == "recent":
             query = query.order_by(Product.created_at.desc())
         else:
@@ -103,6 +134,16 @@ class DatabaseService:
     def get_product_by_id(self, product_id: str) -> Optional[Product]:
         return self.db.query(Product).filter(Product.id == product_id).first()
     
+    def quote_delivery_fee(self, buyer_id: str, items: List[Tuple[Product, int]]) -> FeeQuote:
+        """첫 번째 상품 위치(픽업) → 구매자 주소 좌표 기준 추천 배송비. items는 (상품, 수량) 목록"""
+        buyer = self.get_user_by_id(buyer_id)
+        pickup = items[0][0]
+        return quote(
+            (pickup.lat, pickup.lng),
+            (buyer.lat, buyer.lng) if buyer else None,
+            [(item_factor(p.category.name if p.category else None, p.attributes), q) for p, q in items]
+        )
+    
     def get_product_with_seller(self, product_id: str) -> Optional[Product]:
         """상품과 판매자 정보를 함께 조회"""
         return self.db.query(Product).join(User, Product.seller_id == User.id).filter(Product.id == product_id).first()
@@ -120,7 +161,8 @@ class DatabaseService:
             seller_id=seller_id,
             location=location,
             attributes=attributes or {},
-            images=images or []
+            images=images or [],
+            **self._locate(location)
         )
         self.db.add(product)
         self.db.commit()
@@ -143,6 +185,8 @@ class DatabaseService:
             product.category_id = updates["category_id"]
         if "location" in updates and updates["location"] is not None:
             product.location = updates["location"]
+            for key, value in self._locate(updates["location"]).items():
+                setattr(product, key, value)
         if "attributes" in updates and updates["attributes"] is not None:
             product.attributes = updates["attributes"]
         if "images" in updates and updates["images"] is not None:
@@ -165,38 +209,122 @@ class DatabaseService:
         return True
     
     # Wishlist operations
-    def add_to_wishlist(self, user_id: str, product_id: str) -> WishlistItem:
-        # Check if already in wishlist
-        existing = self.db.query(WishlistItem).filter(
-            and_(WishlistItem.user_id == user_id, WishlistItem.product_id == product_id)
-        ).first()
-        
-        if existing:
-            return existing
-        
-        wishlist_item = WishlistItem(
-            id=str(uuid.uuid4()),
-            user_id=user_id,
-            product_id=product_id
-        )
-        self.db.add(wishlist_item)
+    def _insert_ignore_conflicts(self, model, values: Dict[str, Any]) -> bool:
+        """INSERT ... ON CONFLICT DO NOTHING; 새 행이 들어갔으면 True"""
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            try:
+                self.db.execute(insert(model).values(**values))
+                return True
+            except IntegrityError:
+                self.db.rollback()
+                return False
+        result = self.db.execute(dialect_insert(model).values(**values).on_conflict_do_nothing())
+        return result.rowcount == 1
+    
+    def add_to_wishlist(self, user_id: str, product_id: str) -> Optional[bool]:
+        """찜 추가 (단일 upsert 문). 이미 찜한 상품이면 False, 없는 상품이면 None
+
+        상품을 따로 조회하지 않고 likes_count UPDATE가 바꾼 행 수(또는 FK 위반)로 존재를 확인합니다.
+        """
+        try:
+            inserted = self._insert_ignore_conflicts(WishlistItem, {
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "product_id": product_id
+            })
+        except IntegrityError:
+            # products FK 위반 (Postgres)
+            self.db.rollback()
+            return None
+        if inserted:
+            # 같은 트랜잭션에서 likes_count = likes_count + 1
+            updated = self.db.query(Product).filter(Product.id == product_id).update(
+                {Product.likes_count: func.coalesce(Product.likes_count, 0) + 1},
+                synchronize_session=False
+            )
+            if updated == 0:
+                # FK를 검사하지 않는 DB(SQLite)에서 없는 상품
+                self.db.rollback()
+                return None
         self.db.commit()
-        self.db.refresh(wishlist_item)
-        return wishlist_item
+        return inserted
     
     def remove_from_wishlist(self, user_id: str, product_id: str) -> bool:
-        item = self.db.query(WishlistItem).filter(
-            and_(WishlistItem.user_id == user_id, WishlistItem.product_id == product_id)
-        ).first()
+        """찜 삭제 (단일 DELETE 문)"""
+        deleted = self.db.query(WishlistItem).filter(
+            WishlistItem.user_id == user_id,
+            WishlistItem.product_id == product_id
+        ).delete(synchronize_session=False)
+        if deleted:
+            self.db.query(Product).filter(
+                Product.id == product_id,
+                Product.likes_count > 0
+            ).update({Product.likes_count: Product.likes_count - 1}, synchronize_session=False)
+        self.db.commit()
+        return deleted > 0
+    
+    def reconcile_likes_counts(self, batch_size: int = 500) -> int:
+        """likes_count를 wishlist_items 실제 개수와 맞춥니다 (상품 id keyset 배치).
+
+        어긋난 행만 상관 서브쿼리 UPDATE로 다시 세므로, 실행 중 들어온 찜 토글과 경합해도
+        마지막 값이 실제 개수가 됩니다. 보정한 상품 수를 반환합니다.
+        """
+        fixed = 0
+        last_id = None
         
-        if item:
-            self.db.delete(item)
+        while True:
+            query = self.db.query(Product.id, Product.likes_count)
+            if last_id is not None:
+                query = query.filter(Product.id > last_id)
+            rows = query.order_by(Product.id).limit(batch_size).all()
+            if not rows:
+                break
+            
+            ids = [row.id for row in rows]
+            counts = dict(self.db.query(WishlistItem.product_id, func.count(WishlistItem.id)).filter(
+                WishlistItem.product_id.in_(ids)
+            ).group_by(WishlistItem.product_id).all())
+            drifted = [row.id for row in rows if (row.likes_count or 0) != counts.get(row.id, 0)]
+            
+            if drifted:
+                actual = select(func.count(WishlistItem.id)).where(
+                    WishlistItem.product_id == Product.id
+                ).scalar_subquery()
+                self.db.query(Product).filter(Product.id.in_(drifted)).update(
+                    {Product.likes_count: actual}, synchronize_session=False
+                )
             self.db.commit()
-            return True
-        return False
+            
+            fixed += len(drifted)
+            last_id = ids[-1]
+            if len(rows) < batch_size:
+                break
+        return fixed
     
-    def get_user_wishlist(self, user_id: str) -> List[WishlistItem]:
-        return self.db.query(WishlistItem).filter(WishlistItem.user_id == user_id).all()
+    def get_user_wishlist(self, user_id: str, skip: int = 0, limit: int = None) -> List[WishlistItem]:
+        """찜 목록 페이지 조회 - 상품과 카테고리를 하나의 조인 쿼리로 함께 로드"""
+        query = self.db.query(WishlistItem).join(WishlistItem.product).options(
+            contains_eager(WishlistItem.product).joinedload(Product.category)
+        ).filter(
+            WishlistItem.user_id == user_id
+        ).order_by(WishlistItem.created_at.desc(), WishlistItem.id.desc())
+        
+        if skip:
+            query = query.offset(skip)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+    
+    def count_user_wishlist(self, user_id: str) -> int:
+        """찜 목록 전체 개수 (삭제된 상품 제외)"""
+        return self.db.query(func.count(WishlistItem.id)).join(
+            Product, WishlistItem.product_id == Product.id
+        ).filter(WishlistItem.user_id == user_id).scalar() or 0
     
     # Cart operations removed
     
@@ -285,6 +413,8 @@ class DatabaseService:
             user.kakao_open_profile = kakao_open_profile
         if address is not None:
             user.address = address
+            for key, value in self._locate(address).items():
+                setattr(user, key, value)
         
         self.db.commit()
         self.db.refresh(user)
@@ -317,13 +447,31 @@ class DatabaseService:
         self.db.add(notification)
         self.db.commit()
         self.db.refresh(notification)
+        
+        # 열려 있는 알림 스트림으로 전달 (커밋 이후에만 발행)
+        get_notification_broker().publish(user_id, {
+            "id": notification.id,
+            "user_id": notification.user_id,
+            "title": notification.title,
+            "message": notification.message,
+            "type": notification.type,
+            "is_read": bool(notification.is_read),
+            "created_at": notification.created_at.isoformat() if notification.created_at else ""
+        })
         return notification
     
-    def get_user_notifications(self, user_id: str, skip: int = 0, limit: int = 20) -> List[Notification]:
-        """Get notifications for a user with pagination"""
-        return self.db.query(Notification).filter(
-            Notification.user_id == user_id
-        ).order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
+    def get_user_notifications(self, user_id: str, skip: int = 0, limit: int = 20,
+                               before: str = None, after: str = None) -> List[Notification]:
+        """Get notifications for a user, newest first.
+
+        `before`/`after` are notification ids used as keyset cursors and served from the
+        (user_id, created_at) index; `skip` is kept for offset-based clients. A cursor whose
+        notification was archived still resolves through notifications_archive; an unknown
+        cursor, or one belonging to another user, raises InvalidCursor.
+        """
+        query = self.db.query(Notification).filter(Notification.user_id == user_id)
+        return paginate_keyset(query, Notification, limit, before=before, after=after, skip=skip,
+                               archive_model=NotificationArchive, owner={"user_id": user_id})
     
     def get_unread_notification_count(self, user_id: str) -> int:
         """Get count of unread notifications for a user"""
@@ -341,6 +489,33 @@ class DatabaseService:
         self.db.commit()
         return updated_count
     
+    def archive_read_notifications(self, older_than_days: int = 90, batch_size: int = 1000) -> int:
+        """Move read notifications older than N days into notifications_archive in batches"""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+        columns = ["id", "user_id", "title", "message", "type", "is_read", "created_at"]
+        archived = 0
+        
+        while True:
+            ids = [row.id for row in self.db.query(Notification.id).filter(
+                Notification.is_read == True,
+                Notification.created_at < cutoff
+            ).order_by(Notification.created_at).limit(batch_size).all()]
+            if not ids:
+                break
+            
+            # 배치 단위로 복사 후 삭제 (한 트랜잭션)
+            self.db.execute(insert(NotificationArchive).from_select(
+                columns,
+                select(*[getattr(Notification, c) for c in columns]).where(Notification.id.in_(ids))
+            ))
+            self.db.query(Notification).filter(Notification.id.in_(ids)).delete(synchronize_session=False)
+            self.db.commit()
+            archived += len(ids)
+            
+            if len(ids) < batch_size:
+                break
+        return archived
+    
     # Removed: social login helper (get_or_create_social_user)
     
     # Initialize sample data
@@ -573,35 +748,171 @@ class DatabaseService:
         self.db.commit()
     
     # Rider operations
-    def get_available_orders_for_delivery(self) -> List[Order]:
-        """배송 가능한 주문 목록 조회 (라이더용)"""
-        return self.db.query(Order).filter(
+    def _available_orders_query(self):
+        # 피드 항목에 필요한 구매자(inner join)와 상품+판매자가 있는 주문상품(EXISTS)을 LIMIT 전에 걸러
+        # 페이지가 짧게 오거나 뒤에 결과가 남았는데 빈 페이지가 오지 않도록 함
+        return self.db.query(Order).join(Order.user).filter(
             Order.status.in_(["pending", "paid"]),  # 결제 대기 중이거나 결제 완료된 주문
-            Order.delivery_type == "delivery"  # 배송 요청된 주문만
-        ).all()
+            Order.delivery_type == "delivery",  # 배송 요청된 주문만
+            Order.items.any(OrderItem.product.has(Product.seller.has()))
+        )
+    
+    def _with_feed_details(self, query):
+        return query.options(
+            contains_eager(Order.user),
+            selectinload(Order.items).joinedload(OrderItem.product).joinedload(Product.seller)
+        )
+    
+    def get_available_orders_for_delivery(self, skip: int = 0, limit: int = 20) -> List[Order]:
+        """배송 가능한 주문 목록 조회 (라이더용)
+
+        주문+구매자를 한 번, 주문상품+상품+판매자를 IN 배치로 한 번 조회하므로
+        주문 수와 관계없이 쿼리 2개로 피드에 필요한 정보를 모두 가져옵니다.
+        """
+        return self._with_feed_details(self._available_orders_query()).order_by(
+            Order.created_at.desc(), Order.id.desc()
+        ).offset(skip).limit(limit).all()
+    
+    def get_available_orders_near(self, lat: float, lng: float, radius_km: float,
+                                  skip: int = 0, limit: int = 20) -> List[tuple]:
+        """픽업 지점이 반경 안에 있는 배송 가능 주문을 가까운 순으로 (order, distance_km) 반환
+
+        PostGIS가 있으면 GiST 인덱스 + ST_DWithin, 없으면 geohash 접두사 범위 스캔으로
+        후보를 좁힌 뒤 haversine 거리로 정확히 거릅니다.
+        """
+        base = self._available_orders_query()
+        
+        if postgis_available(self.db.get_bind()):
+            pickup = geography_point(Order.pickup_lat, Order.pickup_lng)
+            center = geography_point(lat, lng)
+            distance = func.ST_Distance(pickup, center)
+            rows = base.with_entities(Order.id, distance.label("distance_m")).filter(
+                func.ST_DWithin(pickup, center, radius_km * 1000)
+            ).order_by(distance, Order.id).offset(skip).limit(limit).all()
+            ranked = [(row.id, row.distance_m / 1000.0) for row in rows]
+        else:
+            min_lat, min_lng, max_lat, max_lng = geohash.bounding_box(lat, lng, radius_km)
+            # 셀마다 (delivery_type, status, pickup_geohash) 인덱스 범위 스캔 하나씩; OR로 묶으면 범위를 못 씀
+            # cover()의 셀은 서로 겹치지 않으므로 UNION ALL에 중복이 없습니다
+            branches = [
+                base.with_entities(Order.id, Order.pickup_lat, Order.pickup_lng).filter(
+                    Order.pickup_geohash >= cell,
+                    Order.pickup_geohash < cell + geohash.PREFIX_UPPER_BOUND,
+                    Order.pickup_lat.between(min_lat, max_lat),
+                    Order.pickup_lng.between(min_lng, max_lng)
+                )
+                for cell in geohash.cover(lat, lng, radius_km)
+            ]
+            candidates = branches[0].union_all(*branches[1:]).all()
+            within = []
+            for row in candidates:
+                d = geohash.haversine_km(lat, lng, row.pickup_lat, row.pickup_lng)
+                if d <= radius_km:
+                    within.append((d, row.id))
+            within.sort()
+            ranked = [(order_id, d) for d, order_id in within[skip:skip + limit]]
+        
+        if not ranked:
+            return []
+        orders = {
+            o.id: o for o in self._with_feed_details(self.db.query(Order).join(Order.user)).filter(
+                Order.id.in_([order_id for order_id, _ in ranked])
+            ).all()
+        }
+        return [(orders[order_id], d) for order_id, d in ranked if order_id in orders]
+    
+    def geocode_row(self, model, row_id: str) -> bool:
+        """사용자/상품 한 행의 좌표를 채웁니다 (원격 geocoder 포함). 그사이 주소가 바뀌었으면 쓰지 않음"""
+        address_column = User.address if model is User else Product.location
+        address = self.db.query(address_column).filter(model.id == row_id).scalar()
+        located = self._locate(address, allow_remote=True)
+        if not located["geohash"]:
+            return False
+        updated = self.db.query(model).filter(model.id == row_id, address_column == address).update(
+            located, synchronize_session=False
+        )
+        self.db.commit()
+        return updated == 1
+    
+    def backfill_coordinates(self, batch_size: int = 200) -> Dict[str, int]:
+        """좌표가 비어 있는 사용자/상품을 geocoding하고 주문 픽업 좌표를 채웁니다"""
+        counts = {"users": 0, "products": 0, "orders": 0}
+        
+        for model, address_column, key in ((User, User.address, "users"), (Product, Product.location, "products")):
+            last_id = None
+            while True:
+                query = self.db.query(model).filter(model.geohash.is_(None), address_column.isnot(None))
+                if last_id is not None:
+                    query = query.filter(model.id > last_id)
+                rows = query.order_by(model.id).limit(batch_size).all()
+                if not rows:
+                    break
+                for row in rows:
+                    located = self._locate(getattr(row, address_column.key), allow_remote=True)
+                    if located["geohash"]:
+                        for column, value in located.items():
+                            setattr(row, column, value)
+                        counts[key] += 1
+                self.db.commit()
+                last_id = rows[-1].id
+        
+        # 주문 픽업 좌표는 첫 번째 상품 좌표를 복사
+        last_id = None
+        while True:
+            query = self.db.query(Order).options(
+                selectinload(Order.items).joinedload(OrderItem.product)
+            ).filter(Order.pickup_geohash.is_(None))
+            if last_id is not None:
+                query = query.filter(Order.id > last_id)
+            orders = query.order_by(Order.id).limit(batch_size).all()
+            if not orders:
+                break
+            for order in orders:
+                product = order.items[0].product if order.items else None
+                if product is not None and product.geohash:
+                    order.pickup_lat, order.pickup_lng, order.pickup_geohash = product.lat, product.lng, product.geohash
+                    counts["orders"] += 1
+            self.db.commit()
+            last_id = orders[-1].id
+        return counts
     
     def get_order_with_details(self, order_id: str) -> Optional[Order]:
         """주문과 관련된 모든 정보를 포함하여 조회"""
         return self.db.query(Order).filter(Order.id == order_id).first()
     
-    def create_rider_delivery(self, order_id: str, rider_id: str, delivery_fee: float) -> RiderDelivery:
-        """라이더 배송 신청 생성"""
-        # 주문 정보 가져오기
-        order = self.get_order_with_details(order_id)
-        if not order:
-            raise ValueError("Order not found")
+    def order_party_snapshot(self, buyer: User, seller: User, shipping_address: Optional[str]) -> Dict[str, Dict[str, Any]]:
+        """주문 당사자 연락처 스냅샷 (Order.seller_info/buyer_info). 저장 시 한 번 검증합니다"""
+        return {
+            "seller_info": DeliveryParty(
+                id=seller.id,
+                name=seller.name,
+                phone=seller.phone,
+                address=seller.address,  # 단순한 문자열 주소
+                kakao_open_profile=seller.kakao_open_profile
+            ).model_dump(),
+            "buyer_info": DeliveryParty(
+                id=buyer.id,
+                name=buyer.name,
+                phone=buyer.phone,
+                address=shipping_address,  # 배송 주소 사용 (단순한 문자열)
+                kakao_open_profile=buyer.kakao_open_profile
+            ).model_dump()
+        }
+    
+    def _ensure_order_parties(self, order: Order) -> None:
+        """스냅샷 컬럼이 생기기 전 주문이면 구매자/판매자를 조회해 한 번 채웁니다"""
+        if order.seller_info and order.buyer_info:
+            return
         
-        # 구매자 정보 가져오기
         buyer = self.get_user_by_id(order.user_id)
         if not buyer:
             raise ValueError("Buyer not found")
         
-        # 판매자 정보 가져오기 (첫 번째 상품의 판매자)
+        # 판매자 정보 (첫 번째 상품의 판매자)
         if not order.items:
             raise ValueError("Order has no items")
         
-        first_item = order.items[0]
-        product = self.get_product_by_id(first_item.product_id)
+        product = self.get_product_by_id(order.items[0].product_id)
         if not product:
             raise ValueError("Product not found")
         
@@ -609,31 +920,32 @@ class DatabaseService:
         if not seller:
             raise ValueError("Seller not found")
         
-        # 판매자와 구매자 정보를 JSON으로 저장
-        seller_info = {
-            "id": seller.id,
-            "name": seller.name,
-            "phone": seller.phone,
-            "address": seller.address,  # 단순한 문자열 주소
-            "kakao_open_profile": seller.kakao_open_profile
-        }
+        snapshot = self.order_party_snapshot(buyer, seller, order.shipping_address)
+        order.seller_info = snapshot["seller_info"]
+        order.buyer_info = snapshot["buyer_info"]
+    
+    def create_rider_delivery(self, order_id: str, rider_id: str, delivery_fee: Optional[float] = None) -> RiderDelivery:
+        """라이더 배송 신청 생성 (delivery_fee를 비우면 주문의 배송비 견적을 그대로 제안)"""
+        # 주문 정보 가져오기
+        order = self.get_order_with_details(order_id)
+        if not order:
+            raise ValueError("Order not found")
         
-        buyer_info = {
-            "id": buyer.id,
-            "name": buyer.name,
-            "phone": buyer.phone,
-            "address": order.shipping_address,  # 배송 주소 사용 (단순한 문자열)
-            "kakao_open_profile": buyer.kakao_open_profile
-        }
+        # 주문에 당사자 스냅샷이 없으면(예전 주문) 한 번 만들어 저장
+        self._ensure_order_parties(order)
+        
+        if delivery_fee is None:
+            # 배송비가 저장되지 않은 예전 주문은 지금 견적을 냅니다
+            delivery_fee = order.shipping_fee or self.quote_delivery_fee(
+                order.user_id, [(item.product, item.quantity) for item in order.items if item.product]
+            ).fee
         
-        # 라이더 배송 신청 생성
+        # 라이더 배송 신청 생성 (판매자/구매자 정보는 주문 스냅샷을 참조)
         rider_delivery = RiderDelivery(
             id=str(uuid.uuid4()),
             order_id=order_id,
             rider_id=rider_id,
-            delivery_fee=delivery_fee,
-            seller_info=seller_info,
-            buyer_info=buyer_info
+            delivery_fee=delivery_fee
         )
         
         self.db.add(rider_delivery)
@@ -641,11 +953,22 @@ class DatabaseService:
         self.db.refresh(rider_delivery)
         return rider_delivery
     
-    def get_rider_deliveries(self, rider_id: str) -> List[RiderDelivery]:
-        """라이더의 배송 신청 목록 조회"""
-        return self.db.query(RiderDelivery).filter(
+    def get_rider_deliveries(self, rider_id: str, status: Optional[str] = None,
+                             limit: int = 20, before: Optional[str] = None) -> List[RiderDelivery]:
+        """라이더의 배송 신청 목록 조회 (최신순, before 커서로 다음 페이지)"""
+        query = self.db.query(RiderDelivery).options(joinedload(RiderDelivery.order)).filter(
             RiderDelivery.rider_id == rider_id
-        ).order_by(RiderDelivery.created_at.desc()).all()
+        )
+        if status:
+            query = query.filter(RiderDelivery.status == status)
+        return paginate_keyset(query, RiderDelivery, limit, before=before, owner={"rider_id": rider_id})
+    
+    def count_rider_deliveries(self, rider_id: str, status: Optional[str] = None) -> int:
+        """라이더의 배송 신청 전체 개수 ((rider_id, created_at) 인덱스 범위 COUNT)"""
+        query = self.db.query(func.count(RiderDelivery.id)).filter(RiderDelivery.rider_id == rider_id)
+        if status:
+            query = query.filter(RiderDelivery.status == status)
+        return query.scalar()
     
     def get_rider_delivery_by_id(self, delivery_id: str) -> Optional[RiderDelivery]:
         """라이더 배송 신청 상세 조회"""
@@ -664,12 +987,90 @@ class DatabaseService:
         self.db.refresh(delivery)
         return delivery
     
-    def get_order_rider_deliveries(self, order_id: str) -> List[RiderDelivery]:
-        """특정 주문의 라이더 배송 신청 목록 조회"""
-        return self.db.query(RiderDelivery).filter(
-            RiderDelivery.order_id == order_id
-        ).order_by(RiderDelivery.created_at.desc()).all()
+    def accept_rider_delivery(self, order_id: str, delivery_id: str) -> Optional[Tuple[RiderDelivery, List[str]]]:
+        """배송 신청 승락 (compare-and-set, 단일 트랜잭션)
+
+        1. 주문을 pending/paid → shipping 으로 조건부 UPDATE (동시 승락 중 하나만 통과)
+        2. 같은 주문의 pending 신청을 한 문장으로: 대상은 accepted, 나머지는 rejected
+
+        이미 다른 신청이 승락됐거나 대상 신청이 pending이 아니면 롤백하고 None을 반환합니다.
+        성공하면 (승락된 신청, 함께 거절된 라이더 id 목록)을 반환합니다.
+        """
+        now = datetime.now(timezone.utc)
+        claimed = self.db.query(Order).filter(
+            Order.id == order_id,
+            Order.status.in_(["pending", "paid"])
+        ).update({Order.status: "shipping", Order.updated_at: now}, synchronize_session=False)
+        if claimed != 1:
+            self.db.rollback()
+            return None
+        
+        rows = self.db.execute(
+            update(RiderDelivery).where(
+                RiderDelivery.order_id == order_id,
+                RiderDelivery.status == "pending"
+            ).values(
+                status=case((RiderDelivery.id == delivery_id, "accepted"), else_="rejected"),
+                updated_at=now
+            ).returning(RiderDelivery.id, RiderDelivery.rider_id),
+            execution_options={"synchronize_session": False}
+        ).all()
+        if delivery_id not in {row.id for row in rows}:
+            self.db.rollback()
+            return None
+        self.db.commit()
+        
+        delivery = self.db.get(RiderDelivery, delivery_id, populate_existing=True)
+        rejected_rider_ids = [row.rider_id for row in rows if row.id != delivery_id]
+        return delivery, rejected_rider_ids
+    
+    def reject_rider_delivery(self, order_id: str, delivery_id: str) -> Optional[RiderDelivery]:
+        """배송 신청 거절 (pending일 때만 바뀌는 조건부 UPDATE). 이미 처리된 신청이면 None"""
+        rejected = self.db.query(RiderDelivery).filter(
+            RiderDelivery.id == delivery_id,
+            RiderDelivery.order_id == order_id,
+            RiderDelivery.status == "pending"
+        ).update({
+            RiderDelivery.status: "rejected",
+            RiderDelivery.updated_at: datetime.now(timezone.utc)
+        }, synchronize_session=False)
+        self.db.commit()
+        if rejected != 1:
+            return None
+        return self.db.get(RiderDelivery, delivery_id, populate_existing=True)
+    
+    def get_order_rider_deliveries(self, order_id: str, status: Optional[str] = None,
+                                   limit: int = 20, before: Optional[str] = None) -> List[RiderDelivery]:
+        """특정 주문의 라이더 배송 신청 목록 조회 (최신순, before 커서로 다음 페이지)"""
+        query = self.db.query(RiderDelivery).filter(RiderDelivery.order_id == order_id)
+        if status:
+            query = query.filter(RiderDelivery.status == status)
+        return paginate_keyset(query, RiderDelivery, limit, before=before, owner={"order_id": order_id})
+    
+    def count_order_rider_deliveries(self, order_id: str, status: Optional[str] = None) -> int:
+        """특정 주문의 배송 신청 전체 개수 ((order_id, created_at) 인덱스 범위 COUNT)"""
+        query = self.db.query(func.count(RiderDelivery.id)).filter(RiderDelivery.order_id == order_id)
+        if status:
+            query = query.filter(RiderDelivery.status == status)
+        return query.scalar()
     
     # Ad operations
     # Ad 관련 메서드는 제거되었습니다.
     # 광고는 서버에서 고정된 목록을 제공하므로 데이터베이스 관련 메서드가 필요하지 않습니다.
+
+
+def _geocode_in_background(bind, model, row_id: str) -> None:
+    db = Session(bind=bind)
+    try:
+        DatabaseService(db).geocode_row(model, row_id)
+    except Exception as e:
+        logger.warning(f"Background geocoding failed for {model.__tablename__} {row_id}: {str(e)}")
+    finally:
+        db.close()
+
+
+def geocode_in_background(background_tasks, db: Session, row) -> None:
+    """원격 geocoder를 쓸 때 좌표가 비어 있는 사용자/상품을 응답 후 BackgroundTasks에서 geocoding합니다.
+    실패하면 좌표는 NULL로 남고 jobs.geocode_backfill이 다시 처리합니다."""
+    if row is not None and row.geohash is None and get_geocoder().remote:
+        background_tasks.add_task(_geocode_in_background, db.get_bind(), type(row), row.id)
@@ -0,0 +1,7 @@
+from .geocoder import Geocoder, StaticGeocoder, OfflineGeocoder, KakaoGeocoder, get_geocoder, set_geocoder
+from . import geohash
+
+__all__ = [
+    "Geocoder", "StaticGeocoder", "OfflineGeocoder", "KakaoGeocoder",
+    "get_geocoder", "set_geocoder", "geohash"
+]
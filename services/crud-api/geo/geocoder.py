@@ -0,0 +1,144 @@
+"""
+주소 → 좌표 변환기
+
+GEOCODER 환경 변수로 구현을 고릅니다.
+- offline (기본): 네트워크 없이 시/구 대표 좌표를 쓰는 스텁 (개발/테스트용)
+- kakao: Kakao Local 주소 검색 API (KAKAO_REST_API_KEY 필요)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import urllib.parse
+import urllib.request
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Coordinates = Tuple[float, float]
+
+
+class Geocoder:
+    """주소 문자열을 (lat, lng)로 변환하는 인터페이스"""
+
+    # 네트워크 호출이 필요한 구현이면 True - 요청 경로에서 부르지 않고 백그라운드/백필 작업에서만 호출
+    remote = False
+
+    def geocode(self, address: str) -> Optional[Coordinates]:
+        raise NotImplementedError
+
+
+class StaticGeocoder(Geocoder):
+    """주소 → 좌표 고정 매핑 (테스트용)"""
+
+    def __init__(self, mapping: Dict[str, Coordinates]):
+        self.mapping = dict(mapping)
+
+    def geocode(self, address: str) -> Optional[Coordinates]:
+        return self.mapping.get(address)
+
+
+class OfflineGeocoder(Geocoder):
+    """주소에 포함된 시/구 이름으로 대표 좌표를 찾는 오프라인 스텁.
+
+    같은 구 안의 서로 다른 주소가 한 점에 겹치지 않도록 주소 해시로 약 ±1km 결정적 오프셋을 줍니다.
+    """
+
+    DISTRICTS: Dict[str, Coordinates] = {
+        "강남구": (37.5172, 127.0473), "강동구": (37.5301, 127.1238), "강북구": (37.6396, 127.0257),
+        "강서구": (37.5509, 126.8495), "관악구": (37.4784, 126.9516), "광진구": (37.5385, 127.0823),
+        "구로구": (37.4954, 126.8874), "금천구": (37.4569, 126.8955), "노원구": (37.6542, 127.0568),
+        "도봉구": (37.6688, 127.0471), "동대문구": (37.5744, 127.0400), "동작구": (37.5124, 126.9393),
+        "마포구": (37.5663, 126.9019), "서대문구": (37.5791, 126.9368), "서초구": (37.4837, 127.0324),
+        "성동구": (37.5633, 127.0371), "성북구": (37.5894, 127.0167), "송파구": (37.5145, 127.1059),
+        "양천구": (37.5170, 126.8664), "영등포구": (37.5264, 126.8962), "용산구": (37.5324, 126.9900),
+        "은평구": (37.6027, 126.9291), "종로구": (37.5735, 126.9790), "중구": (37.5641, 126.9979),
+        "중랑구": (37.6066, 127.0927),
+    }
+    CITIES: Dict[str, Coordinates] = {
+        "서울": (37.5665, 126.9780), "부산": (35.1796, 129.0756), "인천": (37.4563, 126.7052),
+        "대구": (35.8714, 128.6014), "대전": (36.3504, 127.3845), "광주": (35.1595, 126.8526),
+        "울산": (35.5384, 129.3114), "세종": (36.4800, 127.2890), "수원": (37.2636, 127.0286),
+        "성남": (37.4201, 127.1265),
+    }
+    JITTER_DEGREES = 0.01
+
+    def geocode(self, address: str) -> Optional[Coordinates]:
+        if not address:
+            return None
+        base = None
+        for name, coords in self.DISTRICTS.items():
+            if name in address and (name != "중구" or "서울" in address):
+                base = coords
+                break
+        if base is None:
+            for name, coords in self.CITIES.items():
+                if name in address:
+                    base = coords
+                    break
+        if base is None:
+            return None
+        digest = hashlib.sha1(address.encode("utf-8")).digest()
+        dlat = (digest[0] / 255.0 - 0.5) * 2 * self.JITTER_DEGREES
+        dlng = (digest[1] / 255.0 - 0.5) * 2 * self.JITTER_DEGREES
+        return base[0] + dlat, base[1] + dlng
+
+
+class KakaoGeocoder(Geocoder):
+    """Kakao Local 주소 검색 API"""
+
+    URL = "https://dapi.kakao.com/v2/local/search/address.json"
+    remote = True
+
+    def __init__(self, api_key: str, timeout: float = 3.0):
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def geocode(self, address: str) -> Optional[Coordinates]:
+        if not address:
+            return None
+        request = urllib.request.Request(
+            f"{self.URL}?{urllib.parse.urlencode({'query': address})}",
+            headers={"Authorization": f"KakaoAK {self.api_key}"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                documents = json.loads(response.read().decode("utf-8")).get("documents", [])
+        except Exception as e:
+            logger.warning(f"Kakao geocoding failed for '{address}': {str(e)}")
+            return None
+        if not documents:
+            return None
+        return float(documents[0]["y"]), float(documents[0]["x"])
+
+
+_geocoder: Optional[Geocoder] = None
+_geocoder_lock = threading.Lock()
+
+
+def create_geocoder() -> Geocoder:
+    kind = os.getenv("GEOCODER", "offline").lower()
+    if kind == "kakao":
+        api_key = os.getenv("KAKAO_REST_API_KEY")
+        if api_key:
+            return KakaoGeocoder(api_key)
+        logger.warning("GEOCODER=kakao but KAKAO_REST_API_KEY is not set, using offline geocoder")
+    return OfflineGeocoder()
+
+
+def get_geocoder() -> Geocoder:
+    global _geocoder
+    if _geocoder is None:
+        with _geocoder_lock:
+            if _geocoder is None:
+                _geocoder = create_geocoder()
+    return _geocoder
+
+
+def set_geocoder(geocoder: Optional[Geocoder]) -> None:
+    """프로세스 전역 geocoder 교체 (테스트, 다른 공급자)"""
+    global _geocoder
+    with _geocoder_lock:
+        _geocoder = geocoder
@@ -0,0 +1,108 @@
+"""
+Geohash 인코딩과 반경 검색용 셀 커버링
+
+주소 좌표를 geohash 문자열로 저장하면 접두사가 같은 행이 B-tree 인덱스에서 연속 구간을
+이루므로, PostGIS가 없어도 반경 검색을 인덱스 범위 스캔으로 처리할 수 있습니다.
+"""
+
+import math
+from typing import List, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(BASE32)}
+
+# 모든 geohash 문자보다 큰 문자 - prefix 범위의 상한으로 사용 ('z' < '{')
+PREFIX_UPPER_BOUND = "{"
+
+EARTH_RADIUS_KM = 6371.0088
+DEFAULT_PRECISION = 9
+
+
+def encode(lat: float, lng: float, precision: int = DEFAULT_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def bounds(cell: str) -> Tuple[float, float, float, float]:
+    """셀의 (min_lat, min_lng, max_lat, max_lng)"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+    for c in cell:
+        value = _DECODE[c]
+        for shift in range(4, -1, -1):
+            rng = lng_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lng_range[0], lat_range[1], lng_range[1]
+
+
+def decode(cell: str) -> Tuple[float, float]:
+    """셀 중심 좌표 (lat, lng)"""
+    min_lat, min_lng, max_lat, max_lng = bounds(cell)
+    return (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def cover(lat: float, lng: float, radius_km: float, max_cells: int = 16) -> List[str]:
+    """반경 원의 bounding box를 덮는 geohash 접두사 목록.
+
+    max_cells 이하로 덮을 수 있는 가장 세밀한 정밀도를 고르므로, 셀 하나하나가
+    인덱스의 짧은 연속 구간이 됩니다.
+    """
+    min_lat, min_lng, max_lat, max_lng = bounding_box(lat, lng, radius_km)
+    min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0)
+    for precision in range(DEFAULT_PRECISION, 0, -1):
+        cell_min_lat, cell_min_lng, cell_max_lat, cell_max_lng = bounds(encode(min_lat, min_lng, precision))
+        dlat, dlng = cell_max_lat - cell_min_lat, cell_max_lng - cell_min_lng
+        rows = int((max_lat - cell_min_lat) // dlat) + 1
+        cols = int((max_lng - cell_min_lng) // dlng) + 1
+        if rows * cols > max_cells:
+            continue
+        cells = set()
+        for i in range(rows):
+            for j in range(cols):
+                c_lat = min(cell_min_lat + (i + 0.5) * dlat, 90.0)
+                c_lng = (cell_min_lng + (j + 0.5) * dlng + 180) % 360 - 180
+                cells.add(encode(c_lat, c_lng, precision))
+        return sorted(cells)
+    return sorted(set(BASE32))
+
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """반경 원을 감싸는 (min_lat, min_lng, max_lat, max_lng)"""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    dlng = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    return lat - dlat, lng - dlng, lat + dlat, lng + dlng
@@ -0,0 +1,46 @@
+"""
+PostGIS 감지와 공간 인덱스 DDL
+
+PostGIS 확장이 설치된 Postgres에서는 주문 픽업 좌표에 GiST 인덱스를 만들고 ST_DWithin으로
+반경 검색을 합니다. 그 외(SQLite, 확장 없는 Postgres)에서는 geohash 접두사 인덱스를 씁니다.
+"""
+
+import logging
+from sqlalchemy import func, text
+
+logger = logging.getLogger(__name__)
+
+_postgis_cache = {}
+
+
+def postgis_available(bind) -> bool:
+    engine = getattr(bind, "engine", bind)
+    if engine.dialect.name != "postgresql":
+        return False
+    key = str(engine.url)
+    if key not in _postgis_cache:
+        try:
+            with engine.connect() as conn:
+                _postgis_cache[key] = conn.execute(
+                    text("SELECT 1 FROM pg_extension WHERE extname = 'postgis'")
+                ).first() is not None
+        except Exception as e:
+            logger.warning(f"PostGIS detection failed: {str(e)}")
+            _postgis_cache[key] = False
+    return _postgis_cache[key]
+
+
+def geography_point(lat, lng):
+    """geography(ST_SetSRID(ST_MakePoint(lng, lat), 4326)) - 인덱스 식과 동일해야 함"""
+    return func.geography(func.ST_SetSRID(func.ST_MakePoint(lng, lat), 4326))
+
+
+def ensure_spatial_indexes(engine) -> None:
+    if not postgis_available(engine):
+        return
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_orders_pickup_geog ON orders USING GIST "
+            "(geography(ST_SetSRID(ST_MakePoint(pickup_lng, pickup_lat), 4326)))"
+        ))
+    logger.info("PostGIS spatial index ensured on orders pickup location")
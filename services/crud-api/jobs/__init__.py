@@ -0,0 +1 @@
+"""Batch maintenance jobs. Run from the service root, e.g. ``python -m jobs.archive_notifications``."""
@@ -0,0 +1,45 @@
+"""
+읽은 알림 보관 작업
+
+N일보다 오래된 읽은 알림을 notifications_archive 테이블로 배치 단위 이동합니다.
+크론 등에서 주기적으로 실행합니다:
+
+    python -m jobs.archive_notifications --days 90 --batch-size 1000
+"""
+
+import argparse
+import logging
+import sys
+
+from database.config import SessionLocal, create_tables
+from database.service import DatabaseService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Archive old read notifications")
+    parser.add_argument("--days", type=int, default=90, help="archive read notifications older than this many days")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows moved per transaction")
+    args = parser.parse_args(argv)
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        archived = DatabaseService(db).archive_read_notifications(
+            older_than_days=args.days,
+            batch_size=args.batch_size
+        )
+        logger.info(f"Archived {archived} notifications older than {args.days} days")
+        return archived
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        logger.error(f"Notification archive failed: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,41 @@
+"""
+좌표 백필 작업
+
+좌표가 비어 있는 사용자 주소/상품 위치를 geocoding하고, 주문의 픽업 좌표를 채웁니다.
+geocoder 장애로 쓰기 시점에 좌표를 못 얻은 행도 이 작업이 다시 처리합니다.
+
+    GEOCODER=kakao KAKAO_REST_API_KEY=... python -m jobs.geocode_backfill --batch-size 200
+"""
+
+import argparse
+import logging
+import sys
+
+from database.config import SessionLocal, create_tables
+from database.service import DatabaseService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Geocode users/products and fill order pickup coordinates")
+    parser.add_argument("--batch-size", type=int, default=200, help="rows geocoded per transaction")
+    args = parser.parse_args(argv)
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        counts = DatabaseService(db).backfill_coordinates(batch_size=args.batch_size)
+        logger.info(f"Geocoded {counts['users']} users, {counts['products']} products; filled {counts['orders']} orders")
+        return counts
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        logger.error(f"Geocode backfill failed: {str(e)}")
+        sys.exit(1)
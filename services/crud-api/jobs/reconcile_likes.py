@@ -0,0 +1,40 @@
+"""
+찜 개수 보정 작업
+
+products.likes_count를 wishlist_items의 실제 개수와 비교해 어긋난 상품만 배치로 보정합니다.
+
+    python -m jobs.reconcile_likes --batch-size 500
+"""
+
+import argparse
+import logging
+import sys
+
+from database.config import SessionLocal, create_tables
+from database.service import DatabaseService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Reconcile products.likes_count with wishlist_items")
+    parser.add_argument("--batch-size", type=int, default=500, help="products checked per transaction")
+    args = parser.parse_args(argv)
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        fixed = DatabaseService(db).reconcile_likes_counts(batch_size=args.batch_size)
+        logger.info(f"Corrected likes_count on {fixed} products")
+        return fixed
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        logger.error(f"likes_count reconciliation failed: {str(e)}")
+        sys.exit(1)
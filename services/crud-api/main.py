@@ -1,8 +1,10 @@
 import uvicorn
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 from database import init_sample_data
 from database.config import create_tables
+from database.pubsub import close_notification_broker
 from routers import (
     health_router, auth_router, users_router,
     products_router, wishlist_router, orders_router,
@@ -20,7 +22,8 @@ async def lifespan(app: FastAPI):
     create_tables()
     init_sample_data()
     yield
-    # Shutdown (if needed)
+    # Shutdown: 알림 브로커의 LISTEN/NOTIFY 연결 정리 (리스너 스레드 join은 이벤트 루프 밖에서)
+    await run_in_threadpool(close_notification_broker)
 
 app = FastAPI(
     title="가져가구 API",
@@ -1,7 +1,7 @@
 from .base import Money, Address
 from .auth import SignupRequest, LoginRequest, Tokens, User, AuthResponse, RefreshTokenRequest, LogoutRequest, UpdateUserRequest, DeleteUserRequest
-from .product import Category, Image, Product, ProductCreate, ProductUpdate, SellerInfo, WishlistItemRequest, WishlistItem, WishlistResponse
-from .order import OrderItem, Order, OrderCreate, OrderStatusUpdate
+from .product import Category, Image, Product, ProductCreate, ProductUpdate, SellerInfo, WishlistItemRequest, WishlistItem, WishlistResponse, WishlistToggleResponse
+from .order import OrderItem, Order, OrderCreate, OrderStatusUpdate, DeliveryFeeQuoteRequest, DeliveryFeeQuote
 from .notification import Notification, NotificationListResponse, MarkAsReadRequest
 from .upload import PresignedUrlRequest, PresignedUrlResponse, UploadResponse
 from .rider import RiderDeliveryRequest, RiderDeliveryResponse, OrderWithDetails, DeliveryStatusUpdate, RiderDeliveryListResponse
@@ -11,8 +11,8 @@ __all__ = [
     "SignupRequest", "LoginRequest", "Tokens", "User", "AuthResponse",
     "RefreshTokenRequest", "LogoutRequest", "UpdateUserRequest", "DeleteUserRequest",
     "Category", "Image", "Product", "ProductCreate", "ProductUpdate", "SellerInfo",
-    "WishlistItemRequest", "WishlistItem", "WishlistResponse",
-    "OrderItem", "Order", "OrderCreate", "OrderStatusUpdate",
+    "WishlistItemRequest", "WishlistItem", "WishlistResponse", "WishlistToggleResponse",
+    "OrderItem", "Order", "OrderCreate", "OrderStatusUpdate", "DeliveryFeeQuoteRequest", "DeliveryFeeQuote",
     "Notification", "NotificationListResponse", "MarkAsReadRequest",
     "PresignedUrlRequest", "PresignedUrlResponse", "UploadResponse",
     "RiderDeliveryRequest", "RiderDeliveryResponse", "OrderWithDetails", 
@@ -16,6 +16,8 @@ class NotificationListResponse(BaseModel):
     notifications: list[Notification]
     total: int
     unread_count: int
+    next_cursor: Optional[str] = None  # 다음(더 오래된) 페이지: ?before=next_cursor
+    prev_cursor: Optional[str] = None  # 새로 도착한 알림: ?after=prev_cursor
 
 
 class MarkAsReadRequest(BaseModel):
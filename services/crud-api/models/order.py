@@ -22,6 +22,19 @@ class OrderCreate(BaseModel):
     delivery_type: str  # "pickup" 또는 "delivery"
 
 
+class DeliveryFeeQuoteRequest(BaseModel):
+    items: List[OrderItemCreate]
+
+
+class DeliveryFeeQuote(BaseModel):
+    """추천 배송비 견적"""
+    fee: float
+    distance_km: Optional[float] = None  # 판매자/구매자 좌표를 모르면 None (기본 배송비)
+    base_fee: float
+    distance_fee: float
+    load_factor: float  # 카테고리/크기/수량에 따른 계수
+
+
 class OrderStatusUpdate(BaseModel):
     status: str  # "pending", "paid", "shipping", "completed", "cancelled"
 
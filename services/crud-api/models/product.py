@@ -98,4 +98,11 @@ class WishlistResponse(BaseModel):
     items: List[WishlistItem]
     page: int
     page_size: int
-    total: int
\ No newline at end of file
+    total: int
+
+
+class WishlistToggleResponse(BaseModel):
+    """찜 추가/삭제 간단 응답 (compact 모드, 상품 조회·COUNT 없이 토글 결과만)"""
+    product_id: str
+    in_wishlist: bool
+    changed: bool  # 이번 요청으로 찜 상태가 바뀌었는지 (이미 찜한 상품이면 False)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, field_validator
+from typing import Optional, List, Dict, Any, Iterable
 from .base import Address, Money
 from .auth import User
 
@@ -7,7 +7,24 @@ from .auth import User
 class RiderDeliveryRequest(BaseModel):
     """라이더 배송 신청 요청"""
     order_id: str
-    delivery_fee: float
+    delivery_fee: Optional[float] = None  # 비우면 주문의 추천 배송비
+
+
+class DeliveryParty(BaseModel):
+    """주문에 저장되는 판매자/구매자 스냅샷 (Order.seller_info/buyer_info JSON)
+
+    쓰기 시점에 한 번 검증해 저장하므로, 읽을 때는 다시 검증하지 않고 그대로 응답에 씁니다.
+    """
+    id: str
+    name: str
+    phone: str
+    address: str = ""  # 단순한 문자열 주소
+    kakao_open_profile: str
+
+    @field_validator("address", mode="before")
+    @classmethod
+    def _empty_address(cls, value):
+        return value or ""
 
 
 class RiderDeliveryResponse(BaseModel):
@@ -31,6 +48,11 @@ class OrderWithDetails(BaseModel):
     product_info: dict  # 상품 정보
     total_amount: float
     created_at: str
+    distance_km: Optional[float] = None  # 반경 검색 시 라이더 위치에서 픽업 지점까지 거리
+    suggested_fee: Optional[float] = None  # 주문 시 견적된 배송비 (라이더 제안 기본값)
+
+
+DELIVERY_STATUSES = ["pending", "accepted", "rejected", "in_progress", "completed"]
 
 
 class DeliveryStatusUpdate(BaseModel):
@@ -41,4 +63,51 @@ class DeliveryStatusUpdate(BaseModel):
 class RiderDeliveryListResponse(BaseModel):
     """라이더 배송 목록 응답"""
     items: List[RiderDeliveryResponse]
-    total: int
+    total: int  # 필터에 맞는 전체 배송 신청 수 (이 페이지의 항목 수가 아님)
+    next_cursor: Optional[str] = None  # 다음(더 오래된) 페이지: ?before=next_cursor
+
+
+def _party_user(info: Dict[str, Any]) -> Dict[str, Any]:
+    """저장된 DeliveryParty를 User 응답 모양으로 (이메일은 보안상 제외)"""
+    return {
+        "id": info["id"],
+        "role": "user",
+        "email": "",
+        "name": info["name"],
+        "phone": info["phone"],
+        "address": info.get("address") or "",
+        "kakao_open_profile": info["kakao_open_profile"],
+        "created_at": ""
+    }
+
+
+def serialize_delivery(delivery) -> Dict[str, Any]:
+    """RiderDelivery 행을 RiderDeliveryResponse와 같은 모양의 dict로 변환 (pydantic 재검증 없음)"""
+    # 당사자 정보는 주문 스냅샷을 참조 (예전 신청은 행에 복사된 JSON)
+    seller_info = delivery.seller_info or delivery.order.seller_info
+    buyer_info = delivery.buyer_info or delivery.order.buyer_info
+    return {
+        "id": delivery.id,
+        "order_id": delivery.order_id,
+        "rider_id": delivery.rider_id,
+        "delivery_fee": delivery.delivery_fee,
+        "status": delivery.status,
+        "seller_info": _party_user(seller_info),
+        "buyer_info": _party_user(buyer_info),
+        "created_at": delivery.created_at.isoformat() if delivery.created_at else "",
+        "updated_at": delivery.updated_at.isoformat() if delivery.updated_at else None
+    }
+
+
+def serialize_delivery_list(deliveries: Iterable, limit: Optional[int] = None,
+                            total: Optional[int] = None) -> Dict[str, Any]:
+    """배송 신청 목록을 RiderDeliveryListResponse 모양의 dict로 한 번에 변환
+
+    total은 전체 개수 (페이지를 나눌 때는 COUNT 결과를 넘김, 없으면 items 개수)
+    """
+    items = [serialize_delivery(delivery) for delivery in deliveries]
+    return {
+        "items": items,
+        "total": total if total is not None else len(items),
+        "next_cursor": items[-1]["id"] if limit is not None and len(items) == limit else None
+    }
@@ -0,0 +1,3 @@
+from .delivery_fee import FeeQuote, cell_distance_km, item_factor, quote
+
+__all__ = ["FeeQuote", "cell_distance_km", "item_factor", "quote"]
@@ -0,0 +1,129 @@
+"""
+배송비 견적
+
+판매자(픽업 지점)와 구매자(배송지) 좌표, 상품 카테고리와 크기로 추천 배송비를 계산합니다.
+
+    fee = (BASE_FEE + PER_KM_FEE * 거리) * 부피 계수   (FEE_UNIT 단위로 올림)
+
+거리는 두 좌표가 속한 geohash 셀(CELL_PRECISION, 약 1.2km × 0.6km) 중심 사이의 직선 거리로 근사하고
+셀 쌍마다 메모이즈합니다. 같은 동네 사이의 주문은 대부분 같은 셀 쌍이라 반복 계산이 없습니다.
+좌표를 모르면 DEFAULT_FEE를 씁니다.
+"""
+
+import json
+import math
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Iterable, Optional, Tuple
+
+from geo import geohash
+
+CELL_PRECISION = 6
+BASE_FEE = float(os.getenv("DELIVERY_BASE_FEE", "3000"))
+PER_KM_FEE = float(os.getenv("DELIVERY_PER_KM_FEE", "700"))
+DEFAULT_FEE = float(os.getenv("DELIVERY_DEFAULT_FEE", "5000"))  # 좌표를 알 수 없을 때
+FEE_UNIT = 500  # 원 단위 올림
+EXTRA_ITEM_RATE = 0.25  # 두 번째 물건부터 물건당 가산
+
+# 카테고리 이름 → 부피 계수 (seed 카테고리 기준, 모르는 카테고리는 1.0)
+CATEGORY_FACTORS = {
+    "침대": 1.6,
+    "책상": 1.3,
+    "수납": 1.3,
+    "가전": 1.2,
+    "의자": 1.0,
+    "기타": 1.0,
+}
+
+# attributes["size"]에 포함된 단어 → 크기 계수 (먼저 맞는 항목 사용)
+SIZE_FACTORS = (
+    ("킹", 1.3),
+    ("퀸", 1.2),
+    ("대형", 1.2),
+    ("슈퍼싱글", 1.1),
+    ("4단", 1.1),
+    ("5단", 1.2),
+    ("1인용", 0.9),
+    ("소형", 0.8),
+    ("미니", 0.8),
+)
+
+Coordinates = Tuple[float, float]
+
+
+@dataclass(frozen=True)
+class FeeQuote:
+    fee: float
+    distance_km: Optional[float]  # 좌표를 모르면 None
+    base_fee: float
+    distance_fee: float
+    load_factor: float
+
+
+@lru_cache(maxsize=65536)
+def _cell_distance_km(cell_a: str, cell_b: str) -> float:
+    lat_a, lng_a = geohash.decode(cell_a)
+    lat_b, lng_b = geohash.decode(cell_b)
+    return geohash.haversine_km(lat_a, lng_a, lat_b, lng_b)
+
+
+def cell_distance_km(cell_a: str, cell_b: str) -> float:
+    """두 geohash 셀 중심 사이 거리 (대칭이므로 정렬해서 캐시 적중률을 높임)"""
+    if cell_a > cell_b:
+        cell_a, cell_b = cell_b, cell_a
+    return _cell_distance_km(cell_a, cell_b)
+
+
+def distance_km(origin: Optional[Coordinates], destination: Optional[Coordinates]) -> Optional[float]:
+    if not origin or not destination or None in origin or None in destination:
+        return None
+    return cell_distance_km(
+        geohash.encode(origin[0], origin[1], CELL_PRECISION),
+        geohash.encode(destination[0], destination[1], CELL_PRECISION)
+    )
+
+
+def size_factor(attributes: Any) -> float:
+    """상품 attributes(dict 또는 JSON 문자열)의 size 값으로 크기 계수를 구합니다"""
+    if isinstance(attributes, str):
+        try:
+            attributes = json.loads(attributes)
+        except json.JSONDecodeError:
+            return 1.0
+    size = str((attributes or {}).get("size") or "")
+    for keyword, factor in SIZE_FACTORS:
+        if keyword in size:
+            return factor
+    return 1.0
+
+
+def item_factor(category_name: Optional[str], attributes: Any = None) -> float:
+    return CATEGORY_FACTORS.get(category_name or "", 1.0) * size_factor(attributes)
+
+
+def load_factor(items: Iterable[Tuple[float, int]]) -> float:
+    """(물건 계수, 수량) 목록 → 가장 큰 물건 계수 + 추가 물건 가산"""
+    items = [(factor, quantity) for factor, quantity in items if quantity > 0]
+    if not items:
+        return 1.0
+    pieces = sum(quantity for _, quantity in items)
+    return max(factor for factor, _ in items) + EXTRA_ITEM_RATE * (pieces - 1)
+
+
+def quote(origin: Optional[Coordinates], destination: Optional[Coordinates],
+          items: Iterable[Tuple[float, int]]) -> FeeQuote:
+    """추천 배송비 계산. items는 (item_factor(...), 수량) 목록"""
+    factor = load_factor(items)
+    distance = distance_km(origin, destination)
+    if distance is None:
+        return FeeQuote(fee=DEFAULT_FEE, distance_km=None, base_fee=DEFAULT_FEE, distance_fee=0.0, load_factor=factor)
+    distance_fee = PER_KM_FEE * distance
+    fee = math.ceil((BASE_FEE + distance_fee) * factor / FEE_UNIT) * FEE_UNIT
+    return FeeQuote(
+        fee=float(fee),
+        distance_km=round(distance, 2),
+        base_fee=BASE_FEE,
+        distance_fee=round(distance_fee),
+        load_factor=round(factor, 2)
+    )
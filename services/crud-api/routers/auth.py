@@ -1,17 +1,17 @@
 import uuid
 from datetime import datetime, timedelta, timezone
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
 from sqlalchemy.orm import Session
 from models import SignupRequest, LoginRequest, AuthResponse, User, Tokens, RefreshTokenRequest, LogoutRequest
 from database.config import get_db
-from database.service import DatabaseService
+from database.service import DatabaseService, geocode_in_background
 from auth import hash_password, generate_token
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/signup", response_model=AuthResponse, status_code=201)
-def signup(request: SignupRequest, db: Session = Depends(get_db)):
+def signup(request: SignupRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     service = DatabaseService(db)
     existing = service.get_user_by_email(request.email)
     if existing:
@@ -26,6 +26,8 @@ def signup(request: SignupRequest, db: Session = Depends(get_db)):
         role=request.role or "user",
         address=request.address,
     )
+    # 원격 geocoder면 좌표는 응답 후 채움
+    geocode_in_background(background_tasks, db, created)
 
     access_token = generate_token()
     refresh_token = generate_token()
@@ -1,29 +1,49 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+import json
+import os
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from models.notification import Notification, NotificationListResponse, MarkAsReadRequest
 from database.config import get_db
 from database.service import DatabaseService
+from database.pagination import InvalidCursor
+from database.pubsub import get_notification_broker
 from auth.auth_utils import get_current_user
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
+# 프록시가 유휴 연결을 끊지 않도록 주기적으로 주석 이벤트를 보냄
+STREAM_KEEPALIVE_SECONDS = float(os.getenv("NOTIFICATION_STREAM_KEEPALIVE", "15"))
+
 
 @router.get("", response_model=NotificationListResponse)
 def get_notifications(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    before: Optional[str] = Query(None, description="이 알림 id보다 오래된 항목"),
+    after: Optional[str] = Query(None, description="이 알림 id보다 새로운 항목"),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get user's notifications with pagination"""
+    """Get user's notifications with offset or cursor pagination"""
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either 'before' or 'after', not both")
+    
     service = DatabaseService(db)
     
-    notifications = service.get_user_notifications(
-        user_id=current_user["id"],
-        skip=skip,
-        limit=limit
-    )
+    try:
+        notifications = service.get_user_notifications(
+            user_id=current_user["id"],
+            skip=skip,
+            limit=limit,
+            before=before,
+            after=after
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Unknown cursor")
     
     unread_count = service.get_unread_notification_count(current_user["id"])
     
@@ -42,7 +62,9 @@ def get_notifications(
     return NotificationListResponse(
         notifications=notification_list,
         total=len(notification_list),
-        unread_count=unread_count
+        unread_count=unread_count,
+        next_cursor=notification_list[-1].id if len(notification_list) == limit else None,
+        prev_cursor=notification_list[0].id if notification_list else after
     )
 
 
@@ -79,3 +101,50 @@ def get_unread_count(
     return {
         "unread_count": unread_count
     }
+
+
+def _sse(event: str, data: dict, event_id: str = None) -> str:
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@router.get("/stream")
+def stream_notifications(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Server-Sent Events stream of new notifications (replaces polling)"""
+    service = DatabaseService(db)
+    user_id = current_user["id"]
+    broker = get_notification_broker()
+
+    async def event_stream():
+        async with broker.subscribe(user_id) as queue:
+            # 구독한 뒤에 세야 그 사이 만들어진 알림이 개수나 푸시 중 하나에는 반영됨
+            try:
+                unread_count = await run_in_threadpool(service.get_unread_notification_count, user_id)
+            finally:
+                # 스트림이 끝날 때까지 DB 연결을 잡고 있지 않음
+                await run_in_threadpool(db.close)
+            yield f"retry: {int(STREAM_KEEPALIVE_SECONDS * 1000)}\n\n"
+            yield _sse("unread_count", {"unread_count": unread_count})
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse("notification", payload, event_id=payload.get("id"))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
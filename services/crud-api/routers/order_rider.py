@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from models.rider import RiderDeliveryResponse, RiderDeliveryListResponse
-from models.auth import User
+from models.rider import (
+    RiderDeliveryResponse, RiderDeliveryListResponse, DELIVERY_STATUSES,
+    serialize_delivery, serialize_delivery_list
+)
 from database.config import get_db
 from database.service import DatabaseService
+from database.pagination import InvalidCursor
 from auth import get_current_user
 
 router = APIRouter(prefix="/orders", tags=["order-rider"])
@@ -12,10 +17,16 @@ router = APIRouter(prefix="/orders", tags=["order-rider"])
 @router.get("/{order_id}/rider-deliveries", response_model=RiderDeliveryListResponse)
 def get_order_rider_deliveries(
     order_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    before: Optional[str] = Query(None, description="이 배송 신청 id보다 오래된 항목"),
+    status: Optional[str] = Query(None, description="배송 상태 필터"),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """주문에 대한 라이더 배송 신청 목록 조회 (구매자용)"""
+    """주문에 대한 라이더 배송 신청 목록 조회 (구매자용, 최신순 커서 페이지네이션)"""
+    if status is not None and status not in DELIVERY_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {DELIVERY_STATUSES}")
+    
     service = DatabaseService(db)
     
     # 주문이 해당 사용자의 것인지 확인
@@ -27,49 +38,14 @@ def get_order_rider_deliveries(
         raise HTTPException(status_code=403, detail="Access denied")
     
     # 라이더 배송 신청 목록 조회
-    deliveries = service.get_order_rider_deliveries(order_id)
-    
-    delivery_responses = []
-    for delivery in deliveries:
-        # 판매자와 구매자 정보를 User 모델로 변환
-        seller_info = User(
-            id=delivery.seller_info["id"],
-            role="user",
-            email="",  # 이메일은 보안상 제외
-            name=delivery.seller_info["name"],
-            phone=delivery.seller_info["phone"],
-            address=delivery.seller_info["address"],
-            kakao_open_profile=delivery.seller_info["kakao_open_profile"],
-            created_at=""
-        )
-        
-        buyer_info = User(
-            id=delivery.buyer_info["id"],
-            role="user",
-            email="",  # 이메일은 보안상 제외
-            name=delivery.buyer_info["name"],
-            phone=delivery.buyer_info["phone"],
-            address=delivery.buyer_info["address"],
-            kakao_open_profile=delivery.buyer_info["kakao_open_profile"],
-            created_at=""
-        )
-        
-        delivery_responses.append(RiderDeliveryResponse(
-            id=delivery.id,
-            order_id=delivery.order_id,
-            rider_id=delivery.rider_id,
-            delivery_fee=delivery.delivery_fee,
-            status=delivery.status,
-            seller_info=seller_info,
-            buyer_info=buyer_info,
-            created_at=delivery.created_at.isoformat() if delivery.created_at else "",
-            updated_at=delivery.updated_at.isoformat() if delivery.updated_at else None
-        ))
-    
-    return RiderDeliveryListResponse(
-        items=delivery_responses,
-        total=len(delivery_responses)
-    )
+    try:
+        deliveries = service.get_order_rider_deliveries(order_id, status=status, limit=limit, before=before)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Unknown cursor")
+    
+    # seller_info/buyer_info는 저장 시 검증됐으므로 response_model 재검증 없이 바로 직렬화
+    total = service.count_order_rider_deliveries(order_id, status=status)
+    return JSONResponse(content=serialize_delivery_list(deliveries, limit, total=total))
 
 
 @router.put("/{order_id}/rider-delivery/{delivery_id}/accept", response_model=RiderDeliveryResponse)
@@ -98,17 +74,11 @@ def accept_rider_delivery(
     if delivery.order_id != order_id:
         raise HTTPException(status_code=400, detail="Delivery request does not belong to this order")
     
-    if delivery.status != "pending":
-        raise HTTPException(status_code=400, detail="Delivery request is not pending")
-    
-    # 배송 신청 승락
-    updated_delivery = service.update_delivery_status(delivery_id, "accepted")
-    if not updated_delivery:
-        raise HTTPException(status_code=500, detail="Failed to accept delivery request")
-    
-    # 주문 상태를 배송 중으로 변경
-    order.status = "shipping"
-    db.commit()
+    # 주문/신청 상태를 조건부 UPDATE로 한 번에 전환 (동시 승락 시 하나만 성공)
+    result = service.accept_rider_delivery(order_id, delivery_id)
+    if result is None:
+        raise HTTPException(status_code=409, detail="Delivery request is no longer pending")
+    updated_delivery, rejected_rider_ids = result
     
     # 라이더에게 배송 승락 알림 전송
     service.create_notification(
@@ -118,40 +88,16 @@ def accept_rider_delivery(
         type="delivery"
     )
     
-    # 판매자와 구매자 정보를 User 모델로 변환
-    seller_info = User(
-        id=updated_delivery.seller_info["id"],
-        role="user",
-        email="",  # 이메일은 보안상 제외
-        name=updated_delivery.seller_info["name"],
-        phone=updated_delivery.seller_info["phone"],
-        address=updated_delivery.seller_info["address"],
-        kakao_open_profile=updated_delivery.seller_info["kakao_open_profile"],
-        created_at=""
-    )
-    
-    buyer_info = User(
-        id=updated_delivery.buyer_info["id"],
-        role="user",
-        email="",  # 이메일은 보안상 제외
-        name=updated_delivery.buyer_info["name"],
-        phone=updated_delivery.buyer_info["phone"],
-        address=updated_delivery.buyer_info["address"],
-        kakao_open_profile=updated_delivery.buyer_info["kakao_open_profile"],
-        created_at=""
-    )
+    # 함께 거절된 다른 라이더들에게 알림 전송
+    for rider_id in rejected_rider_ids:
+        service.create_notification(
+            user_id=rider_id,
+            title="배송 신청이 거절되었습니다",
+            message=f"주문 #{order_id[:8]}...의 배송이 다른 라이더에게 배정되었습니다.",
+            type="delivery"
+        )
     
-    return RiderDeliveryResponse(
-        id=updated_delivery.id,
-        order_id=updated_delivery.order_id,
-        rider_id=updated_delivery.rider_id,
-        delivery_fee=updated_delivery.delivery_fee,
-        status=updated_delivery.status,
-        seller_info=seller_info,
-        buyer_info=buyer_info,
-        created_at=updated_delivery.created_at.isoformat() if updated_delivery.created_at else "",
-        updated_at=updated_delivery.updated_at.isoformat() if updated_delivery.updated_at else None
-    )
+    return JSONResponse(content=serialize_delivery(updated_delivery))
 
 
 @router.put("/{order_id}/rider-delivery/{delivery_id}/reject", response_model=RiderDeliveryResponse)
@@ -180,13 +126,10 @@ def reject_rider_delivery(
     if delivery.order_id != order_id:
         raise HTTPException(status_code=400, detail="Delivery request does not belong to this order")
     
-    if delivery.status != "pending":
-        raise HTTPException(status_code=400, detail="Delivery request is not pending")
-    
-    # 배송 신청 거절
-    updated_delivery = service.update_delivery_status(delivery_id, "rejected")
+    # 배송 신청 거절 (pending일 때만)
+    updated_delivery = service.reject_rider_delivery(order_id, delivery_id)
     if not updated_delivery:
-        raise HTTPException(status_code=500, detail="Failed to reject delivery request")
+        raise HTTPException(status_code=409, detail="Delivery request is no longer pending")
     
     # 라이더에게 배송 거절 알림 전송
     service.create_notification(
@@ -196,37 +139,4 @@ def reject_rider_delivery(
         type="delivery"
     )
     
-    # 판매자와 구매자 정보를 User 모델로 변환
-    seller_info = User(
-        id=updated_delivery.seller_info["id"],
-        role="user",
-        email="",  # 이메일은 보안상 제외
-        name=updated_delivery.seller_info["name"],
-        phone=updated_delivery.seller_info["phone"],
-        address=updated_delivery.seller_info["address"],
-        kakao_open_profile=updated_delivery.seller_info["kakao_open_profile"],
-        created_at=""
-    )
-    
-    buyer_info = User(
-        id=updated_delivery.buyer_info["id"],
-        role="user",
-        email="",  # 이메일은 보안상 제외
-        name=updated_delivery.buyer_info["name"],
-        phone=updated_delivery.buyer_info["phone"],
-        address=updated_delivery.buyer_info["address"],
-        kakao_open_profile=updated_delivery.buyer_info["kakao_open_profile"],
-        created_at=""
-    )
-    
-    return RiderDeliveryResponse(
-        id=updated_delivery.id,
-        order_id=updated_delivery.order_id,
-        rider_id=updated_delivery.rider_id,
-        delivery_fee=updated_delivery.delivery_fee,
-        status=updated_delivery.status,
-        seller_info=seller_info,
-        buyer_info=buyer_info,
-        created_at=updated_delivery.created_at.isoformat() if updated_delivery.created_at else "",
-        updated_at=updated_delivery.updated_at.isoformat() if updated_delivery.updated_at else None
-    )
+    return JSONResponse(content=serialize_delivery(updated_delivery))
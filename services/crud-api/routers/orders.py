@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import List, Dict, Any
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
-from models import Order, OrderCreate, OrderStatusUpdate
+from models import Order, OrderCreate, OrderStatusUpdate, DeliveryFeeQuoteRequest, DeliveryFeeQuote
 from models.rider import RiderDeliveryResponse, RiderDeliveryListResponse
 from database.config import get_db
 from database.service import DatabaseService
@@ -26,18 +26,23 @@ def create_order(
     if not body_items:
         raise HTTPException(status_code=400, detail="Items are required")
     validated_items = []
+    quoted_items = []
     total_amount = 0
+    pickup_product = None
     for i in body_items:
         p = service.get_product_by_id(i.product_id)
         if not p:
             raise HTTPException(status_code=404, detail="Product not found")
+        if pickup_product is None:
+            pickup_product = p
         total_amount += (p.price_amount * i.quantity)
         validated_items.append({"product_id": p.id, "quantity": i.quantity, "price": p.price_amount})
+        quoted_items.append((p, i.quantity))
 
-    # 배송비 계산 (배송 방식일 때만)
+    # 배송비 견적 (배송 방식일 때만): 거리, 카테고리, 크기 기준. 주문에 저장됨
     shipping_fee = 0
     if request.delivery_type == "delivery":
-        shipping_fee = 5000 if total_amount < 100000 else 0
+        shipping_fee = service.quote_delivery_fee(current_user["id"], quoted_items).fee
         total_amount += shipping_fee
 
     # 사용자 주소를 배송 주소로 사용
@@ -45,6 +50,8 @@ def create_order(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     shipping_address = user.address or "주소 미입력"
+    # 판매자/구매자 연락처를 주문에 한 번 스냅샷 (라이더 배송 신청들이 참조)
+    parties = service.order_party_snapshot(user, pickup_product.seller, shipping_address) if pickup_product.seller else {}
 
     # Validate delivery_type
     if request.delivery_type not in ["pickup", "delivery"]:
@@ -61,6 +68,12 @@ def create_order(
         total_currency="KRW",
         shipping_address=shipping_address,
         delivery_type=request.delivery_type,
+        shipping_fee=shipping_fee,
+        **parties,
+        # 라이더 반경 검색용 픽업 지점 (첫 번째 상품 위치)
+        pickup_lat=pickup_product.lat,
+        pickup_lng=pickup_product.lng,
+        pickup_geohash=pickup_product.geohash,
     )
     db.add(order_row)
     db.flush()
@@ -100,6 +113,32 @@ def create_order(
     )
 
 
+@router.post("/delivery-fee-quote", response_model=DeliveryFeeQuote)
+def quote_delivery_fee(
+    request: DeliveryFeeQuoteRequest,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """주문 전 추천 배송비 견적 (판매자 위치 → 내 주소, 카테고리/크기 반영)"""
+    service = DatabaseService(db)
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Items are required")
+    quoted_items = []
+    for i in request.items:
+        p = service.get_product_by_id(i.product_id)
+        if not p:
+            raise HTTPException(status_code=404, detail="Product not found")
+        quoted_items.append((p, i.quantity))
+    fee_quote = service.quote_delivery_fee(current_user["id"], quoted_items)
+    return DeliveryFeeQuote(
+        fee=fee_quote.fee,
+        distance_km=fee_quote.distance_km,
+        base_fee=fee_quote.base_fee,
+        distance_fee=fee_quote.distance_fee,
+        load_factor=fee_quote.load_factor
+    )
+
+
 @router.get("", response_model=List[Order])
 def get_orders(
     current_user: dict = Depends(get_current_user),
@@ -122,7 +161,7 @@ def get_orders(
             status=r.status,
             items=[{"product_id": it.product_id, "quantity": it.quantity, "price": it.price} for it in items],
             total_amount=r.total_amount,
-            shipping_fee=0,  # not stored; computed earlier
+            shipping_fee=r.shipping_fee or 0,
             shipping_address=r.shipping_address,
             delivery_type=r.delivery_type,
             created_at=r.created_at.isoformat() if r.created_at else "",
@@ -162,7 +201,7 @@ def get_seller_orders(
             status=r.status,
             items=[{"product_id": it.product_id, "quantity": it.quantity, "price": it.price} for it in items],
             total_amount=r.total_amount,
-            shipping_fee=0,  # not stored; computed earlier
+            shipping_fee=r.shipping_fee or 0,
             shipping_address=r.shipping_address,
             delivery_type=r.delivery_type,
             created_at=r.created_at.isoformat() if r.created_at else "",
@@ -190,7 +229,7 @@ def get_order(
         status=r.status,
         items=[{"product_id": it.product_id, "quantity": it.quantity, "price": it.price} for it in items],
         total_amount=r.total_amount,
-        shipping_fee=0,
+        shipping_fee=r.shipping_fee or 0,
         shipping_address=r.shipping_address,
         delivery_type=r.delivery_type,
         created_at=r.created_at.isoformat() if r.created_at else "",
@@ -242,7 +281,7 @@ def update_order_status(
         status=r.status,
         items=[{"product_id": it.product_id, "quantity": it.quantity, "price": it.price} for it in items],
         total_amount=r.total_amount,
-        shipping_fee=0,
+        shipping_fee=r.shipping_fee or 0,
         shipping_address=r.shipping_address,
         delivery_type=r.delivery_type,
         created_at=r.created_at.isoformat() if r.created_at else "",
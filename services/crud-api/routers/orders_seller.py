@@ -42,7 +42,7 @@ def get_seller_orders(
             status=r.status,
             items=[{"product_id": it.product_id, "quantity": it.quantity, "price": it.price} for it in items],
             total_amount=r.total_amount,
-            shipping_fee=0,  # not stored; computed earlier
+            shipping_fee=r.shipping_fee or 0,
             shipping_address=r.shipping_address,
             delivery_type=r.delivery_type,
             created_at=r.created_at.isoformat() if r.created_at else "",
@@ -109,7 +109,7 @@ def update_order_status_by_seller(
         status=r.status,
         items=[{"product_id": it.product_id, "quantity": it.quantity, "price": it.price} for it in items],
         total_amount=r.total_amount,
-        shipping_fee=0,
+        shipping_fee=r.shipping_fee or 0,
         shipping_address=r.shipping_address,
         delivery_type=r.delivery_type,
         created_at=r.created_at.isoformat() if r.created_at else "",
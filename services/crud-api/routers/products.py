@@ -2,11 +2,11 @@ import uuid
 import os
 from datetime import datetime
 from typing import Dict, List, Optional, Any
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
 from sqlalchemy.orm import Session
 from models import Product, ProductCreate, ProductUpdate, SellerInfo
 from database.config import get_db
-from database.service import DatabaseService
+from database.service import DatabaseService, geocode_in_background
 from auth import get_current_user
 
 router = APIRouter(prefix="/products", tags=["products"])
@@ -92,6 +92,7 @@ def get_products(
 @router.post("", response_model=Product, status_code=201)
 def create_product(
     request: ProductCreate,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -131,6 +132,8 @@ def create_product(
         attributes=request.attributes or {},
         images=image_entries,
     )
+    # 원격 geocoder면 좌표는 응답 후 채움
+    geocode_in_background(background_tasks, db, created)
 
     # 판매자 정보 가져오기
     seller_info = None
@@ -246,6 +249,7 @@ def get_product(product_id: str, db: Session = Depends(get_db)):
 def update_product(
     product_id: str,
     request: ProductUpdate,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -301,6 +305,7 @@ def update_product(
     updated = service.update_product(product_id, updates)
     if not updated:
         raise HTTPException(status_code=404, detail="Product not found")
+    geocode_in_background(background_tasks, db, updated)
     
     # 판매자 정보 가져오기
     seller_info = None
@@ -1,91 +1,111 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from models.rider import (
     RiderDeliveryRequest, RiderDeliveryResponse, OrderWithDetails,
-    DeliveryStatusUpdate, RiderDeliveryListResponse
+    DeliveryStatusUpdate, RiderDeliveryListResponse, DELIVERY_STATUSES,
+    serialize_delivery, serialize_delivery_list
 )
 from models.auth import User
 from models.product import SellerInfo
 from auth import get_current_user
 from database.config import get_db
 from database.service import DatabaseService
+from database.pagination import InvalidCursor
 
 router = APIRouter(prefix="/rider", tags=["rider"])
 
 
+def _to_order_details(order, distance_km: float = None) -> Optional[OrderWithDetails]:
+    """미리 로드된 주문(구매자/상품/판매자 포함)을 피드 항목으로 변환"""
+    # 구매자 정보
+    buyer = order.user
+    if not buyer:
+        return None
+        
+    buyer_info = User(
+        id=buyer.id,
+        role=buyer.role,
+        email=buyer.email,
+        name=buyer.name,
+        phone=buyer.phone,
+        address=buyer.address,
+        kakao_open_profile=buyer.kakao_open_profile,
+        created_at=buyer.created_at.isoformat() if buyer.created_at else ""
+    )
+    
+    # 판매자 정보 (상품과 판매자가 있는 첫 번째 주문상품 - 쿼리에서 이미 보장)
+    first_item = next((item for item in order.items if item.product and item.product.seller), None)
+    if first_item is None:
+        return None
+        
+    product = first_item.product
+    seller = product.seller
+        
+    seller_info = User(
+        id=seller.id,
+        role=seller.role,
+        email=seller.email,
+        name=seller.name,
+        phone=seller.phone,
+        address=seller.address,
+        kakao_open_profile=seller.kakao_open_profile,
+        created_at=seller.created_at.isoformat() if seller.created_at else ""
+    )
+    
+    # 상품 정보
+    product_info = {
+        "id": product.id,
+        "title": product.title,
+        "description": product.description,
+        "price": {
+            "currency": product.price_currency,
+            "amount": product.price_amount
+        },
+        "images": product.images or []
+    }
+    
+    return OrderWithDetails(
+        order_id=order.id,
+        buyer_info=buyer_info,
+        seller_info=seller_info,
+        product_info=product_info,
+        total_amount=order.total_amount,
+        created_at=order.created_at.isoformat() if order.created_at else "",
+        distance_km=round(distance_km, 3) if distance_km is not None else None,
+        suggested_fee=order.shipping_fee or None
+    )
+
+
 @router.get("/available-orders", response_model=List[OrderWithDetails])
 def get_available_orders_for_delivery(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="라이더 위도"),
+    lng: Optional[float] = Query(None, ge=-180, le=180, description="라이더 경도"),
+    radius: float = Query(3.0, gt=0, le=50, description="검색 반경 (km)"),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """배송 가능한 주문 목록 조회 (라이더용)"""
+    """배송 가능한 주문 목록 조회 (라이더용). lat/lng를 주면 반경 내 주문을 가까운 순으로 반환"""
     service = DatabaseService(db)
+    skip = (page - 1) * page_size
     
-    orders = service.get_available_orders_for_delivery()
-    order_details = []
+    if (lat is None) != (lng is None):
+        raise HTTPException(status_code=400, detail="lat and lng must be provided together")
     
-    for order in orders:
-        # 구매자 정보
-        buyer = service.get_user_by_id(order.user_id)
-        if not buyer:
-            continue
-            
-        buyer_info = User(
-            id=buyer.id,
-            role=buyer.role,
-            email=buyer.email,
-            name=buyer.name,
-            phone=buyer.phone,
-            address=buyer.address,
-            kakao_open_profile=buyer.kakao_open_profile,
-            created_at=buyer.created_at.isoformat() if buyer.created_at else ""
-        )
-        
-        # 판매자 정보 (첫 번째 상품의 판매자)
-        if not order.items:
-            continue
-            
-        first_item = order.items[0]
-        product = service.get_product_by_id(first_item.product_id)
-        if not product:
-            continue
-            
-        seller = service.get_user_by_id(product.seller_id)
-        if not seller:
-            continue
-            
-        seller_info = User(
-            id=seller.id,
-            role=seller.role,
-            email=seller.email,
-            name=seller.name,
-            phone=seller.phone,
-            address=seller.address,
-            kakao_open_profile=seller.kakao_open_profile,
-            created_at=seller.created_at.isoformat() if seller.created_at else ""
-        )
-        
-        # 상품 정보
-        product_info = {
-            "id": product.id,
-            "title": product.title,
-            "description": product.description,
-            "price": {
-                "currency": product.price_currency,
-                "amount": product.price_amount
-            },
-            "images": product.images or []
-        }
-        
-        order_details.append(OrderWithDetails(
-            order_id=order.id,
-            buyer_info=buyer_info,
-            seller_info=seller_info,
-            product_info=product_info,
-            total_amount=order.total_amount,
-            created_at=order.created_at.isoformat() if order.created_at else ""
-        ))
+    # 구매자/상품/판매자는 이미 함께 로드됨 (주문별 추가 쿼리 없음)
+    if lat is not None:
+        rows = service.get_available_orders_near(lat, lng, radius, skip=skip, limit=page_size)
+    else:
+        rows = [(order, None) for order in service.get_available_orders_for_delivery(skip=skip, limit=page_size)]
+    
+    order_details = []
+    for order, distance_km in rows:
+        details = _to_order_details(order, distance_km)
+        if details is not None:
+            order_details.append(details)
     
     return order_details
 
@@ -112,44 +132,11 @@ def create_delivery_request(
             service.create_notification(
                 user_id=order.user_id,
                 title="라이더가 배송을 신청했습니다!",
-                message=f"주문 #{request.order_id[:8]}...에 대한 라이더 배송 신청이 들어왔습니다. 배송비: {request.delivery_fee:,}원",
+                message=f"주문 #{request.order_id[:8]}...에 대한 라이더 배송 신청이 들어왔습니다. 배송비: {delivery.delivery_fee:,}원",
                 type="delivery_request"
             )
         
-        # 판매자와 구매자 정보를 User 모델로 변환
-        seller_info = User(
-            id=delivery.seller_info["id"],
-            role="user",
-            email="",  # 이메일은 보안상 제외
-            name=delivery.seller_info["name"],
-            phone=delivery.seller_info["phone"],
-            address=delivery.seller_info["address"],
-            kakao_open_profile=delivery.seller_info["kakao_open_profile"],
-            created_at=""
-        )
-        
-        buyer_info = User(
-            id=delivery.buyer_info["id"],
-            role="user", 
-            email="",  # 이메일은 보안상 제외
-            name=delivery.buyer_info["name"],
-            phone=delivery.buyer_info["phone"],
-            address=delivery.buyer_info["address"],
-            kakao_open_profile=delivery.buyer_info["kakao_open_profile"],
-            created_at=""
-        )
-        
-        return RiderDeliveryResponse(
-            id=delivery.id,
-            order_id=delivery.order_id,
-            rider_id=delivery.rider_id,
-            delivery_fee=delivery.delivery_fee,
-            status=delivery.status,
-            seller_info=seller_info,
-            buyer_info=buyer_info,
-            created_at=delivery.created_at.isoformat() if delivery.created_at else "",
-            updated_at=delivery.updated_at.isoformat() if delivery.updated_at else None
-        )
+        return JSONResponse(content=serialize_delivery(delivery), status_code=201)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -157,55 +144,26 @@ def create_delivery_request(
 
 @router.get("/my-deliveries", response_model=RiderDeliveryListResponse)
 def get_my_deliveries(
+    limit: int = Query(20, ge=1, le=100),
+    before: Optional[str] = Query(None, description="이 배송 신청 id보다 오래된 항목"),
+    status: Optional[str] = Query(None, description="배송 상태 필터"),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """내 배송 신청 목록 조회"""
-    service = DatabaseService(db)
+    """내 배송 신청 목록 조회 (최신순, 커서 페이지네이션)"""
+    if status is not None and status not in DELIVERY_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {DELIVERY_STATUSES}")
     
-    deliveries = service.get_rider_deliveries(current_user["id"])
+    service = DatabaseService(db)
     
-    delivery_responses = []
-    for delivery in deliveries:
-        # 판매자와 구매자 정보를 User 모델로 변환
-        seller_info = User(
-            id=delivery.seller_info["id"],
-            role="user",
-            email="",  # 이메일은 보안상 제외
-            name=delivery.seller_info["name"],
-            phone=delivery.seller_info["phone"],
-            address=delivery.seller_info["address"],
-            kakao_open_profile=delivery.seller_info["kakao_open_profile"],
-            created_at=""
-        )
-        
-        buyer_info = User(
-            id=delivery.buyer_info["id"],
-            role="user",
-            email="",  # 이메일은 보안상 제외
-            name=delivery.buyer_info["name"],
-            phone=delivery.buyer_info["phone"],
-            address=delivery.buyer_info["address"],
-            kakao_open_profile=delivery.buyer_info["kakao_open_profile"],
-            created_at=""
-        )
-        
-        delivery_responses.append(RiderDeliveryResponse(
-            id=delivery.id,
-            order_id=delivery.order_id,
-            rider_id=delivery.rider_id,
-            delivery_fee=delivery.delivery_fee,
-            status=delivery.status,
-            seller_info=seller_info,
-            buyer_info=buyer_info,
-            created_at=delivery.created_at.isoformat() if delivery.created_at else "",
-            updated_at=delivery.updated_at.isoformat() if delivery.updated_at else None
-        ))
+    try:
+        deliveries = service.get_rider_deliveries(current_user["id"], status=status, limit=limit, before=before)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Unknown cursor")
     
-    return RiderDeliveryListResponse(
-        items=delivery_responses,
-        total=len(delivery_responses)
-    )
+    # seller_info/buyer_info는 저장 시 검증됐으므로 response_model 재검증 없이 바로 직렬화
+    total = service.count_rider_deliveries(current_user["id"], status=status)
+    return JSONResponse(content=serialize_delivery_list(deliveries, limit, total=total))
 
 
 @router.put("/delivery/{delivery_id}/status", response_model=RiderDeliveryResponse)
@@ -230,37 +188,4 @@ def update_delivery_status(
     if not updated_delivery:
         raise HTTPException(status_code=500, detail="Failed to update delivery status")
     
-    # 판매자와 구매자 정보를 User 모델로 변환
-    seller_info = User(
-        id=updated_delivery.seller_info["id"],
-        role="user",
-        email="",  # 이메일은 보안상 제외
-        name=updated_delivery.seller_info["name"],
-        phone=updated_delivery.seller_info["phone"],
-        address=updated_delivery.seller_info["address"],
-        kakao_open_profile=updated_delivery.seller_info["kakao_open_profile"],
-        created_at=""
-    )
-    
-    buyer_info = User(
-        id=updated_delivery.buyer_info["id"],
-        role="user",
-        email="",  # 이메일은 보안상 제외
-        name=updated_delivery.buyer_info["name"],
-        phone=updated_delivery.buyer_info["phone"],
-        address=updated_delivery.buyer_info["address"],
-        kakao_open_profile=updated_delivery.buyer_info["kakao_open_profile"],
-        created_at=""
-    )
-    
-    return RiderDeliveryResponse(
-        id=updated_delivery.id,
-        order_id=updated_delivery.order_id,
-        rider_id=updated_delivery.rider_id,
-        delivery_fee=updated_delivery.delivery_fee,
-        status=updated_delivery.status,
-        seller_info=seller_info,
-        buyer_info=buyer_info,
-        created_at=updated_delivery.created_at.isoformat() if updated_delivery.created_at else "",
-        updated_at=updated_delivery.updated_at.isoformat() if updated_delivery.updated_at else None
-    )
+    return JSONResponse(content=serialize_delivery(updated_delivery))
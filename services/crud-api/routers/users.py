@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
 from models import User, UpdateUserRequest, DeleteUserRequest
 from auth import get_current_user
 from database.config import get_db
-from database.service import DatabaseService
+from database.service import DatabaseService, geocode_in_background
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -16,6 +16,7 @@ def get_my_info(current_user: dict = Depends(get_current_user)):
 @router.put("/me")
 def update_my_info(
     request: UpdateUserRequest, 
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -33,6 +34,8 @@ def update_my_info(
     
     if not updated_user:
         raise HTTPException(status_code=404, detail="User not found")
+    # 주소가 바뀌었고 원격 geocoder면 좌표는 응답 후 채움
+    geocode_in_background(background_tasks, db, updated_user)
     
     return User(
         id=updated_user.id,
@@ -1,7 +1,7 @@
-from typing import Dict, Any, List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Dict, Any, List, Union
+from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
-from models import Product, WishlistItemRequest, WishlistResponse
+from models import Product, WishlistItemRequest, WishlistResponse, WishlistToggleResponse
 from database.config import get_db
 from database.service import DatabaseService
 from auth import get_current_user
@@ -12,17 +12,16 @@ router = APIRouter(prefix="/wishlist", tags=["wishlist"])
 @router.get("", response_model=WishlistResponse)
 def get_wishlist(
     current_user: dict = Depends(get_current_user),
-    page: int = 1,
-    page_size: int = 20,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db)
 ):
     service = DatabaseService(db)
-    items = service.get_user_wishlist(current_user["id"]) or []
-
-    # Pagination (simple slice)
-    start = (page - 1) * page_size
-    end = start + page_size
-    paginated = items[start:end]
+    # LIMIT/OFFSET와 COUNT를 DB에서 처리
+    paginated = service.get_user_wishlist(
+        current_user["id"], skip=(page - 1) * page_size, limit=page_size
+    )
+    total = service.count_user_wishlist(current_user["id"])
 
     def to_api_product(p) -> Product:
         return Product(
@@ -47,33 +46,37 @@ def get_wishlist(
                 "product": to_api_product(w.product),
                 "created_at": w.created_at.isoformat() if getattr(w, "created_at", None) else "",
             }
-            for w in paginated if w.product is not None
+            for w in paginated
         ],
         page=page,
         page_size=page_size,
-        total=len(items)
+        total=total
     )
 
 
-@router.post("/items", response_model=WishlistResponse)
+@router.post("/items", response_model=Union[WishlistResponse, WishlistToggleResponse])
 def add_to_wishlist(
     request: WishlistItemRequest,
+    compact: bool = Query(False, description="찜 목록 대신 토글 결과만 반환 (상품 조회·COUNT 없음)"),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     service = DatabaseService(db)
     product_id = request.product_id
     
-    product = service.get_product_by_id(product_id)
-    if not product:
+    # 상품 존재 여부는 upsert 결과로 확인 (별도 SELECT 없음)
+    added = service.add_to_wishlist(current_user["id"], product_id)
+    if added is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    service.add_to_wishlist(current_user["id"], product_id)
-    return get_wishlist(current_user, db=db)
+    if compact:
+        return WishlistToggleResponse(product_id=product_id, in_wishlist=True, changed=added)
+    return get_wishlist(current_user, page=1, page_size=20, db=db)
 
 
-@router.delete("/items", response_model=WishlistResponse, status_code=200)
+@router.delete("/items", response_model=Union[WishlistResponse, WishlistToggleResponse], status_code=200)
 def remove_from_wishlist(
     request: WishlistItemRequest,
+    compact: bool = Query(False, description="찜 목록 대신 토글 결과만 반환 (COUNT 없음)"),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -83,4 +86,6 @@ def remove_from_wishlist(
     removed = service.remove_from_wishlist(current_user["id"], product_id)
     if not removed:
         raise HTTPException(status_code=404, detail="Item not found in wishlist")
-    return get_wishlist(current_user, db=db)
+    if compact:
+        return WishlistToggleResponse(product_id=product_id, in_wishlist=False, changed=True)
+    return get_wishlist(current_user, page=1, page_size=20, db=db)
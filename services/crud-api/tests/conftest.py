@@ -115,3 +115,94 @@ def authenticated_user_token(client, sample_user_data):
     assert response.status_code == 201
     return response.json()["tokens"]["access_token"]
 
+
+
+@pytest.fixture
+def db_session(client):
+    """Session bound to the same in-memory database the test client uses."""
+    db_gen = app.dependency_overrides[get_db]()
+    db = next(db_gen)
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def registered_user(client):
+    """Sign up a user with every required field and return its id and access token."""
+    response = client.post("/auth/signup", json={
+        "email": "buyer@example.com",
+        "password": "testpassword123",
+        "name": "Buyer",
+        "phone": "010-1111-2222",
+        "kakao_open_profile": "https://open.kakao.com/o/buyer",
+        "address": "서울시 강남구 테헤란로 123"
+    })
+    assert response.status_code == 201
+    data = response.json()
+    return {
+        "id": data["user"]["id"],
+        "token": data["tokens"]["access_token"],
+        "headers": {"Authorization": f"Bearer {data['tokens']['access_token']}"}
+    }
+
+
+@pytest.fixture
+def catalog(db_session):
+    """Seed a category, a seller and three products directly through the service layer."""
+    service = DatabaseService(db_session)
+    category = service.create_category(name="침대", category_id="cat1")
+    seller = service.create_user(
+        email="seller@example.com",
+        password="sellerpassword123",
+        name="Seller",
+        phone="010-3333-4444",
+        kakao_open_profile="https://open.kakao.com/o/seller",
+        address="서울시 서초구 서초대로 456"
+    )
+    products = [
+        service.create_product(
+            title=f"Catalog Product {i}",
+            description="seeded",
+            price_amount=50000 + i * 10000,
+            category_id=category.id,
+            seller_id=seller.id,
+            location=seller.address
+        )
+        for i in range(3)
+    ]
+    return {
+        "category_id": category.id,
+        "seller_id": seller.id,
+        "product_ids": [p.id for p in products]
+    }
+
+
+@pytest.fixture
+def delivery_order(client, registered_user, catalog):
+    """Place a delivery order for the first catalog product as the registered user."""
+    response = client.post("/orders", json={
+        "items": [{"product_id": catalog["product_ids"][0], "quantity": 1, "price": 50000}],
+        "delivery_type": "delivery"
+    }, headers=registered_user["headers"])
+    assert response.status_code == 201
+    return response.json()
+
+
+@pytest.fixture
+def rider(client):
+    """Sign up a rider account and return its id and auth headers."""
+    response = client.post("/auth/signup", json={
+        "email": "rider@example.com",
+        "password": "riderpassword123",
+        "name": "Rider",
+        "phone": "010-5555-6666",
+        "kakao_open_profile": "https://open.kakao.com/o/rider",
+        "address": "서울시 송파구 올림픽로 300",
+        "role": "rider"
+    })
+    assert response.status_code == 201
+    data = response.json()
+    return {
+        "id": data["user"]["id"],
+        "headers": {"Authorization": f"Bearer {data['tokens']['access_token']}"}
+    }
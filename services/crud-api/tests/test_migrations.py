@@ -0,0 +1,136 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+
+# 컬럼/인덱스가 추가되기 전 스키마 (create_all로 이미 만들어진 운영 DB와 같은 모양)
+LEGACY_SCHEMA = [
+    """CREATE TABLE users (
+        id VARCHAR PRIMARY KEY, role VARCHAR, email VARCHAR NOT NULL UNIQUE, password_hash VARCHAR NOT NULL,
+        name VARCHAR NOT NULL, phone VARCHAR NOT NULL, address VARCHAR, kakao_open_profile VARCHAR NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )""",
+    "CREATE TABLE categories (id VARCHAR PRIMARY KEY, name VARCHAR NOT NULL, parent_id VARCHAR)",
+    """CREATE TABLE products (
+        id VARCHAR PRIMARY KEY, title VARCHAR NOT NULL, description TEXT, price_currency VARCHAR,
+        price_amount FLOAT NOT NULL, images JSON, category_id VARCHAR, seller_id VARCHAR, location VARCHAR,
+        attributes JSON, stock INTEGER, is_featured BOOLEAN, likes_count INTEGER,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE orders (
+        id VARCHAR PRIMARY KEY, user_id VARCHAR, status VARCHAR, total_amount FLOAT NOT NULL,
+        total_currency VARCHAR, shipping_address VARCHAR, delivery_type VARCHAR,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME
+    )""",
+    """CREATE TABLE wishlist_items (
+        id VARCHAR PRIMARY KEY, user_id VARCHAR, product_id VARCHAR,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )""",
+]
+
+
+@pytest.fixture
+def legacy_engine():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+    yield engine
+    engine.dispose()
+
+
+def upgrade(engine):
+    from database.models import Base
+    from database.migrations import upgrade_schema
+
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine, Base.metadata)
+
+
+class TestSchemaUpgrade:
+    """Test that columns and indexes added to the models reach databases created before them."""
+
+    def test_adds_missing_columns(self, legacy_engine):
+        """Test that coordinate, pickup and order snapshot columns are added to existing tables."""
+        upgrade(legacy_engine)
+        inspector = inspect(legacy_engine)
+        columns = {table: {c["name"] for c in inspector.get_columns(table)} for table in ("users", "products", "orders")}
+
+        assert {"lat", "lng", "geohash"} <= columns["users"]
+        assert {"lat", "lng", "geohash"} <= columns["products"]
+        assert {"pickup_lat", "pickup_lng", "pickup_geohash", "shipping_fee", "seller_info", "buyer_info"} <= columns["orders"]
+
+    def test_upgrade_is_idempotent(self, legacy_engine):
+        """Test that running the upgrade on every startup is safe."""
+        upgrade(legacy_engine)
+        upgrade(legacy_engine)
+
+    def test_orm_queries_work_after_upgrade(self, legacy_engine):
+        """Test that users written before the upgrade can be read and new users written after it."""
+        from database.service import DatabaseService
+
+        with legacy_engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO users (id, role, email, password_hash, name, phone, kakao_open_profile) "
+                "VALUES ('old-user', 'user', 'old@example.com', 'x', 'Old', '010', 'https://open.kakao.com/o/old')"
+            ))
+        upgrade(legacy_engine)
+
+        db = sessionmaker(bind=legacy_engine)()
+        try:
+            service = DatabaseService(db)
+            assert service.get_user_by_email("old@example.com").geohash is None
+            created = service.create_user(
+                email="new@example.com", password="password123", name="New", phone="010",
+                kakao_open_profile="https://open.kakao.com/o/new", address="서울시 강남구 테헤란로 123"
+            )
+            assert created.geohash is not None
+        finally:
+            db.close()
+
+    def test_adds_composite_indexes(self, legacy_engine):
+        """Test that the feed and pagination indexes are built on existing tables."""
+        upgrade(legacy_engine)
+        inspector = inspect(legacy_engine)
+        indexes = {index["name"] for table in ("orders", "wishlist_items", "notifications", "rider_deliveries")
+                   for index in inspector.get_indexes(table)}
+
+        assert {
+            "ix_orders_delivery_status_created", "ix_orders_pickup_geohash", "ix_wishlist_user_created",
+            "ix_notifications_user_created", "ix_rider_deliveries_rider_created",
+        } <= indexes
+
+    def test_wishlist_duplicates_removed_before_unique_constraint(self, legacy_engine):
+        """Test that duplicate hearts are collapsed, likes_count recounted and new duplicates ignored."""
+        from database.models import WishlistItem
+        from database.service import DatabaseService
+
+        with legacy_engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO products (id, title, price_amount, likes_count) VALUES ('p1', 'Chair', 1000, 3)"
+            ))
+            for row_id, created_at in (("w1", "2024-01-01"), ("w2", "2024-01-02"), ("w3", "2024-01-03")):
+                conn.execute(text(
+                    "INSERT INTO wishlist_items (id, user_id, product_id, created_at) "
+                    "VALUES (:id, 'u1', 'p1', :created_at)"
+                ), {"id": row_id, "created_at": created_at})
+        upgrade(legacy_engine)
+
+        db = sessionmaker(bind=legacy_engine)()
+        try:
+            assert [item.id for item in db.query(WishlistItem).all()] == ["w1"]
+            assert db.execute(text("SELECT likes_count FROM products WHERE id = 'p1'")).scalar() == 1
+            assert DatabaseService(db).add_to_wishlist("u1", "p1") is False
+            assert db.query(WishlistItem).count() == 1
+        finally:
+            db.close()
+
+    def test_unique_constraint_step_skipped_on_current_schema(self):
+        """Test that a database created from the current models is left untouched."""
+        from database.models import Base
+        from database.migrations import add_missing_unique_constraints
+
+        engine = create_engine("sqlite:///:memory:", poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        assert add_missing_unique_constraints(engine, Base.metadata) == {}
@@ -1,3 +1,7 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -208,3 +212,328 @@ class TestNotifications:
         
         assert "unread_count" in count_data
         assert isinstance(count_data["unread_count"], int)
+
+
+class TestNotificationStream:
+    """Test the SSE notification stream and its broker."""
+
+    def test_stream_unauthorized(self, client):
+        """Test opening the stream without authentication."""
+        response = client.get("/notifications/stream")
+        assert response.status_code == 401
+
+    def test_broker_delivers_to_subscriber(self):
+        """Test that a publish from another thread reaches an async subscriber."""
+        import asyncio
+        import threading
+        from database.pubsub import InProcessBroker
+
+        broker = InProcessBroker()
+
+        async def scenario():
+            async with broker.subscribe("user-1") as queue:
+                assert broker.subscriber_count("user-1") == 1
+                threading.Thread(target=broker.publish, args=("user-1", {"id": "n1"})).start()
+                threading.Thread(target=broker.publish, args=("user-2", {"id": "other"})).start()
+                payload = await asyncio.wait_for(queue.get(), timeout=1)
+                assert payload == {"id": "n1"}
+                assert queue.empty()
+            assert broker.subscriber_count("user-1") == 0
+
+        asyncio.run(scenario())
+
+    def test_create_notification_publishes(self, db_session, registered_user):
+        """Test that create_notification pushes the committed row to the broker."""
+        from database.pubsub import InProcessBroker, set_notification_broker
+        from database.service import DatabaseService
+
+        published = []
+
+        class RecordingBroker(InProcessBroker):
+            def publish(self, user_id, payload):
+                published.append((user_id, payload))
+
+        set_notification_broker(RecordingBroker())
+        try:
+            notification = DatabaseService(db_session).create_notification(
+                user_id=registered_user["id"], title="hello", message="world", type="order"
+            )
+        finally:
+            set_notification_broker(None)
+
+        assert len(published) == 1
+        user_id, payload = published[0]
+        assert user_id == registered_user["id"]
+        assert payload["id"] == notification.id
+        assert payload["title"] == "hello"
+        assert payload["is_read"] is False
+
+
+    @staticmethod
+    @asynccontextmanager
+    async def _open_stream(token):
+        """ASGI 수준에서 /notifications/stream을 열고 이벤트 이름 → data를 읽는 함수를 돌려줌"""
+        from main import app
+
+        # TestClient는 응답 본문을 끝까지 모으므로 끝나지 않는 SSE는 ASGI 수준에서 직접 읽음
+        disconnect = asyncio.Event()
+        chunks: asyncio.Queue = asyncio.Queue()
+
+        async def receive():
+            if not getattr(receive, "sent", False):
+                receive.sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                await chunks.put(("status", message["status"]))
+            elif message.get("body"):
+                await chunks.put(("body", message["body"].decode()))
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/notifications/stream", "raw_path": b"/notifications/stream",
+            "query_string": b"", "root_path": "", "client": ("test", 1), "server": ("test", 80),
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+        }
+        server = asyncio.create_task(app(scope, receive, send))
+
+        async def next_event(name):
+            while True:
+                kind, value = await asyncio.wait_for(chunks.get(), timeout=5)
+                if kind == "body" and f"event: {name}" in value:
+                    return json.loads(value.split("data: ", 1)[1])
+
+        try:
+            assert await asyncio.wait_for(chunks.get(), timeout=5) == ("status", 200)
+            yield next_event
+        finally:
+            disconnect.set()
+            await asyncio.wait_for(server, timeout=5)
+
+    def test_stream_delivers_created_notification(self, client, db_session, registered_user):
+        """Test that /notifications/stream pushes a notification created through the service layer."""
+        from database.service import DatabaseService
+
+        async def scenario():
+            async with self._open_stream(registered_user["token"]) as next_event:
+                assert (await next_event("unread_count"))["unread_count"] == 0
+
+                # 동기 엔드포인트처럼 스레드풀에서 알림 생성 (commit 후 broker.publish)
+                notification = await asyncio.to_thread(
+                    DatabaseService(db_session).create_notification,
+                    registered_user["id"], "배송 출발", "상품이 출발했습니다", "order"
+                )
+                payload = await next_event("notification")
+                assert payload["id"] == notification.id
+                assert payload["title"] == "배송 출발"
+
+        asyncio.run(scenario())
+
+    def test_stream_counts_notification_created_while_subscribing(self, client, db_session, registered_user):
+        """Test that a notification committed just before the subscription is included in unread_count."""
+        from database.models import Notification
+        from database.pubsub import InProcessBroker, set_notification_broker
+
+        class RacingBroker(InProcessBroker):
+            @asynccontextmanager
+            async def subscribe(self, user_id):
+                async with super().subscribe(user_id) as queue:
+                    # 구독 직전에 커밋·발행되어 푸시로는 오지 않는 알림
+                    db_session.add(Notification(
+                        id="racing", user_id=user_id, title="경합", message="구독 직전 생성", type="order"
+                    ))
+                    db_session.commit()
+                    yield queue
+
+        async def scenario():
+            async with self._open_stream(registered_user["token"]) as next_event:
+                assert (await next_event("unread_count"))["unread_count"] == 1
+
+        set_notification_broker(RacingBroker())
+        try:
+            asyncio.run(scenario())
+        finally:
+            set_notification_broker(None)
+
+    def test_postgres_listener_closes_connection_on_error(self, monkeypatch):
+        """Test that every listener connection is closed when the loop errors and reconnects."""
+        from database.pubsub import PostgresBroker
+
+        broker = PostgresBroker("postgresql://unused")
+        opened = []
+
+        class FailingConnection:
+            closed = False
+
+            def cursor(self):
+                if len(opened) >= 3:
+                    broker._stopped.set()
+                raise RuntimeError("connection lost")
+
+            def close(self):
+                self.closed = True
+
+        def connect():
+            opened.append(FailingConnection())
+            return opened[-1]
+
+        monkeypatch.setattr(broker, "_connect", connect)
+        monkeypatch.setattr(broker._stopped, "wait", lambda timeout=None: broker._stopped.is_set())
+        broker._listen()
+
+        assert len(opened) == 3
+        assert all(conn.closed for conn in opened)
+
+    def test_postgres_broker_close_wakes_listener(self, monkeypatch):
+        """Test that close() stops a listener waiting in select without the 5s poll delay."""
+        import os
+        import threading
+        import time
+        from database.pubsub import PostgresBroker
+
+        broker = PostgresBroker("postgresql://unused")
+        read_fd, write_fd = os.pipe()  # 알림이 오지 않는 LISTEN 연결 대신
+
+        class IdleConnection:
+            closed = False
+
+            def fileno(self):
+                return read_fd
+
+            def cursor(self):
+                class Cursor:
+                    def __enter__(self):
+                        return self
+
+                    def __exit__(self, *exc_info):
+                        return False
+
+                    def execute(self, *args):
+                        listening.set()
+
+                return Cursor()
+
+            def close(self):
+                self.closed = True
+
+        listening = threading.Event()
+        connection = IdleConnection()
+        monkeypatch.setattr(broker, "_connect", lambda: connection)
+        broker._ensure_listener()
+        assert listening.wait(timeout=2)
+
+        started = time.monotonic()
+        broker.close()
+        try:
+            assert time.monotonic() - started < 1.0
+            assert not broker._listener.is_alive()
+            assert connection.closed
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
+
+
+class TestNotificationFeedPagination:
+    """Test cursor pagination and archiving of the notification feed."""
+
+    def _seed(self, db_session, user_id, count):
+        from datetime import datetime, timedelta, timezone
+        from database.models import Notification
+        from database.service import DatabaseService
+        service = DatabaseService(db_session)
+        existing = db_session.query(Notification).count()
+        notifications = [service.create_notification(user_id, f"title {i}", f"message {i}") for i in range(count)]
+        # SQLite CURRENT_TIMESTAMP는 초 단위이므로 생성 순서를 명시적으로 벌려 둠
+        base = datetime.now(timezone.utc) + timedelta(seconds=existing)
+        for i, n in enumerate(notifications):
+            n.created_at = base + timedelta(seconds=i)
+        db_session.commit()
+        return notifications
+
+    def test_cursor_pages_do_not_overlap(self, client, db_session, registered_user):
+        """Test walking the feed with before-cursors visits every notification once."""
+        self._seed(db_session, registered_user["id"], 5)
+        headers = registered_user["headers"]
+
+        seen = []
+        url = "/notifications?limit=2"
+        while True:
+            data = client.get(url, headers=headers).json()
+            seen.extend(n["id"] for n in data["notifications"])
+            if not data["next_cursor"]:
+                break
+            url = f"/notifications?limit=2&before={data['next_cursor']}"
+
+        assert len(seen) == 5
+        assert len(set(seen)) == 5
+
+        # 첫 페이지의 커서 이후로 새 알림만 돌아와야 함
+        first = client.get("/notifications?limit=2", headers=headers).json()
+        newer = client.get(f"/notifications?after={first['prev_cursor']}", headers=headers).json()
+        assert newer["notifications"] == []
+        assert newer["prev_cursor"] == first["prev_cursor"]
+
+        new = self._seed(db_session, registered_user["id"], 1)[0]
+        newer = client.get(f"/notifications?after={first['prev_cursor']}", headers=headers).json()
+        assert [n["id"] for n in newer["notifications"]] == [new.id]
+
+    def test_before_and_after_are_exclusive(self, client, registered_user):
+        """Test that combining both cursors is rejected."""
+        response = client.get("/notifications?before=a&after=b", headers=registered_user["headers"])
+        assert response.status_code == 400
+
+    def test_cursor_survives_archival(self, client, db_session, registered_user):
+        """Test that a cursor pointing at an archived notification still pages to older items."""
+        from database.service import DatabaseService
+
+        oldest, middle, newest = self._seed(db_session, registered_user["id"], 3)
+        ids = {"oldest": oldest.id, "middle": middle.id}
+        first = client.get("/notifications?limit=2", headers=registered_user["headers"]).json()
+        assert first["next_cursor"] == ids["middle"]
+
+        # 다음 페이지를 받기 전에 커서 행이 보관 테이블로 이동
+        middle.is_read = True
+        db_session.commit()
+        DatabaseService(db_session).archive_read_notifications(older_than_days=-1)
+
+        response = client.get(f"/notifications?limit=2&before={first['next_cursor']}", headers=registered_user["headers"])
+        assert response.status_code == 200
+        assert [n["id"] for n in response.json()["notifications"]] == [ids["oldest"]]
+
+    def test_unknown_cursor_rejected(self, client, registered_user):
+        """Test that a cursor that matches no notification returns 400 instead of an empty page."""
+        response = client.get("/notifications?before=does-not-exist", headers=registered_user["headers"])
+        assert response.status_code == 400
+
+    def test_foreign_cursor_rejected(self, client, db_session, registered_user):
+        """Test that another user's notification id cannot be used as a cursor."""
+        self._seed(db_session, registered_user["id"], 2)
+        foreign = self._seed(db_session, "another-user", 1)[0]
+
+        for direction in ("before", "after"):
+            response = client.get(f"/notifications?{direction}={foreign.id}", headers=registered_user["headers"])
+            assert response.status_code == 400
+
+    def test_archive_read_notifications(self, db_session, registered_user):
+        """Test that only old read notifications move to the archive table."""
+        from datetime import datetime, timedelta, timezone
+        from database.models import Notification, NotificationArchive
+        from database.service import DatabaseService
+
+        old_read, old_unread, recent_read = self._seed(db_session, registered_user["id"], 3)
+        old = datetime.now(timezone.utc) - timedelta(days=120)
+        old_read.is_read, old_read.created_at = True, old
+        old_unread.created_at = old
+        recent_read.is_read = True
+        db_session.commit()
+
+        expected_archived, expected_remaining = old_read.id, {old_unread.id, recent_read.id}
+
+        archived = DatabaseService(db_session).archive_read_notifications(older_than_days=90, batch_size=1)
+
+        assert archived == 1
+        assert {n.id for n in db_session.query(Notification).all()} == expected_remaining
+        assert [a.id for a in db_session.query(NotificationArchive).all()] == [expected_archived]
@@ -474,3 +474,83 @@ class TestOrderStatusUpdate:
         response = client.put(f"/orders/{order_id}/status", json=invalid_status_data, headers=headers)
         # Should succeed (validation might be handled at application level)
         assert response.status_code in [200, 422]
+
+
+class TestDeliveryFeeQuote:
+    """Test delivery fee quoting and persistence."""
+
+    SEOCHO = (37.4837, 127.0324)
+    GANGNAM = (37.5172, 127.0473)
+    BUSAN = (35.1796, 129.0756)
+
+    def test_cell_distance_memoized_and_symmetric(self):
+        """Test that cell distances are cached per unordered cell pair."""
+        from geo import geohash
+        from pricing import delivery_fee
+
+        a = geohash.encode(*self.SEOCHO, delivery_fee.CELL_PRECISION)
+        b = geohash.encode(*self.GANGNAM, delivery_fee.CELL_PRECISION)
+        delivery_fee._cell_distance_km.cache_clear()
+        assert delivery_fee.cell_distance_km(a, b) == delivery_fee.cell_distance_km(b, a)
+        info = delivery_fee._cell_distance_km.cache_info()
+        assert (info.misses, info.hits) == (1, 1)
+
+    def test_quote_scales_with_distance_and_size(self):
+        """Test that farther and bulkier deliveries cost more."""
+        from pricing import item_factor, quote
+
+        chair = [(item_factor("의자", {"size": "1인용"}), 1)]
+        bed = [(item_factor("침대", '{"size": "퀸"}'), 1)]
+        near = quote(self.SEOCHO, self.GANGNAM, chair)
+        far = quote(self.SEOCHO, self.BUSAN, chair)
+        assert 2 < near.distance_km < 6
+        assert far.fee > near.fee
+        assert quote(self.SEOCHO, self.GANGNAM, bed).fee > near.fee
+        assert quote(self.SEOCHO, self.GANGNAM, chair * 2).fee > near.fee
+        assert near.fee % 500 == 0
+
+    def test_quote_without_coordinates_uses_default(self):
+        """Test the flat fallback when an address could not be geocoded."""
+        from pricing import quote
+        from pricing.delivery_fee import DEFAULT_FEE
+
+        fee_quote = quote(self.SEOCHO, None, [(1.0, 1)])
+        assert fee_quote.fee == DEFAULT_FEE
+        assert fee_quote.distance_km is None
+
+    def test_shipping_fee_persisted_on_order(self, client, registered_user, catalog):
+        """Test that the quoted fee is charged, stored and returned by list endpoints."""
+        items = [{"product_id": catalog["product_ids"][0], "quantity": 1, "price": 0}]
+        quoted = client.post("/orders/delivery-fee-quote", json={"items": items}, headers=registered_user["headers"])
+        assert quoted.status_code == 200
+        fee = quoted.json()["fee"]
+        assert fee > 0 and quoted.json()["distance_km"] is not None
+
+        created = client.post("/orders", json={"items": items, "delivery_type": "delivery"},
+                              headers=registered_user["headers"])
+        assert created.status_code == 201
+        order = created.json()
+        assert order["shipping_fee"] == fee
+        assert order["total_amount"] == 50000 + fee
+
+        listed = client.get("/orders", headers=registered_user["headers"]).json()
+        assert [o["shipping_fee"] for o in listed] == [fee]
+        assert client.get(f"/orders/{order['id']}", headers=registered_user["headers"]).json()["shipping_fee"] == fee
+
+    def test_pickup_order_has_no_fee(self, client, registered_user, catalog):
+        """Test that pickup orders are not charged a delivery fee."""
+        created = client.post("/orders", json={
+            "items": [{"product_id": catalog["product_ids"][0], "quantity": 1, "price": 0}],
+            "delivery_type": "pickup"
+        }, headers=registered_user["headers"])
+        assert created.json()["shipping_fee"] == 0
+
+    def test_rider_request_defaults_to_quoted_fee(self, client, delivery_order, rider):
+        """Test that a rider request without a fee proposes the order's quoted fee."""
+        feed = client.get("/rider/available-orders", headers=rider["headers"]).json()
+        assert feed[0]["suggested_fee"] == delivery_order["shipping_fee"]
+
+        response = client.post("/rider/delivery-request", json={"order_id": delivery_order["id"]},
+                               headers=rider["headers"])
+        assert response.status_code == 201
+        assert response.json()["delivery_fee"] == delivery_order["shipping_fee"]
@@ -0,0 +1,423 @@
+import pytest
+
+
+class TestAvailableOrdersFeed:
+    """Test the rider available-orders feed."""
+
+    def _place_orders(self, client, registered_user, catalog, count):
+        for i in range(count):
+            response = client.post("/orders", json={
+                "items": [{"product_id": catalog["product_ids"][i % 3], "quantity": 1, "price": 0}],
+                "delivery_type": "delivery"
+            }, headers=registered_user["headers"])
+            assert response.status_code == 201
+
+    def test_available_orders_unauthorized(self, client):
+        """Test that the feed requires authentication."""
+        response = client.get("/rider/available-orders")
+        assert response.status_code == 401
+
+    def test_available_orders_paginated(self, client, registered_user, catalog, rider):
+        """Test that the feed pages orders and includes buyer, seller and product."""
+        self._place_orders(client, registered_user, catalog, 3)
+
+        first = client.get("/rider/available-orders?page=1&page_size=2", headers=rider["headers"])
+        second = client.get("/rider/available-orders?page=2&page_size=2", headers=rider["headers"])
+        assert first.status_code == 200
+        assert len(first.json()) == 2
+        assert len(second.json()) == 1
+
+        order = first.json()[0]
+        assert order["buyer_info"]["id"] == registered_user["id"]
+        assert order["seller_info"]["id"] == catalog["seller_id"]
+        assert order["product_info"]["id"] in catalog["product_ids"]
+
+    def test_incomplete_orders_filtered_before_limit(self, client, db_session, registered_user, catalog, rider):
+        """Test that orders without a buyer or a sold product never shorten a page."""
+        import uuid
+        from datetime import datetime, timedelta, timezone
+        from database.models import Order, OrderItem
+
+        self._place_orders(client, registered_user, catalog, 3)
+        # 최신 주문 두 개: 탈퇴한 구매자, 삭제된 상품
+        newest = datetime.now(timezone.utc) + timedelta(hours=1)
+        for user_id, product_id in (("deleted-user", catalog["product_ids"][0]), (registered_user["id"], "deleted-product")):
+            order_id = str(uuid.uuid4())
+            db_session.add(Order(id=order_id, user_id=user_id, status="pending", total_amount=1000,
+                                 delivery_type="delivery", created_at=newest))
+            db_session.add(OrderItem(id=str(uuid.uuid4()), order_id=order_id, product_id=product_id,
+                                     quantity=1, price=1000))
+        db_session.commit()
+
+        first = client.get("/rider/available-orders?page=1&page_size=2", headers=rider["headers"]).json()
+        second = client.get("/rider/available-orders?page=2&page_size=2", headers=rider["headers"]).json()
+        assert len(first) == 2
+        assert len(second) == 1
+
+    @pytest.mark.parametrize("count", [1, 6])
+    def test_feed_query_count_is_constant(self, client, db_session, registered_user, catalog, count):
+        """Test that loading the feed costs the same number of statements for any order count."""
+        from sqlalchemy import event
+        from database.service import DatabaseService
+
+        self._place_orders(client, registered_user, catalog, count)
+        db_session.expire_all()
+
+        statements = []
+        engine = db_session.get_bind()
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            orders = DatabaseService(db_session).get_available_orders_for_delivery(limit=20)
+            sellers = [o.items[0].product.seller.id for o in orders if o.user is not None]
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert len(sellers) == count
+        assert len(statements) == 2
+
+
+class TestNearbyOrders:
+    """Test the radius filter on the rider available-orders feed."""
+
+    SEOCHO = (37.4837, 127.0324)  # 카탈로그 상품 위치(서초구)의 오프라인 geocoder 대표 좌표
+    BUSAN = (35.1796, 129.0756)
+
+    def test_geohash_encode(self):
+        """Test geohash encoding against a known reference value."""
+        from geo import geohash
+
+        assert geohash.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+        lat, lng = geohash.decode("u4pruydqqvj")
+        assert abs(lat - 57.64911) < 1e-4 and abs(lng - 10.40744) < 1e-4
+
+    @pytest.mark.parametrize("radius_km", [0.5, 3.0, 10.0])
+    def test_cover_contains_every_point_in_radius(self, radius_km):
+        """Test that every point within the radius falls under one of the cover cells."""
+        import random
+        from geo import geohash
+
+        cells = geohash.cover(*self.SEOCHO, radius_km)
+        assert 0 < len(cells) <= 16
+        rnd = random.Random(0)
+        for _ in range(500):
+            lat = self.SEOCHO[0] + rnd.uniform(-0.1, 0.1)
+            lng = self.SEOCHO[1] + rnd.uniform(-0.1, 0.1)
+            if geohash.haversine_km(*self.SEOCHO, lat, lng) <= radius_km:
+                assert geohash.encode(lat, lng).startswith(tuple(cells))
+
+    def test_nearby_orders_sorted_by_distance(self, client, delivery_order, rider):
+        """Test that orders near the pickup point are returned with their distance."""
+        lat, lng = self.SEOCHO
+        response = client.get(f"/rider/available-orders?lat={lat}&lng={lng}&radius=3", headers=rider["headers"])
+        assert response.status_code == 200
+        orders = response.json()
+        assert [o["order_id"] for o in orders] == [delivery_order["id"]]
+        assert 0 <= orders[0]["distance_km"] <= 3
+
+    def test_far_away_orders_excluded(self, client, delivery_order, rider):
+        """Test that orders outside the radius are not returned."""
+        lat, lng = self.BUSAN
+        response = client.get(f"/rider/available-orders?lat={lat}&lng={lng}&radius=10", headers=rider["headers"])
+        assert response.status_code == 200
+        assert response.json() == []
+
+    def test_lat_without_lng_rejected(self, client, rider):
+        """Test that a partial coordinate is rejected."""
+        response = client.get("/rider/available-orders?lat=37.5", headers=rider["headers"])
+        assert response.status_code == 400
+
+
+class TestRemoteGeocoding:
+    """Test that a network geocoder is never called inside the request and the write."""
+
+    ADDRESS = "서울시 서초구 서초대로 456"
+
+    @pytest.fixture
+    def remote_geocoder(self):
+        from geo import StaticGeocoder, set_geocoder
+
+        geocoder = StaticGeocoder({self.ADDRESS: TestNearbyOrders.SEOCHO})
+        geocoder.remote = True
+        set_geocoder(geocoder)
+        yield geocoder
+        set_geocoder(None)
+
+    def test_service_writes_null_coordinates(self, db_session, remote_geocoder):
+        """Test that creating a user with a remote geocoder stores the row without coordinates."""
+        from database.service import DatabaseService
+
+        user = DatabaseService(db_session).create_user(
+            email="remote@example.com", password="password123", name="Remote", phone="010",
+            kakao_open_profile="https://open.kakao.com/o/remote", address=self.ADDRESS
+        )
+        assert user.lat is None and user.geohash is None
+
+    def test_signup_fills_coordinates_after_response(self, client, db_session, remote_geocoder):
+        """Test that the background task geocodes the new user after the signup response."""
+        from database.models import User
+
+        response = client.post("/auth/signup", json={
+            "email": "remote@example.com",
+            "password": "password123",
+            "name": "Remote",
+            "phone": "010-0000-0000",
+            "kakao_open_profile": "https://open.kakao.com/o/remote",
+            "address": self.ADDRESS
+        })
+        assert response.status_code == 201
+
+        user = db_session.query(User).filter(User.id == response.json()["user"]["id"]).one()
+        assert (user.lat, user.lng) == TestNearbyOrders.SEOCHO
+        assert user.geohash is not None
+
+
+class TestDeliveryAcceptance:
+    """Test buyer acceptance/rejection of rider delivery requests."""
+
+    def _signup_rider(self, client, n):
+        response = client.post("/auth/signup", json={
+            "email": f"rider{n}@example.com",
+            "password": "riderpassword123",
+            "name": f"Rider {n}",
+            "phone": "010-5555-0000",
+            "kakao_open_profile": f"https://open.kakao.com/o/rider{n}",
+            "address": "서울시 송파구 올림픽로 300",
+            "role": "rider"
+        })
+        assert response.status_code == 201
+        return {"Authorization": f"Bearer {response.json()['tokens']['access_token']}"}
+
+    def _apply(self, client, order_id, headers, fee=5000):
+        response = client.post("/rider/delivery-request", json={
+            "order_id": order_id, "delivery_fee": fee
+        }, headers=headers)
+        assert response.status_code == 201
+        return response.json()["id"]
+
+    def test_accept_rejects_sibling_requests(self, client, db_session, registered_user, delivery_order):
+        """Test that accepting one request rejects the other pending ones and ships the order."""
+        from database.models import Order, RiderDelivery
+
+        order_id = delivery_order["id"]
+        chosen = self._apply(client, order_id, self._signup_rider(client, 1))
+        sibling = self._apply(client, order_id, self._signup_rider(client, 2))
+
+        response = client.put(
+            f"/orders/{order_id}/rider-delivery/{chosen}/accept", headers=registered_user["headers"]
+        )
+        assert response.status_code == 200
+        assert response.json()["status"] == "accepted"
+
+        db_session.expire_all()
+        assert db_session.get(RiderDelivery, sibling).status == "rejected"
+        assert db_session.get(Order, order_id).status == "shipping"
+
+    def test_second_accept_conflicts(self, client, registered_user, delivery_order):
+        """Test that only one request can be accepted per order."""
+        order_id = delivery_order["id"]
+        first = self._apply(client, order_id, self._signup_rider(client, 1))
+        second = self._apply(client, order_id, self._signup_rider(client, 2))
+
+        assert client.put(
+            f"/orders/{order_id}/rider-delivery/{first}/accept", headers=registered_user["headers"]
+        ).status_code == 200
+        for delivery_id in (first, second):
+            response = client.put(
+                f"/orders/{order_id}/rider-delivery/{delivery_id}/accept", headers=registered_user["headers"]
+            )
+            assert response.status_code == 409
+        response = client.put(
+            f"/orders/{order_id}/rider-delivery/{first}/reject", headers=registered_user["headers"]
+        )
+        assert response.status_code == 409
+
+    def test_compare_and_set_in_service(self, client, db_session, delivery_order):
+        """Test that a stale accept loses against one that already claimed the order."""
+        from database.service import DatabaseService
+
+        order_id = delivery_order["id"]
+        first = self._apply(client, order_id, self._signup_rider(client, 1))
+        second = self._apply(client, order_id, self._signup_rider(client, 2))
+
+        service = DatabaseService(db_session)
+        accepted, rejected_riders = service.accept_rider_delivery(order_id, first)
+        assert accepted.status == "accepted"
+        assert len(rejected_riders) == 1
+        assert service.accept_rider_delivery(order_id, second) is None
+
+    def test_reject_pending_request(self, client, registered_user, delivery_order):
+        """Test that a pending request can be rejected exactly once."""
+        order_id = delivery_order["id"]
+        delivery_id = self._apply(client, order_id, self._signup_rider(client, 1))
+
+        url = f"/orders/{order_id}/rider-delivery/{delivery_id}/reject"
+        first = client.put(url, headers=registered_user["headers"])
+        assert first.status_code == 200
+        assert first.json()["status"] == "rejected"
+        assert client.put(url, headers=registered_user["headers"]).status_code == 409
+
+
+class TestDeliveryHistory:
+    """Test cursor pagination and status filtering of delivery request lists."""
+
+    def _apply_to_orders(self, client, registered_user, catalog, rider, count):
+        delivery_ids = []
+        for i in range(count):
+            order = client.post("/orders", json={
+                "items": [{"product_id": catalog["product_ids"][i % 3], "quantity": 1, "price": 0}],
+                "delivery_type": "delivery"
+            }, headers=registered_user["headers"]).json()
+            response = client.post("/rider/delivery-request", json={
+                "order_id": order["id"], "delivery_fee": 3000
+            }, headers=rider["headers"])
+            assert response.status_code == 201
+            delivery_ids.append((order["id"], response.json()["id"]))
+        return delivery_ids
+
+    def _collect(self, client, url, headers):
+        seen, cursor = [], None
+        while True:
+            page = client.get(url + (f"&before={cursor}" if cursor else ""), headers=headers).json()
+            seen.extend(item["id"] for item in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return seen
+
+    def test_my_deliveries_cursor_pages(self, client, registered_user, catalog, rider):
+        """Test that following next_cursor visits every delivery request exactly once."""
+        applied = self._apply_to_orders(client, registered_user, catalog, rider, 5)
+
+        first = client.get("/rider/my-deliveries?limit=2", headers=rider["headers"]).json()
+        assert len(first["items"]) == 2
+        assert first["next_cursor"] == first["items"][-1]["id"]
+        assert first["total"] == 5  # 페이지 항목 수가 아니라 전체 배송 신청 수
+
+        seen = self._collect(client, "/rider/my-deliveries?limit=2", rider["headers"])
+        assert sorted(seen) == sorted(delivery_id for _, delivery_id in applied)
+
+    def test_my_deliveries_status_filter(self, client, registered_user, catalog, rider):
+        """Test that the status filter is applied before paging."""
+        applied = self._apply_to_orders(client, registered_user, catalog, rider, 3)
+        order_id, delivery_id = applied[0]
+        client.put(f"/orders/{order_id}/rider-delivery/{delivery_id}/accept", headers=registered_user["headers"])
+
+        accepted = client.get("/rider/my-deliveries?status=accepted&limit=1", headers=rider["headers"]).json()
+        assert [item["id"] for item in accepted["items"]] == [delivery_id]
+        pending = self._collect(client, "/rider/my-deliveries?status=pending&limit=1", rider["headers"])
+        assert sorted(pending) == sorted(d for _, d in applied[1:])
+
+    def test_invalid_status_rejected(self, client, rider):
+        """Test that unknown status values are rejected."""
+        response = client.get("/rider/my-deliveries?status=lost", headers=rider["headers"])
+        assert response.status_code == 400
+
+    def test_unknown_cursor_rejected(self, client, rider):
+        """Test that a cursor that matches no delivery request returns 400."""
+        response = client.get("/rider/my-deliveries?before=does-not-exist", headers=rider["headers"])
+        assert response.status_code == 400
+
+    def test_foreign_cursor_rejected(self, client, delivery_order, rider):
+        """Test that another rider's delivery request id cannot be used as a cursor."""
+        other = {"Authorization": "Bearer " + client.post("/auth/signup", json={
+            "email": "other-rider@example.com", "password": "riderpassword123", "name": "Other Rider",
+            "phone": "010-5555-0001", "kakao_open_profile": "https://open.kakao.com/o/o",
+            "address": "서울시 송파구", "role": "rider"
+        }).json()["tokens"]["access_token"]}
+        foreign = client.post("/rider/delivery-request", json={
+            "order_id": delivery_order["id"], "delivery_fee": 4000
+        }, headers=other).json()["id"]
+
+        response = client.get(f"/rider/my-deliveries?before={foreign}", headers=rider["headers"])
+        assert response.status_code == 400
+
+    def test_order_deliveries_cursor_pages(self, client, registered_user, delivery_order):
+        """Test cursor pagination of the buyer's per-order request list."""
+        order_id = delivery_order["id"]
+        applied = []
+        for n in range(3):
+            headers = {"Authorization": "Bearer " + client.post("/auth/signup", json={
+                "email": f"history{n}@example.com", "password": "riderpassword123", "name": f"Rider {n}",
+                "phone": "010-5555-0000", "kakao_open_profile": "https://open.kakao.com/o/r",
+                "address": "서울시 송파구", "role": "rider"
+            }).json()["tokens"]["access_token"]}
+            applied.append(client.post("/rider/delivery-request", json={
+                "order_id": order_id, "delivery_fee": 4000
+            }, headers=headers).json()["id"])
+
+        seen = self._collect(client, f"/orders/{order_id}/rider-deliveries?limit=2", registered_user["headers"])
+        assert sorted(seen) == sorted(applied)
+        page = client.get(f"/orders/{order_id}/rider-deliveries?limit=2", headers=registered_user["headers"]).json()
+        assert page["total"] == 3
+
+
+class TestDeliverySerialization:
+    """Test the pre-validated delivery request serializer."""
+
+    def test_party_snapshot_validated_on_write(self, client, db_session, delivery_order, rider):
+        """Test that party snapshots are normalized when stored and echoed as User-shaped objects."""
+        from database.models import RiderDelivery
+        from models.rider import DeliveryParty
+
+        party = DeliveryParty(id="u", name="n", phone="p", address=None, kakao_open_profile="k")
+        assert party.address == ""  # 배송 주소가 없는 주문도 빈 문자열로 저장
+
+        response = client.post("/rider/delivery-request", json={
+            "order_id": delivery_order["id"], "delivery_fee": 3000
+        }, headers=rider["headers"])
+        assert response.status_code == 201
+        body = response.json()
+        assert set(body["buyer_info"]) == {
+            "id", "role", "email", "name", "phone", "address", "kakao_open_profile", "created_at"
+        }
+        assert body["buyer_info"]["email"] == ""
+
+        stored = db_session.get(RiderDelivery, body["id"])
+        assert stored.seller_info is None and stored.buyer_info is None  # 주문 스냅샷 참조
+        assert stored.order.buyer_info["address"] == body["buyer_info"]["address"]
+        assert set(stored.order.seller_info) == {"id", "name", "phone", "address", "kakao_open_profile"}
+
+        listed = client.get("/rider/my-deliveries", headers=rider["headers"]).json()
+        assert listed["items"] == [body]
+
+    def test_applications_reuse_order_snapshot(self, client, db_session, delivery_order):
+        """Test that rider applications do not look up the buyer, product or seller again."""
+        from sqlalchemy import event
+        from database.service import DatabaseService
+
+        rider_ids = []
+        for n in range(3):
+            response = client.post("/auth/signup", json={
+                "email": f"bidder{n}@example.com", "password": "riderpassword123", "name": f"Bidder {n}",
+                "phone": "010-5555-0000", "kakao_open_profile": "https://open.kakao.com/o/b",
+                "address": "서울시 송파구", "role": "rider"
+            })
+            rider_ids.append(response.json()["user"]["id"])
+        db_session.expire_all()
+
+        statements = []
+        engine = db_session.get_bind()
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            service = DatabaseService(db_session)
+            for rider_id in rider_ids:
+                service.create_rider_delivery(delivery_order["id"], rider_id)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert not [sql for sql in statements if "FROM users" in sql or "FROM products" in sql]
+
+    def test_legacy_rows_keep_their_copy(self, client, db_session, delivery_order, rider):
+        """Test that requests stored before order snapshots still serialize from their own JSON."""
+        from database.models import RiderDelivery
+
+        body = client.post("/rider/delivery-request", json={"order_id": delivery_order["id"]},
+                           headers=rider["headers"]).json()
+        legacy = dict(body["seller_info"], name="Legacy Seller")
+        legacy = {k: legacy[k] for k in ("id", "name", "phone", "address", "kakao_open_profile")}
+        db_session.get(RiderDelivery, body["id"]).seller_info = legacy
+        db_session.commit()
+
+        listed = client.get("/rider/my-deliveries", headers=rider["headers"]).json()
+        assert listed["items"][0]["seller_info"]["name"] == "Legacy Seller"
@@ -199,3 +199,118 @@ class TestWishlistOperations:
         # Note: In a real implementation, you'd delete the product here
         # For now, we'll just verify the wishlist structure handles missing products
         # The get_wishlist function should filter out products that don't exist in products_db
+
+
+class TestWishlistPagination:
+    """Test SQL-side wishlist paging."""
+
+    def test_pages_and_total_come_from_sql(self, client, registered_user, catalog):
+        """Test that pages are disjoint and total counts every saved product."""
+        headers = registered_user["headers"]
+        for product_id in catalog["product_ids"]:
+            response = client.post("/wishlist/items", json={"product_id": product_id}, headers=headers)
+            assert response.status_code == 200
+
+        first = client.get("/wishlist?page=1&page_size=2", headers=headers).json()
+        second = client.get("/wishlist?page=2&page_size=2", headers=headers).json()
+
+        assert first["total"] == second["total"] == 3
+        assert len(first["items"]) == 2
+        assert len(second["items"]) == 1
+        ids = [i["product"]["id"] for i in first["items"] + second["items"]]
+        assert sorted(ids) == sorted(catalog["product_ids"])
+        assert first["items"][0]["product"]["category"]["name"] == "침대"
+
+    def test_invalid_page_rejected(self, client, registered_user):
+        """Test that non-positive pages are rejected instead of slicing backwards."""
+        response = client.get("/wishlist?page=0", headers=registered_user["headers"])
+        assert response.status_code == 422
+
+    def test_page_loads_product_and_category_in_one_query(self, db_session, registered_user, catalog):
+        """Test that reading a page does not lazy-load product or category per item."""
+        from sqlalchemy import event
+        from database.service import DatabaseService
+
+        service = DatabaseService(db_session)
+        for product_id in catalog["product_ids"]:
+            service.add_to_wishlist(registered_user["id"], product_id)
+        db_session.expire_all()
+
+        statements = []
+        engine = db_session.get_bind()
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            items = service.get_user_wishlist(registered_user["id"], skip=0, limit=20)
+            names = [w.product.category.name for w in items]
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert names == ["침대"] * 3
+        assert len(statements) == 1
+
+
+class TestWishlistToggle:
+    """Test upsert-based wishlist mutations and compact responses."""
+
+    def test_compact_add_and_remove(self, client, registered_user, catalog):
+        """Test that compact mode returns only the toggled product and the new total."""
+        headers = registered_user["headers"]
+        product_id = catalog["product_ids"][0]
+
+        added = client.post("/wishlist/items?compact=true", json={"product_id": product_id}, headers=headers)
+        assert added.status_code == 200
+        assert added.json() == {"product_id": product_id, "in_wishlist": True, "changed": True}
+
+        again = client.post("/wishlist/items?compact=true", json={"product_id": product_id}, headers=headers)
+        assert again.json() == {"product_id": product_id, "in_wishlist": True, "changed": False}
+
+        removed = client.request("DELETE", "/wishlist/items?compact=true", json={"product_id": product_id}, headers=headers)
+        assert removed.status_code == 200
+        assert removed.json() == {"product_id": product_id, "in_wishlist": False, "changed": True}
+        assert client.get("/wishlist", headers=headers).json()["total"] == 0
+
+    def test_compact_add_skips_product_load_and_count(self, client, registered_user, catalog):
+        """Test that a compact toggle runs only the upsert and the likes update."""
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(" ".join(statement.split()).lower())
+
+        headers = registered_user["headers"]
+        event.listen(Engine, "before_cursor_execute", record)
+        try:
+            response = client.post("/wishlist/items?compact=true",
+                                   json={"product_id": catalog["product_ids"][0]}, headers=headers)
+        finally:
+            event.remove(Engine, "before_cursor_execute", record)
+
+        assert response.status_code == 200
+        writes = [statement for statement in statements if not statement.startswith("select")]
+        assert [statement.split()[0] for statement in writes] == ["insert", "update"]
+        # 인증용 사용자 조회 외에 상품 SELECT나 COUNT가 없어야 함
+        reads = [statement for statement in statements if statement.startswith("select")]
+        assert not any("from products" in statement or "count(" in statement for statement in reads)
+
+    def test_compact_add_unknown_product(self, client, registered_user):
+        """Test that a compact toggle on a missing product still returns 404 and stores nothing."""
+        response = client.post("/wishlist/items?compact=true", json={"product_id": "missing"},
+                               headers=registered_user["headers"])
+        assert response.status_code == 404
+        assert client.get("/wishlist", headers=registered_user["headers"]).json()["total"] == 0
+
+    def test_duplicate_insert_is_ignored(self, db_session, registered_user, catalog):
+        """Test that the upsert reports whether a row was actually inserted."""
+        from database.models import WishlistItem
+        from database.service import DatabaseService
+
+        service = DatabaseService(db_session)
+        product_id = catalog["product_ids"][0]
+        assert service.add_to_wishlist(registered_user["id"], product_id) is True
+        assert service.add_to_wishlist(registered_user["id"], product_id) is False
+        assert db_session.query(WishlistItem).count() == 1
+        assert service.remove_from_wishlist(registered_user["id"], product_id) is True
+        assert service.remove_from_wishlist(registered_user["id"], product_id) is False
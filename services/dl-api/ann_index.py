@@ -0,0 +1,526 @@
+"""
+근사 최근접 이웃(ANN) 인덱스
+
+EmbeddingStore의 이미지 벡터(L2 정규화, 내적 = 코사인 유사도)에서 쿼리와 가까운 후보 상품만
+빠르게 골라냅니다. 최종 순위는 EmbeddingStore가 후보 상품의 원본 벡터로 다시 계산하므로
+ANN은 후보를 놓칠 수는 있어도(recall) 점수를 틀리게 내지는 않습니다.
+
+백엔드 (config.ANN_INDEX):
+- ivf (기본): 순수 NumPy IVF. k-means로 나눈 nlist개 리스트 중 쿼리와 가까운 nprobe개만 훑음
+- hnsw: hnswlib (선택 설치)
+- faiss: faiss-cpu HNSW (선택 설치)
+- sq8 / pq: int8 스칼라 양자화 / Product Quantization 코드 전수 스캔 (quantization.py)
+- none: 인덱스 없이 전수 계산
+
+라벨은 상품 id 문자열이라 저장소가 append/compaction으로 행 번호가 바뀌어도 인덱스는 유효합니다.
+다시 임베딩된 상품의 예전 벡터는 재빌드 전까지 인덱스에 남지만, 재순위 단계에서 현재 벡터를 쓰므로
+결과가 틀리지는 않습니다.
+"""
+
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Type, Union
+
+import numpy as np
+
+from embedding_store import normalize_rows, top_k_indices
+from quantization import ProductQuantizer, ScalarQuantizer
+
+logger = logging.getLogger(__name__)
+
+# 선택 백엔드
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+META_NAME = "index.json"
+
+
+class AnnIndex:
+    """ANN 인덱스 공통 인터페이스. 벡터는 L2 정규화되어 있다고 가정합니다 (내적 검색)."""
+
+    kind = ""
+
+    def __init__(self):
+        self.labels = np.empty(0, dtype=str)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def build(self, vectors: np.ndarray, labels: Sequence[str]) -> None:
+        """벡터 전체로 인덱스를 새로 만듭니다"""
+        raise NotImplementedError
+
+    def add(self, vectors: np.ndarray, labels: Sequence[str]) -> None:
+        """재학습 없이 벡터를 추가합니다"""
+        raise NotImplementedError
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """쿼리와 가까운 벡터 최대 k개의 (라벨, 내적) - 점수 내림차순"""
+        raise NotImplementedError
+
+    def save(self, path: Union[str, Path]) -> None:
+        raise NotImplementedError
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "AnnIndex":
+        raise NotImplementedError
+
+    def _write_meta(self, path: Path, **params) -> None:
+        path.mkdir(parents=True, exist_ok=True)
+        with open(path / META_NAME, "w") as f:
+            json.dump({"kind": self.kind, **params}, f)
+        np.save(path / "labels.npy", self.labels)
+
+    def _extend_labels(self, labels: Sequence[str]) -> np.ndarray:
+        """새 라벨을 붙이고 그 내부 번호(0부터 이어지는 정수)를 돌려줍니다"""
+        start = len(self.labels)
+        self.labels = np.concatenate([self.labels, np.asarray(labels, dtype=str)])
+        return np.arange(start, len(self.labels), dtype=np.int64)
+
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 10,
+                     seed: int = 0) -> np.ndarray:
+    """내적 기준 k-means (중심도 정규화). 빈 클러스터는 임의의 점으로 다시 뽑습니다."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _nearest_centroid(vectors, centroids)
+        counts = np.bincount(assignments, minlength=n_clusters)
+        filled = counts > 0
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        sums = np.empty_like(centroids)
+        sums[filled] = np.add.reduceat(vectors[np.argsort(assignments, kind="stable")], starts)
+        sums[~filled] = vectors[rng.choice(len(vectors), int((~filled).sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+def _nearest_centroid(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+    """벡터별 가장 가까운(내적 최대) 중심 번호. 메모리를 아끼려 chunk 단위로 계산"""
+    return np.concatenate([
+        np.argmax(np.asarray(vectors[start:start + chunk]) @ centroids.T, axis=1)
+        for start in range(0, len(vectors), chunk)
+    ]) if len(vectors) else np.empty(0, dtype=np.int64)
+
+
+class IVFIndex(AnnIndex):
+    """
+    순수 NumPy IVF-Flat
+
+    벡터를 k-means 리스트 순으로 정렬해 한 덩어리(list_vectors)로 들고 있고,
+    list_offsets[i]:list_offsets[i+1]이 i번째 리스트입니다.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, nlist: Optional[int] = None, nprobe: int = 32, train_size: Optional[int] = None,
+                 iterations: int = 10, seed: int = 0):
+        """
+        Args:
+            nlist: 리스트(중심) 수 (기본값: 4√n)
+            nprobe: 검색 시 훑을 리스트 수 - 클수록 recall↑ 속도↓
+            train_size: k-means 학습 표본 수 (기본값: max(50000, 리스트당 32개))
+            iterations: k-means 반복 수
+            seed: 표본/초기 중심 선택 시드 (같은 입력이면 같은 인덱스)
+        """
+        super().__init__()
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size
+        self.iterations = iterations
+        self.seed = seed
+        self.centroids = np.empty((0, 0), dtype=np.float32)
+        self.list_offsets = np.zeros(1, dtype=np.int64)
+        self.list_vectors = np.empty((0, 0), dtype=np.float32)
+        self.list_ids = np.empty(0, dtype=np.int64)  # list_vectors 행 → labels 번호
+
+    def build(self, vectors: np.ndarray, labels: Sequence[str]) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n = len(vectors)
+        if n == 0:
+            raise ValueError("Cannot build an index from zero vectors")
+        nlist = min(self.nlist or max(1, int(4 * np.sqrt(n))), n)
+        train_size = self.train_size or max(50000, 32 * nlist)
+        rng = np.random.default_rng(self.seed)
+        sample = vectors[np.sort(rng.choice(n, min(n, max(train_size, nlist)), replace=False))]
+        self.centroids = spherical_kmeans(sample, nlist, self.iterations, self.seed)
+        self.labels = np.empty(0, dtype=str)
+        self.list_offsets = np.zeros(nlist + 1, dtype=np.int64)
+        self.list_vectors = np.empty((0, vectors.shape[1]), dtype=np.float32)
+        self.list_ids = np.empty(0, dtype=np.int64)
+        self.add(vectors, labels)
+
+    def add(self, vectors: np.ndarray, labels: Sequence[str]) -> None:
+        if not len(self.centroids):
+            return self.build(vectors, labels)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        ids = self._extend_labels(labels)
+        assignments = _nearest_centroid(vectors, self.centroids)
+
+        # 기존 리스트 번호와 합쳐 리스트 순으로 다시 정렬 (안정 정렬이라 리스트 안 순서는 추가 순)
+        sizes = np.diff(self.list_offsets)
+        all_lists = np.concatenate([np.repeat(np.arange(len(sizes)), sizes), assignments])
+        order = np.argsort(all_lists, kind="stable")
+        self.list_vectors = np.concatenate([self.list_vectors, vectors])[order]
+        self.list_ids = np.concatenate([self.list_ids, ids])[order]
+        counts = np.bincount(all_lists, minlength=len(self.centroids))
+        self.list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if not len(self.list_ids):
+            return np.empty(0, dtype=str), np.empty(0, dtype=np.float32)
+        query = normalize_rows(np.asarray(query, dtype=np.float32).ravel())
+        probes = top_k_indices(self.centroids @ query, self.nprobe)
+        rows, scores = [], []
+        for probe in probes:
+            start, end = self.list_offsets[probe], self.list_offsets[probe + 1]
+            if end > start:
+                rows.append(np.arange(start, end))
+                scores.append(self.list_vectors[start:end] @ query)
+        if not rows:
+            return np.empty(0, dtype=str), np.empty(0, dtype=np.float32)
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+        picked = top_k_indices(scores, k)
+        return self.labels[self.list_ids[rows[picked]]], scores[picked]
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        self._write_meta(path, nprobe=self.nprobe, nlist=len(self.centroids), seed=self.seed)
+        np.save(path / "centroids.npy", self.centroids)
+        np.save(path / "list_offsets.npy", self.list_offsets)
+        np.save(path / "list_vectors.npy", self.list_vectors)
+        np.save(path / "list_ids.npy", self.list_ids)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], nprobe: Optional[int] = None) -> "IVFIndex":
+        path = Path(path)
+        with open(path / META_NAME) as f:
+            meta = json.load(f)
+        index = cls(nlist=meta["nlist"], nprobe=nprobe or meta["nprobe"], seed=meta["seed"])
+        index.labels = np.load(path / "labels.npy")
+        index.centroids = np.load(path / "centroids.npy")
+        index.list_offsets = np.load(path / "list_offsets.npy")
+        index.list_vectors = np.load(path / "list_vectors.npy", mmap_mode="r")  # 저장소처럼 워커 간 공유
+        index.list_ids = np.load(path / "list_ids.npy")
+        return index
+
+
+class HnswIndex(AnnIndex):
+    """hnswlib HNSW (space='ip')"""
+
+    kind = "hnsw"
+
+    def __init__(self, m: int = 16, ef_construction: int = 200, ef_search: int = 64):
+        if not HNSWLIB_AVAILABLE:
+            raise ImportError("hnswlib is not installed (pip install hnswlib)")
+        super().__init__()
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.index = None
+
+    def build(self, vectors: np.ndarray, labels: Sequence[str]) -> None:
+        self.labels = np.empty(0, dtype=str)
+        self.index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        self.index.init_index(max_elements=len(vectors), M=self.m, ef_construction=self.ef_construction)
+        self.index.set_ef(self.ef_search)
+        self.add(vectors, labels)
+
+    def add(self, vectors: np.ndarray, labels: Sequence[str]) -> None:
+        if self.index is None:
+            return self.build(vectors, labels)
+        ids = self._extend_labels(labels)
+        if len(self.labels) > self.index.get_max_elements():
+            self.index.resize_index(len(self.labels))
+        self.index.add_items(np.asarray(vectors, dtype=np.float32), ids)
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(self.labels))
+        if k == 0:
+            return np.empty(0, dtype=str), np.empty(0, dtype=np.float32)
+        query = normalize_rows(np.asarray(query, dtype=np.float32).ravel())
+        self.index.set_ef(max(self.ef_search, k))
+        ids, distances = self.index.knn_query(query, k=k)
+        return self.labels[ids[0]], 1.0 - distances[0]  # ip 거리 = 1 - 내적
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        self._write_meta(path, m=self.m, ef_construction=self.ef_construction, ef_search=self.ef_search,
+                         dim=self.index.dim)
+        self.index.save_index(str(path / "hnsw.bin"))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "HnswIndex":
+        path = Path(path)
+        with open(path / META_NAME) as f:
+            meta = json.load(f)
+        index = cls(m=meta["m"], ef_construction=meta["ef_construction"], ef_search=meta["ef_search"])
+        index.labels = np.load(path / "labels.npy")
+        index.index = hnswlib.Index(space="ip", dim=meta["dim"])
+        index.index.load_index(str(path / "hnsw.bin"), max_elements=len(index.labels))
+        index.index.set_ef(index.ef_search)
+        return index
+
+
+class FaissIndex(AnnIndex):
+    """faiss-cpu IndexHNSWFlat (내적)"""
+
+    kind = "faiss"
+
+    def __init__(self, m: int = 32, ef_search: int = 64):
+        if not FAISS_AVAILABLE:
+            raise ImportError("faiss is not installed (pip install faiss-cpu)")
+        super().__init__()
+        self.m = m
+        self.ef_search = ef_search
+        self.index = None
+
+    def build(self, vectors: np.ndarray, labels: Sequence[str]) -> None:
+        self.labels = np.empty(0, dtype=str)
+        self.index = faiss.IndexHNSWFlat(vectors.shape[1], self.m, faiss.METRIC_INNER_PRODUCT)
+        self.add(vectors, labels)
+
+    def add(self, vectors: np.ndarray, labels: Sequence[str]) -> None:
+        if self.index is None:
+            return self.build(vectors, labels)
+        self._extend_labels(labels)  # faiss는 추가 순서대로 0, 1, ... 번호를 매김
+        self.index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(self.labels))
+        if k == 0:
+            return np.empty(0, dtype=str), np.empty(0, dtype=np.float32)
+        query = normalize_rows(np.asarray(query, dtype=np.float32).ravel())
+        self.index.hnsw.efSearch = max(self.ef_search, k)
+        scores, ids = self.index.search(query[None, :], k)
+        found = ids[0] >= 0
+        return self.labels[ids[0][found]], scores[0][found]
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        self._write_meta(path, m=self.m, ef_search=self.ef_search)
+        faiss.write_index(self.index, str(path / "faiss.index"))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "FaissIndex":
+        path = Path(path)
+        with open(path / META_NAME) as f:
+            meta = json.load(f)
+        index = cls(m=meta["m"], ef_search=meta["ef_search"])
+        index.labels = np.load(path / "labels.npy")
+        index.index = faiss.read_index(str(path / "faiss.index"))
+        return index
+
+
+class _QuantizedIndex(AnnIndex):
+    """
+    압축 코드 전수 스캔 (sq8 / pq 공통)
+
+    그래프/리스트 없이 모든 코드를 근사 점수로 훑고, 정확한 점수는 저장소 재순위에 맡깁니다.
+    코드만 메모리에 두므로 float32 벡터는 mmap에서 후보 행만 읽힙니다.
+    """
+
+    _code_axis = 0  # 코드 배열에서 벡터가 늘어나는 축
+
+    def __init__(self, train_size: int = 65536, seed: int = 0):
+        super().__init__()
+        self.train_size = train_size
+        self.seed = seed
+        self.codes = None
+
+    def _trained(self) -> bool:
+        raise NotImplementedError
+
+    def _train(self, sample: np.ndarray) -> None:
+        raise NotImplementedError
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def _concat(self, codes: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def build(self, vectors: np.ndarray, labels: Sequence[str]) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors) == 0:
+            raise ValueError("Cannot build an index from zero vectors")
+        rng = np.random.default_rng(self.seed)
+        sample = vectors[np.sort(rng.choice(len(vectors), min(len(vectors), self.train_size), replace=False))]
+        self._train(sample)
+        self.labels = np.empty(0, dtype=str)
+        self.codes = None
+        self.add(vectors, labels)
+
+    def add(self, vectors: np.ndarray, labels: Sequence[str]) -> None:
+        if not self._trained():
+            return self.build(vectors, labels)
+        codes = np.concatenate([
+            self._encode(np.asarray(vectors[start:start + 65536], dtype=np.float32))
+            for start in range(0, len(vectors), 65536)
+        ], axis=self._code_axis)
+        self._extend_labels(labels)
+        self.codes = codes if self.codes is None else self._concat(codes)
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if not len(self.labels):
+            return np.empty(0, dtype=str), np.empty(0, dtype=np.float32)
+        query = normalize_rows(np.asarray(query, dtype=np.float32).ravel())
+        scores = self._scores(query)
+        picked = top_k_indices(scores, k)
+        return self.labels[picked], scores[picked]
+
+
+class SQ8Index(_QuantizedIndex):
+    """int8 스칼라 양자화 (벡터당 dim 바이트, float32의 1/4)"""
+
+    kind = "sq8"
+
+    def __init__(self, train_size: int = 65536, seed: int = 0):
+        super().__init__(train_size, seed)
+        self.quantizer = ScalarQuantizer()
+
+    def _trained(self) -> bool:
+        return self.quantizer.scale is not None
+
+    def _train(self, sample: np.ndarray) -> None:
+        self.quantizer.train(sample)
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        return self.quantizer.encode(vectors)
+
+    def _concat(self, codes: np.ndarray) -> np.ndarray:
+        return np.concatenate([self.codes, codes])
+
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        return self.quantizer.scores(self.codes, query)
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        self._write_meta(path, train_size=self.train_size, seed=self.seed)
+        np.save(path / "scale.npy", self.quantizer.scale)
+        np.save(path / "codes.npy", self.codes)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "SQ8Index":
+        path = Path(path)
+        with open(path / META_NAME) as f:
+            meta = json.load(f)
+        index = cls(train_size=meta["train_size"], seed=meta["seed"])
+        index.labels = np.load(path / "labels.npy")
+        index.quantizer.scale = np.load(path / "scale.npy")
+        index.codes = np.load(path / "codes.npy")
+        return index
+
+
+class PQIndex(_QuantizedIndex):
+    """Product Quantization + ADC (벡터당 m 바이트)"""
+
+    kind = "pq"
+    _code_axis = 1
+
+    def __init__(self, m: int = 32, train_size: int = 16384, iterations: int = 15, seed: int = 0):
+        """
+        Args:
+            m: 부분공간 수 = 벡터당 바이트 수 (dim의 약수)
+            train_size: 코드북 학습 표본 수 (중심당 64개면 충분, 학습 시간은 표본 수에 비례)
+            iterations: 부분공간 k-means 반복 수
+            seed: 표본/초기 중심 선택 시드
+        """
+        super().__init__(train_size, seed)
+        self.quantizer = ProductQuantizer(m=m, iterations=iterations, seed=seed)
+
+    @property
+    def m(self) -> int:
+        return self.quantizer.m
+
+    def _trained(self) -> bool:
+        return self.quantizer.codebooks is not None
+
+    def _train(self, sample: np.ndarray) -> None:
+        self.quantizer.train(sample)
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        return self.quantizer.encode(vectors)
+
+    def _concat(self, codes: np.ndarray) -> np.ndarray:
+        return np.concatenate([self.codes, codes], axis=1)
+
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        return self.quantizer.scores(self.codes, query)
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        self._write_meta(path, m=self.m, train_size=self.train_size, iterations=self.quantizer.iterations,
+                         seed=self.seed)
+        np.save(path / "codebooks.npy", self.quantizer.codebooks)
+        np.save(path / "codes.npy", self.codes)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "PQIndex":
+        path = Path(path)
+        with open(path / META_NAME) as f:
+            meta = json.load(f)
+        index = cls(m=meta["m"], train_size=meta["train_size"], iterations=meta["iterations"], seed=meta["seed"])
+        index.labels = np.load(path / "labels.npy")
+        index.quantizer.codebooks = np.load(path / "codebooks.npy")
+        index.codes = np.load(path / "codes.npy")
+        return index
+
+
+ANN_BACKENDS: Dict[str, Type[AnnIndex]] = {
+    IVFIndex.kind: IVFIndex,
+    HnswIndex.kind: HnswIndex,
+    FaissIndex.kind: FaissIndex,
+    SQ8Index.kind: SQ8Index,
+    PQIndex.kind: PQIndex,
+}
+
+
+def create_ann_index(kind: str, **params) -> AnnIndex:
+    """ANN_INDEX 이름(ivf | hnsw | faiss | sq8 | pq)으로 빈 인덱스를 만듭니다"""
+    if kind not in ANN_BACKENDS:
+        raise ValueError(f"Unknown ANN index '{kind}' (expected one of {sorted(ANN_BACKENDS)})")
+    return ANN_BACKENDS[kind](**params)
+
+
+def save_ann_index(index: AnnIndex, path: Union[str, Path]) -> None:
+    """옆 디렉터리에 쓴 뒤 바꿔 끼웁니다. 교체 중 잠깐 인덱스가 없으면 읽는 쪽은 전수 검색으로 돕니다."""
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    old_path = path.with_name(f"{path.name}.old-{os.getpid()}")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    index.save(tmp_path)
+    if path.exists():
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    logger.info(f"Saved {index.kind} index with {len(index)} vectors to {path}")
+
+
+def load_ann_index(path: Union[str, Path]) -> Optional[AnnIndex]:
+    """저장된 인덱스를 종류에 맞게 로드합니다. 없거나 백엔드가 설치되지 않았으면 None"""
+    path = Path(path)
+    if not (path / META_NAME).exists():
+        return None
+    with open(path / META_NAME) as f:
+        kind = json.load(f)["kind"]
+    try:
+        return ANN_BACKENDS[kind].load(path)
+    except ImportError as e:
+        logger.warning(f"Cannot load {kind} index at {path}: {str(e)}")
+        return None
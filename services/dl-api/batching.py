@@ -0,0 +1,213 @@
+"""
+동적 마이크로배칭 스케줄러
+
+동시에 들어온 요청의 이미지를 최대 max_wait_ms 동안(또는 max_batch_size개가 찰 때까지) 모아
+batch_fn 한 번(= forward pass 한 번)으로 처리하고, 결과를 요청별 future로 돌려줍니다.
+batch_fn은 입력 리스트와 같은 길이·순서의 결과 리스트를 돌려주는 동기 함수이며,
+이벤트 루프를 막지 않도록 executor 스레드에서 실행됩니다.
+
+    batcher = MicroBatcher("features", model.extract_features_batch, max_batch_size=32, max_wait_ms=5)
+    features = await batcher.submit(image)
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 1024  # 통계에 쓰는 최근 배치/요청 수
+
+
+class MicroBatcher:
+    """대기열 + 배치 워커 태스크 1개. 이벤트 루프 안에서만 사용합니다."""
+
+    def __init__(self, name: str, batch_fn: Callable[[List[Any]], Sequence[Any]],
+                 max_batch_size: int = 16, max_wait_ms: float = 5.0, executor: Optional[Executor] = None,
+                 max_concurrent_batches: int = 1):
+        """
+        Args:
+            name: 통계/로그용 이름
+            batch_fn: 입력 리스트 → 같은 순서의 결과 리스트 (동기 함수)
+            max_batch_size: 한 번에 처리할 최대 입력 수
+            max_wait_ms: 첫 입력이 들어온 뒤 배치를 더 모을 최대 시간
+            executor: batch_fn을 실행할 executor (기본값: 루프 기본 스레드 풀)
+            max_concurrent_batches: 동시에 처리할 배치 수 (추론 워커 프로세스가 여럿일 때 워커 수)
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor
+        self.max_concurrent_batches = max_concurrent_batches
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._pending: Deque[Tuple[Any, asyncio.Future, float]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # 통계 (최근 LATENCY_WINDOW개)
+        self._queue_ms: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._batch_ms: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._batch_sizes: Deque[int] = deque(maxlen=LATENCY_WINDOW)
+        self.total_items = 0
+        self.total_batches = 0
+        self.failed_batches = 0
+
+    def start(self) -> None:
+        """현재 이벤트 루프에 배치 워커를 띄웁니다 (submit이 처음 불릴 때 자동 호출)"""
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._worker = asyncio.get_running_loop().create_task(self._run(), name=f"batcher-{self.name}")
+
+    async def stop(self) -> None:
+        """워커를 멈추고 대기 중인 요청을 취소합니다"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        for task in list(self._tasks):
+            task.cancel()
+        while self._pending:
+            _, future, _ = self._pending.popleft()
+            future.cancel()
+
+    async def submit(self, item: Any) -> Any:
+        """입력 1개를 큐에 넣고 배치 처리 결과를 기다립니다. batch_fn의 예외는 그대로 전달됩니다."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        self._wakeup.set()
+        return await future
+
+    async def submit_many(self, items: Sequence[Any]) -> List[Any]:
+        """
+        입력 여러 개(예: 한 사진의 crop들)를 한꺼번에 큐에 넣어 같은 배치로 처리되게 하고
+        입력 순서대로 결과를 돌려줍니다 (max_batch_size를 넘는 부분은 다음 배치로).
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        enqueued = time.perf_counter()
+        futures = [loop.create_future() for _ in items]
+        self._pending.extend((item, future, enqueued) for item, future in zip(items, futures))
+        self._wakeup.set()
+        try:
+            return list(await asyncio.gather(*futures))
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future, float]]:
+        """
+        가장 오래 기다린 입력 기준 max_wait 안에서 max_batch_size까지 모읍니다.
+        앞 배치가 도는 동안 쌓인 입력은 이미 마감이 지났으므로 바로 처리됩니다.
+        """
+        while not self._pending:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        deadline = self._pending[0][2] + self.max_wait
+        while len(self._pending) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return [self._pending.popleft() for _ in range(min(len(self._pending), self.max_batch_size))]
+
+    async def _run(self) -> None:
+        while True:
+            # 처리 중인 배치가 max_concurrent_batches개면 그동안 들어온 요청은 다음 배치로 모임
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = asyncio.get_running_loop().create_task(self._process(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        try:
+            await self._process_batch(batch)
+        finally:
+            self._slots.release()
+
+    async def _process_batch(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        loop = asyncio.get_running_loop()
+        # 기다리다 취소된 요청(클라이언트 연결 종료)은 계산하지 않음
+        batch = [entry for entry in batch if not entry[1].done()]
+        if not batch:
+            return
+        started = time.perf_counter()
+        self._queue_ms.extend((started - enqueued) * 1000 for _, _, enqueued in batch)
+        try:
+            results = await loop.run_in_executor(self.executor, self.batch_fn, [item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name} batch returned {len(results)} results for {len(batch)} inputs")
+        except Exception as e:
+            self.failed_batches += 1
+            logger.error(f"{self.name} batch of {len(batch)} failed: {str(e)}")
+            # 잘못된 입력 하나가 같은 배치의 다른 요청까지 실패시키지 않도록 하나씩 다시 실행
+            for item, future, _ in batch:
+                if future.done():
+                    continue
+                if len(batch) == 1:
+                    future.set_exception(e)
+                    continue
+                try:
+                    result = (await loop.run_in_executor(self.executor, self.batch_fn, [item]))[0]
+                except Exception as item_error:
+                    if not future.done():
+                        future.set_exception(item_error)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+            return
+        finally:
+            self._batch_ms.append((time.perf_counter() - started) * 1000)
+            self._batch_sizes.append(len(batch))
+            self.total_items += len(batch)
+            self.total_batches += 1
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """큐 대기 시간 / 배치 처리 시간 분위수와 평균 배치 크기"""
+        def percentiles(samples: Deque[float]) -> Dict[str, float]:
+            if not samples:
+                return {"p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+            values = np.fromiter(samples, dtype=np.float64)
+            p50, p95 = np.percentile(values, [50, 95])
+            return {"p50_ms": round(float(p50), 2), "p95_ms": round(float(p95), 2),
+                    "max_ms": round(float(values.max()), 2)}
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "in_flight_batches": len(self._tasks),
+            "queued": len(self._pending),
+            "total_items": self.total_items,
+            "total_batches": self.total_batches,
+            "failed_batches": self.failed_batches,
+            "mean_batch_size": round(float(np.mean(self._batch_sizes)), 2) if self._batch_sizes else 0.0,
+            "queue_latency": percentiles(self._queue_ms),
+            "batch_latency": percentiles(self._batch_ms),
+        }
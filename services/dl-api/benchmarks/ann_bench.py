@@ -0,0 +1,101 @@
+"""
+ANN 인덱스 recall@k / 지연 벤치마크
+
+군집이 있는 합성 256차원 벡터 N개(기본 100k, 최대 1M 권장)로 각 백엔드를 빌드하고,
+전수 계산(정답) 대비 recall@k와 쿼리 지연을 파라미터별로 출력합니다.
+hnsw/faiss는 설치되어 있을 때만 측정합니다. 마지막 줄은 EmbeddingStore에 IVF를 붙였을 때
+(후보 재순위 포함) 상품 단위 recall과 지연입니다.
+
+    python -m benchmarks.ann_bench --items 1000000 --queries 200
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from ann_index import ANN_BACKENDS, FAISS_AVAILABLE, HNSWLIB_AVAILABLE, IVFIndex
+from config import ANN_CANDIDATES, ANN_NPROBE
+from embedding_store import EmbeddingStore, normalize_rows, top_k_indices
+
+
+def make_dataset(n_items: int, dim: int, n_queries: int, seed: int = 0):
+    """가구 임베딩처럼 비슷한 상품끼리 뭉친 데이터 (n/100개 군집 + 잡음). 쿼리는 임의 상품 근처."""
+    rng = np.random.default_rng(seed)
+    centers = normalize_rows(rng.standard_normal((max(1, n_items // 100), dim), dtype=np.float32))
+    vectors = np.empty((n_items, dim), dtype=np.float32)
+    for start in range(0, n_items, 100000):
+        end = min(start + 100000, n_items)
+        noise = rng.standard_normal((end - start, dim), dtype=np.float32) * 0.07
+        vectors[start:end] = normalize_rows(centers[rng.integers(0, len(centers), end - start)] + noise)
+    picks = rng.integers(0, n_items, n_queries)
+    queries = normalize_rows(vectors[picks] + rng.standard_normal((n_queries, dim), dtype=np.float32) * 0.05)
+    return vectors, queries
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int):
+    return [top_k_indices(vectors @ query, k) for query in queries]
+
+
+def measure(search, queries: np.ndarray, truth, k: int):
+    """(recall@k, p50 ms, p95 ms)"""
+    hits, samples = 0, []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(query)
+        samples.append((time.perf_counter() - start) * 1000)
+        hits += len(set(found[:k]) & set(expected.tolist()))
+    samples.sort()
+    return hits / (k * len(queries)), statistics.median(samples), samples[max(0, int(len(samples) * 0.95) - 1)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    vectors, queries = make_dataset(args.items, args.dim, args.queries)
+    labels = np.arange(args.items).astype(str)
+    truth = exact_top_k(vectors, queries, args.top_k)
+    print(f"dataset: {args.items} x {args.dim} in {time.perf_counter() - start:.1f}s")
+
+    k = args.top_k
+    print(f"{'index':>14} {'param':>10} {'recall@' + str(k):>10} {'p50':>9} {'p95':>9}")
+    recall, p50, p95 = measure(lambda q: top_k_indices(vectors @ q, k).tolist(), queries, truth, k)
+    print(f"{'brute force':>14} {'-':>10} {recall:>10.3f} {p50:>7.2f}ms {p95:>7.2f}ms")
+
+    sweeps = {"ivf": ("nprobe", [1, 4, 8, 16, 32, 64])}
+    if HNSWLIB_AVAILABLE:
+        sweeps["hnsw"] = ("ef_search", [16, 32, 64, 128, 256])
+    if FAISS_AVAILABLE:
+        sweeps["faiss"] = ("ef_search", [16, 32, 64, 128, 256])
+
+    for kind, (param, values) in sweeps.items():
+        index = ANN_BACKENDS[kind]()
+        start = time.perf_counter()
+        index.build(vectors, labels)
+        print(f"{kind:>14} built in {time.perf_counter() - start:.1f}s")
+        for value in values:
+            setattr(index, param, value)
+            recall, p50, p95 = measure(lambda q: [int(label) for label in index.search(q, k)[0]], queries, truth, k)
+            print(f"{kind:>14} {param[:6] + '=' + str(value):>10} {recall:>10.3f} {p50:>7.2f}ms {p95:>7.2f}ms")
+
+    # 저장소 + IVF (상품 1개 = 벡터 1개, 후보 재순위 포함)
+    order = np.argsort(labels)  # 저장소는 상품 id 문자열 순
+    store = EmbeddingStore(labels[order], np.arange(args.items), vectors[order])
+    index = IVFIndex(nprobe=ANN_NPROBE)
+    index.build(store.segments[0], store.product_ids)
+    store.attach_index(index, candidates=ANN_CANDIDATES)
+    recall, p50, p95 = measure(lambda q: [int(pid) for pid, _ in store.search(q, k)], queries, truth, k)
+    print(f"{'store+ivf':>14} {'nprobe=' + str(index.nprobe):>10} {recall:>10.3f} {p50:>7.2f}ms {p95:>7.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+탐지 후처리 벤치마크
+
+합성 Detectron2 출력(이미지당 --instances개, COCO 80클래스, 점수는 임계값 이상)으로
+예전 인스턴스별 Python 루프(임계값 재확인 + if/elif 매핑 + pydantic 검증 + 정렬)와
+detection_postprocess의 룩업 테이블 + 정렬 한 번 방식을 비교해 이미지당 후처리 시간을 출력합니다.
+두 방식의 결과가 같은지도 확인합니다.
+
+    python -m benchmarks.detection_postprocess_bench --instances 100 --batch 1 4 16
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from detection_postprocess import build_category_lut, postprocess_detections
+from models import DetectionItem
+
+CONFIDENCE_THRESHOLD = 0.7
+FURNITURE_CLASSES = {56: 'chair', 57: 'couch', 59: 'bed', 60: 'dining table', 58: 'potted plant'}
+
+
+def legacy_parse(pred_classes, pred_boxes, pred_scores):
+    """예전 FurnitureDetector._parse_detections (이미지 1장)"""
+    detections = []
+    for i in range(len(pred_classes)):
+        if pred_scores[i] >= CONFIDENCE_THRESHOLD:
+            class_id = pred_classes[i]
+            confidence = float(pred_scores[i])
+            bbox = pred_boxes[i].tolist()
+            if class_id in FURNITURE_CLASSES:
+                coco_category = FURNITURE_CLASSES[class_id]
+                if coco_category == 'chair':
+                    category = 'chair'
+                elif coco_category == 'couch':
+                    category = 'sofa'
+                elif coco_category == 'bed':
+                    category = 'bed'
+                elif coco_category == 'dining table':
+                    category = 'table'
+                elif coco_category == 'potted plant':
+                    category = 'lamp'
+                else:
+                    category = 'unknown'
+                detections.append(DetectionItem(category=category, confidence=confidence, bbox=bbox))
+    detections.sort(key=lambda x: x.confidence, reverse=True)
+    return detections
+
+
+def make_outputs(n_images: int, n_instances: int, seed: int = 0):
+    """이미지별 (classes, boxes, scores). 가구 클래스가 절반쯤 되도록 섞음"""
+    rng = np.random.default_rng(seed)
+    outputs = []
+    for _ in range(n_images):
+        classes = np.where(rng.random(n_instances) < 0.5,
+                           rng.choice(sorted(FURNITURE_CLASSES), n_instances), rng.integers(0, 80, n_instances))
+        scores = np.sort(rng.uniform(CONFIDENCE_THRESHOLD, 1.0, n_instances).astype(np.float32))[::-1]
+        corners = rng.uniform(0, 800, (n_instances, 2)).astype(np.float32)
+        boxes = np.concatenate([corners, corners + rng.uniform(10, 400, (n_instances, 2)).astype(np.float32)], axis=1)
+        outputs.append((classes.astype(np.int64), boxes, scores))
+    return outputs
+
+
+def per_image_us(fn, n_images: int, repeats: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats / n_images * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--instances", type=int, nargs="+", default=[20, 100], help="detections per image")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 4, 16], help="images per batch")
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    lut, names = build_category_lut(FURNITURE_CLASSES)
+    print(f"{'instances':>9} {'batch':>6} {'legacy':>10} {'vectorized':>11} {'speedup':>8}")
+    for n_instances in args.instances:
+        for n_images in args.batch:
+            outputs = make_outputs(n_images, n_instances)
+            counts = [len(classes) for classes, _, _ in outputs]
+            classes = np.concatenate([o[0] for o in outputs])
+            boxes = np.concatenate([o[1] for o in outputs])
+            scores = np.concatenate([o[2] for o in outputs])
+
+            def legacy():
+                return [legacy_parse(*output) for output in outputs]
+
+            def vectorized():
+                return postprocess_detections(classes, scores, boxes, counts, lut, names)
+
+            expected = [[item.model_dump() for item in items] for items in legacy()]
+            found = [[item.model_dump() for item in items] for items in vectorized()]
+            assert found == expected, "vectorized post-processing differs from the legacy loop"
+
+            legacy_us = per_image_us(legacy, n_images, args.repeats)
+            vectorized_us = per_image_us(vectorized, n_images, args.repeats)
+            print(f"{n_instances:>9} {n_images:>6} {legacy_us:>8.1f}us {vectorized_us:>9.1f}us "
+                  f"{legacy_us / vectorized_us:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
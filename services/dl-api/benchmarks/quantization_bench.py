@@ -0,0 +1,65 @@
+"""
+압축 임베딩(int8 / PQ) 메모리·QPS·recall 벤치마크
+
+ann_bench와 같은 합성 데이터로 float32 전수 계산(기준)과 sq8 / pq(m별) 코드 전수 스캔을 비교합니다.
+recall@k는 압축 점수 그대로의 순위와, EmbeddingStore에 붙여 후보(top_k * ANN_CANDIDATES)를
+원본 벡터로 재순위했을 때 두 가지를 출력합니다.
+
+    python -m benchmarks.quantization_bench --items 200000 --pq 16 32 64
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from ann_index import PQIndex, SQ8Index
+from benchmarks.ann_bench import exact_top_k, make_dataset, measure
+from config import ANN_CANDIDATES
+from embedding_store import EmbeddingStore, top_k_indices
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--pq", type=int, nargs="+", default=[16, 32, 64], help="PQ subspace counts (m)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    vectors, queries = make_dataset(args.items, args.dim, args.queries)
+    labels = np.arange(args.items).astype(str)
+    truth = exact_top_k(vectors, queries, args.top_k)
+    print(f"dataset: {args.items} x {args.dim} in {time.perf_counter() - start:.1f}s")
+
+    k = args.top_k
+    order = np.argsort(labels)  # 저장소는 상품 id 문자열 순
+    store = EmbeddingStore(labels[order], np.arange(args.items), vectors[order])
+
+    print(f"{'index':>8} {'bytes/vec':>10} {'memory':>9} {'ratio':>6} {'build':>7} {'QPS':>7} {'speedup':>8} "
+          f"{'recall@' + str(k):>10} {'reranked':>9} {'p50':>9}")
+    recall, p50, _ = measure(lambda q: top_k_indices(vectors @ q, k).tolist(), queries, truth, k)
+    base_p50 = p50
+    print(f"{'float32':>8} {vectors.itemsize * args.dim:>10} {vectors.nbytes / 2 ** 20:>7.1f}MB {1:>5}x "
+          f"{'-':>7} {1000 / p50:>7.0f} {1:>7.2f}x {recall:>10.3f} {'-':>9} {p50:>7.2f}ms")
+
+    indexes = [("sq8", SQ8Index())] + [(f"pq{m}", PQIndex(m=m)) for m in args.pq]
+    for name, index in indexes:
+        start = time.perf_counter()
+        index.build(vectors, labels)
+        build = time.perf_counter() - start
+        recall, p50, _ = measure(lambda q: [int(label) for label in index.search(q, k)[0]], queries, truth, k)
+        store.attach_index(index, candidates=ANN_CANDIDATES)
+        reranked, _, _ = measure(lambda q: [int(pid) for pid, _ in store.search(q, k)], queries, truth, k)
+        size = index.codes.nbytes
+        print(f"{name:>8} {size // args.items:>10} {size / 2 ** 20:>7.1f}MB {vectors.nbytes / size:>5.0f}x "
+              f"{build:>6.1f}s {1000 / p50:>7.0f} {base_p50 / p50:>7.2f}x "
+              f"{recall:>10.3f} {reranked:>9.3f} {p50:>7.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
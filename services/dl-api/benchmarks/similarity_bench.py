@@ -0,0 +1,129 @@
+"""
+임베딩 유사도 검색 벤치마크
+
+무작위 상품 N개(기본 100k, 상품당 이미지 1~3장, 256차원)로 EmbeddingStore를 만들고
+쿼리 한 번의 검색 지연(임베딩 추출 제외)을 측정해 SIMILARITY_SEARCH_SLO_MS와 비교합니다.
+결과는 전체 정렬 기준 정답과 같은지, 반복 실행 시 동일한지 확인합니다.
+디스크 저장소(mmap 세그먼트)의 로드 시간과 append가 기존 세그먼트를 다시 쓰지 않는지도 봅니다.
+카테고리 샤드(PartitionedStore)는 단일 저장소와 결과가 같은지 확인하고 지연을 나란히 출력합니다.
+
+    python -m benchmarks.similarity_bench --products 100000
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from config import SIMILARITY_SEARCH_SLO_MS
+from embedding_store import EmbeddingStore, PartitionedStore, normalize_rows
+
+CATEGORIES = ["침대", "책상", "의자", "수납", "가전", "기타"]
+
+
+def build_store(n_products: int, dim: int, seed: int = 0) -> EmbeddingStore:
+    rng = np.random.default_rng(seed)
+    images_per_product = rng.integers(1, 4, size=n_products)
+    offsets = np.concatenate([[0], np.cumsum(images_per_product)[:-1]])
+    vectors = normalize_rows(rng.standard_normal((int(images_per_product.sum()), dim), dtype=np.float32))
+    product_ids = [f"p{i:07d}" for i in range(n_products)]
+    categories = [CATEGORIES[i % len(CATEGORIES)] for i in range(n_products)]
+    return EmbeddingStore(product_ids, offsets, vectors, categories)
+
+
+def brute_force(store: EmbeddingStore, query: np.ndarray, top_k: int, category=None):
+    scores = store.product_scores(query)
+    rows = np.arange(len(store))
+    if category:
+        rows = rows[store.categories == category.lower()]
+    order = sorted(rows, key=lambda row: (-scores[row], row))[:top_k]
+    return [str(store.product_ids[row]) for row in order]
+
+
+def check_disk_store(store: EmbeddingStore, path: Path, query: np.ndarray, top_k: int) -> None:
+    """저장 → mmap 로드 → append 후에도 검색 결과가 메모리 저장소와 같은지 확인합니다"""
+    start = time.perf_counter()
+    store.save(path)
+    save_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    loaded = EmbeddingStore.load(path)
+    load_ms = (time.perf_counter() - start) * 1000
+    assert loaded.search(query, top_k) == store.search(query, top_k), "mmap store differs from in-memory store"
+
+    first_segment = path / loaded.segment_files[0]
+    before = first_segment.stat()
+    rng = np.random.default_rng(2)
+    added = [(f"q{i:07d}", "침대", "", rng.standard_normal((2, store.dim), dtype=np.float32)) for i in range(1000)]
+    start = time.perf_counter()
+    appended = EmbeddingStore.append(path, added)
+    append_ms = (time.perf_counter() - start) * 1000
+    after = first_segment.stat()
+    assert (before.st_size, before.st_mtime_ns) == (after.st_size, after.st_mtime_ns), "append rewrote a segment"
+    assert len(appended) == len(store) + len(added)
+    expected = EmbeddingStore.from_products(list(store.iter_products()) + added).search(query, top_k)
+    result = appended.search(query, top_k)
+    # 세그먼트별 행렬-벡터 곱은 BLAS 블록 분할이 달라 마지막 자리 오차가 날 수 있음
+    assert [pid for pid, _ in result] == [pid for pid, _ in expected], "appended store differs from a rebuilt store"
+    assert np.allclose([score for _, score in result], [score for _, score in expected], atol=1e-6)
+    print(f"disk store: save {save_ms:.0f}ms, mmap load {load_ms:.1f}ms, "
+          f"append 1000 products {append_ms:.0f}ms ({len(appended.segment_files)} segments)")
+
+
+def timed(fn, repeats: int):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[max(0, int(len(samples) * 0.95) - 1)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--top-k", type=int, default=15)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    store = build_store(args.products, args.dim)
+    print(f"built store: {len(store)} products, {store.n_vectors} image vectors, dim {store.dim} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    rng = np.random.default_rng(1)
+    queries = normalize_rows(rng.standard_normal((args.repeats, args.dim), dtype=np.float32))
+    for category in (None, "침대"):
+        expected = brute_force(store, queries[0], args.top_k, category)
+        first = store.search(queries[0], args.top_k, category=category)
+        assert [pid for pid, _ in first] == expected, "search differs from exhaustive ranking"
+        assert store.search(queries[0], args.top_k, category=category) == first, "search is not deterministic"
+
+    # 카테고리 샤드: 필터 검색은 샤드 하나만, 전체 검색은 샤드별 top-k 힙 병합 - 결과는 같아야 함
+    partitioned = PartitionedStore.from_products(store.iter_products())
+    for category in (None, "침대"):
+        flat = store.search(queries[0], args.top_k, category=category)
+        sharded = partitioned.search(queries[0], args.top_k, category=category)
+        assert [pid for pid, _ in sharded] == [pid for pid, _ in flat], "partitioned search differs from flat search"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        check_disk_store(store, Path(tmp) / "embeddings", queries[0], args.top_k)
+
+    slo_met = True
+    print(f"{'store':>12} {'filter':>8} {'p50':>9} {'p95':>9}  (SLO p95 <= {SIMILARITY_SEARCH_SLO_MS:.0f}ms)")
+    for name, target in (("flat", store), ("partitioned", partitioned)):
+        for category in (None, "침대"):
+            it = iter(queries)
+            p50, p95 = timed(lambda: target.search(next(it), args.top_k, category=category), args.repeats)
+            slo_met &= p95 <= SIMILARITY_SEARCH_SLO_MS
+            print(f"{name:>12} {category or 'all':>8} {p50:>7.2f}ms {p95:>7.2f}ms")
+    return 0 if slo_met else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,15 +18,67 @@ API_DESCRIPTION = "AI-powered furniture detection and recommendation system"
 # 모델 설정
 DETECTION_MODEL_PATH = MODEL_DIR / "detection_model.pth"
 SIMILARITY_MODEL_PATH = MODEL_DIR / "similarity_model"
-FURNITURE_DATABASE_PATH = FURNITURE_DATA_DIR / "furniture_database.pkl"
+# 임베딩 모델 식별자와 차원. 저장소(shards.json)에 함께 기록되고, 다르면 API는 저장소를 거부하고
+# 인덱서는 전체 재구축합니다. SIMILARITY_MODEL_PATH의 커스텀 모델을 쓰면 둘 다 바꿔야 함
+EMBEDDING_MODEL_VERSION = "vgg16-imagenet-gap512"  # VGG16 conv 출력의 GlobalAveragePooling (무작위 가중치 없음)
+EMBEDDING_DIM = 512
 
 # 객체 탐지 설정
 DETECTION_CONFIDENCE_THRESHOLD = 0.7
 DETECTION_TARGET_CLASSES = ['Bed', 'Dresser', 'Chair', 'Sofa', 'Lamp', 'Table']
+# 탐지 클래스 → crud-api 카테고리 (침대/책상/의자/수납/가전/기타). 임베딩 샤드가 crud-api 카테고리 단위
+DETECTION_CATEGORY_MAP = {
+    'bed': '침대',
+    'table': '책상',
+    'chair': '의자',
+    'sofa': '의자',
+    'dresser': '수납',
+    'lamp': '가전',
+}
 
 # 유사도 검색 설정
 SIMILARITY_INPUT_SIZE = (224, 224)
 DEFAULT_TOP_K = 5
+MAX_TOP_K = 50  # /recommend, /detect-and-recommend top_k 상한 (후보 수 = top_k * SIMILARITY_OVERFETCH * ANN_CANDIDATES)
+DETECT_RECOMMEND_MAX_DETECTIONS = 8  # /detect-and-recommend에서 추천할 탐지 객체 수 (신뢰도 순)
+EMBEDDING_STORE_PATH = FURNITURE_DATA_DIR / "embeddings"  # 상품 이미지 임베딩 디렉터리 (EmbeddingStore, mmap 세그먼트)
+SIMILARITY_OVERFETCH = 3  # 재고 없는 상품을 거를 여유분 (top_k * N 후보 조회)
+SIMILARITY_SEARCH_SLO_MS = 50.0  # 100k 상품 기준 검색(임베딩 추출 제외) p95 목표
+ANN_INDEX = "ivf"  # ivf | hnsw | faiss | sq8 | pq | none (ann_index.py, EMBEDDING_STORE_PATH/ann에 저장)
+ANN_NPROBE = 32  # IVF 검색 시 훑을 리스트 수 (1M 합성 데이터 recall@10 ≈ 0.8, 1.5ms)
+PQ_SUBSPACES = 32  # pq 인덱스의 벡터당 바이트 수 (임베딩 차원의 약수, 512차원이면 64배 압축)
+ANN_CANDIDATES = 10  # 결과 1개당 ANN에 요청할 이미지 후보 수 (정확한 점수로 재순위)
+ANN_MIN_PRODUCTS = 50000  # 이보다 작은 저장소는 전수 검색이 충분히 빠름
+EMBEDDING_RELOAD_INTERVAL = 60.0  # 이 주기(초)로 shards.json mtime을 확인해 인덱서가 갱신한 저장소를 다시 로드 (0이면 사용 안 함)
+
+# 임베딩 인덱서 설정 (jobs/index_embeddings.py)
+EMBEDDING_STAGING_DIR = FURNITURE_DATA_DIR / "embedding_staging"  # --full 재구축 중인 저장소 (재개용)
+EMBEDDING_BATCH_SIZE = 32  # forward pass 한 번에 넣는 이미지 수
+EMBEDDING_WORKERS = 2  # 임베딩 프로세스 수 (프로세스마다 모델을 한 번 로드)
+IMAGE_FETCHER = "http"  # http | s3 | local
+IMAGE_ROOT = FURNITURE_DATA_DIR / "images"  # IMAGE_FETCHER=local 일 때 이미지 루트
+
+# 마이크로배칭 설정 (batching.py) - 동시 요청의 이미지를 모아 forward pass 한 번으로 처리
+FEATURE_MAX_BATCH_SIZE = 32  # VGG16 특성 추출 배치 최대 크기
+DETECTION_MAX_BATCH_SIZE = 4  # Detectron2 탐지 배치 최대 크기 (원본 해상도라 메모리가 큼)
+BATCH_MAX_WAIT_MS = 5.0  # 배치를 모으려고 가장 오래된 요청을 더 기다리게 하는 최대 시간
+
+# 실행 스레드 / 동시성 설정 (executors.py) - 이벤트 루프에서는 블로킹 작업을 하지 않음
+INFERENCE_THREADS = 2  # 모델 배치를 돌리는 스레드 수 (탐지 + 특성 추출이 동시에 돌 수 있도록)
+INTRA_OP_THREADS = 0  # 추론 스레드당 PyTorch/TensorFlow 연산 스레드 수 (0: 코어 수 / INFERENCE_THREADS)
+BLOCKING_THREADS = 8  # 업로드 디코딩, DB 쿼리용 스레드 수
+INFERENCE_WORKERS = 0  # > 0이면 모델을 이 수만큼의 워커 프로세스에 올림 (worker_pool.py, 이미지는 공유 메모리로 전달)
+INFERENCE_TASK_TIMEOUT = 120.0  # 워커 배치 하나를 기다리는 최대 시간(초). 넘으면 그 워커를 종료하고 다시 띄움
+MAX_CONCURRENT_REQUESTS = 16  # 동시에 처리하는 추론 요청 수 (/detect, /recommend)
+MAX_QUEUED_REQUESTS = 64  # 그 외에 기다릴 수 있는 요청 수. 넘으면 503
+
+# 결과 캐시 설정 (result_cache.py) - 키는 업로드 SHA-256 + 모델 버전 + 파라미터
+MODEL_VERSION = "faster_rcnn_R_50_FPN_3x+vgg16-imagenet-gap512"  # 캐시 키에 포함, 모델 가중치를 바꾸면 변경
+RESULT_CACHE_MAX_ENTRIES = 4096  # 메모리 LRU 최대 항목 수 (0이면 캐시 사용 안 함)
+RESULT_CACHE_MAX_MB = 128  # 메모리 LRU 최대 크기
+RESULT_CACHE_DIR = ""  # 디스크 tier 디렉터리 (비우면 메모리만, uvicorn 워커끼리 공유 가능)
+RESULT_CACHE_DISK_MAX_MB = 2048  # 디스크 tier 최대 크기
+RESULT_CACHE_TTL_SECONDS = 300  # 추천 결과 만료 (재고·인덱스 변경 반영). 탐지 결과와 쿼리 임베딩은 만료 없음
 
 # 파일 업로드 설정
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
@@ -48,5 +100,104 @@ if os.getenv("DETECTION_CONFIDENCE_THRESHOLD"):
 if os.getenv("DEFAULT_TOP_K"):
     DEFAULT_TOP_K = int(os.getenv("DEFAULT_TOP_K"))
 
+if os.getenv("MAX_TOP_K"):
+    MAX_TOP_K = int(os.getenv("MAX_TOP_K"))
+
+if os.getenv("EMBEDDING_STORE_PATH"):
+    EMBEDDING_STORE_PATH = Path(os.getenv("EMBEDDING_STORE_PATH"))
+
+if os.getenv("DETECT_RECOMMEND_MAX_DETECTIONS"):
+    DETECT_RECOMMEND_MAX_DETECTIONS = int(os.getenv("DETECT_RECOMMEND_MAX_DETECTIONS"))
+
+if os.getenv("SIMILARITY_OVERFETCH"):
+    SIMILARITY_OVERFETCH = int(os.getenv("SIMILARITY_OVERFETCH"))
+
+if os.getenv("ANN_INDEX"):
+    ANN_INDEX = os.getenv("ANN_INDEX").lower()
+
+if os.getenv("ANN_NPROBE"):
+    ANN_NPROBE = int(os.getenv("ANN_NPROBE"))
+
+if os.getenv("PQ_SUBSPACES"):
+    PQ_SUBSPACES = int(os.getenv("PQ_SUBSPACES"))
+
+if os.getenv("ANN_CANDIDATES"):
+    ANN_CANDIDATES = int(os.getenv("ANN_CANDIDATES"))
+
+if os.getenv("ANN_MIN_PRODUCTS"):
+    ANN_MIN_PRODUCTS = int(os.getenv("ANN_MIN_PRODUCTS"))
+
+if os.getenv("EMBEDDING_RELOAD_INTERVAL"):
+    EMBEDDING_RELOAD_INTERVAL = float(os.getenv("EMBEDDING_RELOAD_INTERVAL"))
+
+if os.getenv("EMBEDDING_STAGING_DIR"):
+    EMBEDDING_STAGING_DIR = Path(os.getenv("EMBEDDING_STAGING_DIR"))
+
+if os.getenv("EMBEDDING_BATCH_SIZE"):
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE"))
+
+if os.getenv("EMBEDDING_WORKERS"):
+    EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS"))
+
+if os.getenv("IMAGE_FETCHER"):
+    IMAGE_FETCHER = os.getenv("IMAGE_FETCHER").lower()
+
+if os.getenv("IMAGE_ROOT"):
+    IMAGE_ROOT = Path(os.getenv("IMAGE_ROOT"))
+
+if os.getenv("FEATURE_MAX_BATCH_SIZE"):
+    FEATURE_MAX_BATCH_SIZE = int(os.getenv("FEATURE_MAX_BATCH_SIZE"))
+
+if os.getenv("DETECTION_MAX_BATCH_SIZE"):
+    DETECTION_MAX_BATCH_SIZE = int(os.getenv("DETECTION_MAX_BATCH_SIZE"))
+
+if os.getenv("BATCH_MAX_WAIT_MS"):
+    BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS"))
+
+if os.getenv("INFERENCE_THREADS"):
+    INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS"))
+
+if os.getenv("INTRA_OP_THREADS"):
+    INTRA_OP_THREADS = int(os.getenv("INTRA_OP_THREADS"))
+
+if os.getenv("INFERENCE_WORKERS"):
+    INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS"))
+
+if os.getenv("INFERENCE_TASK_TIMEOUT"):
+    INFERENCE_TASK_TIMEOUT = float(os.getenv("INFERENCE_TASK_TIMEOUT"))
+
+if os.getenv("BLOCKING_THREADS"):
+    BLOCKING_THREADS = int(os.getenv("BLOCKING_THREADS"))
+
+if os.getenv("MAX_CONCURRENT_REQUESTS"):
+    MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS"))
+
+if os.getenv("MAX_QUEUED_REQUESTS"):
+    MAX_QUEUED_REQUESTS = int(os.getenv("MAX_QUEUED_REQUESTS"))
+
+if os.getenv("EMBEDDING_MODEL_VERSION"):
+    EMBEDDING_MODEL_VERSION = os.getenv("EMBEDDING_MODEL_VERSION")
+
+if os.getenv("EMBEDDING_DIM"):
+    EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM"))
+
+if os.getenv("MODEL_VERSION"):
+    MODEL_VERSION = os.getenv("MODEL_VERSION")
+
+if os.getenv("RESULT_CACHE_MAX_ENTRIES"):
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES"))
+
+if os.getenv("RESULT_CACHE_MAX_MB"):
+    RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB"))
+
+if os.getenv("RESULT_CACHE_DIR"):
+    RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR")
+
+if os.getenv("RESULT_CACHE_DISK_MAX_MB"):
+    RESULT_CACHE_DISK_MAX_MB = int(os.getenv("RESULT_CACHE_DISK_MAX_MB"))
+
+if os.getenv("RESULT_CACHE_TTL_SECONDS"):
+    RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS"))
+
 if os.getenv("LOG_LEVEL"):
     LOG_LEVEL = os.getenv("LOG_LEVEL")
@@ -0,0 +1,84 @@
+"""
+탐지 결과 후처리 (벡터화)
+
+배치 전체의 Detectron2 출력(이어 붙인 클래스/점수/박스 배열)을 COCO 클래스 id → 가구 카테고리
+룩업 테이블로 한 번에 마스킹하고, 정렬 한 번으로 (이미지, 신뢰도 내림차순) 순서를 만든 뒤
+이미지별 DetectionItem 리스트로 나눕니다.
+
+점수 임계값은 모델(ROI_HEADS.SCORE_THRESH_TEST)이 이미 적용했으므로 다시 보지 않습니다.
+torch에 의존하지 않아 benchmarks/detection_postprocess_bench.py에서 그대로 측정합니다.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from pydantic import TypeAdapter
+
+from models import DetectionItem
+
+NUM_COCO_CLASSES = 80
+
+# COCO 클래스 이름 → 가구 카테고리
+COCO_TO_FURNITURE = {
+    'chair': 'chair',
+    'couch': 'sofa',
+    'bed': 'bed',
+    'dining table': 'table',
+    'potted plant': 'lamp',  # 화분을 램프로 매핑
+}
+
+# 배치 전체 DetectionItem을 한 번의 검증 호출로 생성 (객체마다 생성자를 부르는 것보다 빠름)
+_DETECTION_ITEMS = TypeAdapter(List[DetectionItem])
+
+
+def build_category_lut(furniture_classes: Dict[int, str],
+                       num_classes: int = NUM_COCO_CLASSES) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    COCO 클래스 id → 가구 카테고리 번호 룩업 테이블을 만듭니다.
+
+    Args:
+        furniture_classes: 가구로 볼 COCO 클래스 id → COCO 클래스 이름
+        num_classes: 모델 클래스 수
+
+    Returns:
+        (lut, names): lut[class_id]는 names의 번호 (가구가 아니면 -1)
+    """
+    names = sorted(set(COCO_TO_FURNITURE.get(name, 'unknown') for name in furniture_classes.values()))
+    lut = np.full(num_classes, -1, dtype=np.int16)
+    for class_id, coco_name in furniture_classes.items():
+        lut[class_id] = names.index(COCO_TO_FURNITURE.get(coco_name, 'unknown'))
+    return lut, np.array(names, dtype=object)
+
+
+def postprocess_detections(pred_classes: np.ndarray, scores: np.ndarray, boxes: np.ndarray,
+                           counts: Sequence[int], lut: np.ndarray, names: np.ndarray) -> List[List[DetectionItem]]:
+    """
+    Args:
+        pred_classes: (N,) 배치 전체 인스턴스의 COCO 클래스 id
+        scores: (N,) 신뢰도
+        boxes: (N, 4) [x_min, y_min, x_max, y_max]
+        counts: 이미지별 인스턴스 수 (합 = N, 입력이 이미지 순으로 이어 붙어 있음)
+        lut, names: build_category_lut 결과
+
+    Returns:
+        List[List[DetectionItem]]: 이미지별 가구 탐지 결과 (신뢰도 내림차순)
+    """
+    n_images = len(counts)
+    image_index = np.repeat(np.arange(n_images), counts)
+    codes = lut[pred_classes]
+    keep = np.flatnonzero(codes >= 0)
+
+    # 이미지 번호 → 신뢰도 내림차순을 argsort 한 번으로: 점수는 [0, 1]이라 키 2*이미지 - 점수는
+    # 이미지별로 겹치지 않는 구간에 놓임 (stable이라 같은 점수는 모델 출력 순서 유지)
+    kept_images = image_index[keep]
+    order = keep[np.argsort(2.0 * kept_images - scores[keep], kind="stable")]
+    kept_counts = np.bincount(kept_images, minlength=n_images)
+
+    items = _DETECTION_ITEMS.validate_python([
+        {"category": category, "confidence": confidence, "bbox": bbox}
+        for category, confidence, bbox in zip(
+            names[codes[order]].tolist(), scores[order].tolist(), boxes[order].tolist()
+        )
+    ])
+    bounds = np.concatenate([[0], np.cumsum(kept_counts)]).tolist()
+    return [items[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
@@ -0,0 +1,604 @@
+"""
+상품 이미지 임베딩 저장소
+
+상품 이미지마다 L2 정규화된 특성 벡터 하나를 (n_images, dim) float32 행렬로 들고 있고,
+쿼리 벡터와의 코사인 유사도를 행렬-벡터 곱 한 번으로 계산합니다.
+
+- 행은 상품 id 순으로 정렬되어 있고 같은 상품의 이미지는 연속된 행에 모여 있습니다.
+  상품 점수는 그 상품 이미지 점수의 최댓값(np.maximum.reduceat)입니다.
+- top-k는 argpartition으로 후보만 고른 뒤 (점수 내림차순, 상품 id 오름차순)으로 정렬하므로
+  동점이 있어도 항상 같은 결과를 돌려줍니다.
+
+디스크 형식 (디렉터리):
+- vectors-NNNNNN.npy: float32 (행 수, dim) 세그먼트. np.load(mmap_mode='r')로 열기 때문에 로드는
+  파일 크기와 무관하게 즉시 끝나고, 여러 uvicorn 워커가 OS 페이지 캐시를 공유합니다.
+- products.npz: 상품 id, 카테고리, fingerprint, (세그먼트, 시작 행, 행 수) 사이드카.
+추가(append)는 새 세그먼트 하나와 사이드카만 씁니다. 기존 세그먼트는 한 번 쓰면 바뀌지 않고,
+다시 임베딩된 상품의 예전 행은 죽은 행으로 남았다가 compaction(save) 때 정리됩니다.
+
+서비스는 카테고리별 샤드(PartitionedStore)로 씁니다. 각 샤드가 위 형식의 디렉터리입니다.
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SIDECAR_NAME = "products.npz"
+MANIFEST_NAME = "shards.json"  # PartitionedStore
+SEGMENT_NAME = "vectors-{:06d}.npy"
+SEGMENT_PATTERN = re.compile(r"^vectors-(\d{6})\.npy$")
+COMPACT_DEAD_FRACTION = 0.25  # 죽은 행이 이 비율을 넘으면 append가 compaction
+COMPACT_MAX_SEGMENTS = 32  # 세그먼트가 이보다 많아지면 append가 compaction
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화 (영벡터는 그대로 둠)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """점수 내림차순 상위 k개 인덱스. 동점은 인덱스가 작은 쪽이 먼저 (결정적)
+
+    argpartition은 경계의 동점 중 아무거나 고를 수 있으므로, k번째 점수 이상인 후보를
+    모두 모은 뒤 (−점수, 인덱스)로 정렬해 자릅니다.
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        kth = np.argpartition(-scores, k - 1)[k - 1]
+        candidates = np.flatnonzero(scores >= scores[kth])
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order[:k]]
+
+
+class EmbeddingStore:
+    """상품 이미지 임베딩 세그먼트와 상품 메타데이터(id, 카테고리, fingerprint)"""
+
+    def __init__(self, product_ids: Sequence[str], offsets: np.ndarray,
+                 vectors: Union[np.ndarray, Sequence[np.ndarray]],
+                 categories: Optional[Sequence[str]] = None, fingerprints: Optional[Sequence[str]] = None,
+                 segment_ids: Optional[np.ndarray] = None, counts: Optional[np.ndarray] = None):
+        """
+        Args:
+            product_ids: 정렬된 상품 id (길이 p)
+            offsets: 상품별 첫 이미지 행 번호 (자기 세그먼트 안에서, 길이 p)
+            vectors: (n_images, dim) L2 정규화된 float32 행렬, 또는 그런 세그먼트 목록
+            categories: 상품별 카테고리 이름 (길이 p, 소문자 - from_products/append가 변환)
+            fingerprints: 상품별 이미지 목록 해시 (길이 p, 인덱서가 변경 감지에 사용)
+            segment_ids: 상품별 세그먼트 번호 (기본값: 모두 0)
+            counts: 상품별 이미지 수 (기본값: 단일 세그먼트에서 다음 상품 offset까지)
+        """
+        self.product_ids = np.asarray(product_ids, dtype=str)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        if isinstance(vectors, np.ndarray):
+            vectors = [vectors]
+        self.segments = [np.asarray(segment, dtype=np.float32) for segment in vectors]
+        self.segment_files: List[str] = []  # load/append가 채움 (디스크 세그먼트 이름)
+        self.ann = None  # attach_index로 붙인 ANN 인덱스 (ann_index.AnnIndex)
+        self.ann_candidates = 10
+        if categories is None:
+            categories = [""] * len(self.product_ids)
+        if fingerprints is None:
+            fingerprints = [""] * len(self.product_ids)
+        self.categories = np.asarray(categories, dtype=str)
+        self.fingerprints = np.asarray(fingerprints, dtype=str)
+        if segment_ids is None:
+            segment_ids = np.zeros(len(self.product_ids), dtype=np.int64)
+        self.segment_ids = np.asarray(segment_ids, dtype=np.int64)
+        if counts is None:
+            if len(self.segments) != 1:
+                raise ValueError("counts are required for multi-segment stores")
+            counts = np.diff(np.append(self.offsets, len(self.segments[0])))
+        self.counts = np.asarray(counts, dtype=np.int64)
+
+        if not (len(self.product_ids) == len(self.offsets) == len(self.categories)
+                == len(self.fingerprints) == len(self.segment_ids) == len(self.counts)):
+            raise ValueError("product_ids, offsets, categories, fingerprints, segment_ids and counts "
+                             "must have the same length")
+        if len(self.product_ids):
+            sizes = np.array([len(segment) for segment in self.segments], dtype=np.int64)
+            if (np.any(self.counts <= 0) or np.any(self.offsets < 0)
+                    or np.any(self.segment_ids < 0) or np.any(self.segment_ids >= len(sizes))
+                    or np.any(self.offsets + self.counts > sizes[self.segment_ids])):
+                raise ValueError("offsets and counts must address non-empty row ranges inside their segment")
+        self._runs = [self._segment_runs(index, len(segment)) for index, segment in enumerate(self.segments)]
+
+    def _segment_runs(self, segment_index: int, n_rows: int):
+        """세그먼트의 reduceat 경계 (상품 시작 + 죽은 행 구간 시작)와 경계별 상품 번호"""
+        members = np.flatnonzero(self.segment_ids == segment_index)
+        if not len(members):
+            return None
+        if np.any(np.diff(self.offsets[members]) < 0):
+            members = members[np.argsort(self.offsets[members], kind="stable")]
+        starts = self.offsets[members]
+        ends = starts + self.counts[members]
+        gap_starts = np.append(ends[:-1][ends[:-1] != starts[1:]], ends[-1:][ends[-1:] < n_rows])
+        if not len(gap_starts):
+            return starts, members, slice(None)  # 죽은 행이 없는 세그먼트 (대부분)
+        boundaries = np.concatenate([starts, gap_starts])
+        owners = np.concatenate([members, np.full(len(gap_starts), -1, dtype=np.int64)])
+        order = np.argsort(boundaries, kind="stable")
+        boundaries, owners = boundaries[order], owners[order]
+        live = owners >= 0
+        return boundaries, owners[live], live
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[str, str, np.ndarray]]) -> "EmbeddingStore":
+        """(상품 id, 카테고리, 이미지 벡터) 목록으로 저장소를 만듭니다. 벡터는 정규화됩니다."""
+        by_product = {}
+        for product_id, category, vector in items:
+            entry = by_product.setdefault(str(product_id), (category, []))
+            entry[1].append(np.asarray(vector, dtype=np.float32).ravel())
+        return cls.from_products(
+            (product_id, category, "", np.stack(vectors)) for product_id, (category, vectors) in by_product.items()
+        )
+
+    @classmethod
+    def from_products(cls, products: Iterable[Tuple[str, str, str, np.ndarray]]) -> "EmbeddingStore":
+        """(상품 id, 카테고리, fingerprint, (이미지 수, dim) 벡터) 목록으로 저장소를 만듭니다."""
+        products = _sorted_products(products)
+        if not products:
+            return cls.empty()
+        counts = np.array([len(vectors) for _, _, _, vectors in products], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        return cls(
+            [pid for pid, _, _, _ in products],
+            offsets,
+            normalize_rows(np.concatenate([vectors for _, _, _, vectors in products], axis=0)),
+            [(category or "").lower() for _, category, _, _ in products],
+            [fingerprint or "" for _, _, fingerprint, _ in products],
+            counts=counts
+        )
+
+    def iter_products(self) -> Iterator[Tuple[str, str, str, np.ndarray]]:
+        """상품별 (id, 카테고리, fingerprint, 이미지 벡터) - from_products의 역변환"""
+        for i, product_id in enumerate(self.product_ids):
+            segment = self.segments[self.segment_ids[i]]
+            yield (str(product_id), str(self.categories[i]), str(self.fingerprints[i]),
+                   segment[self.offsets[i]:self.offsets[i] + self.counts[i]])
+
+    @classmethod
+    def empty(cls, dim: int = 0) -> "EmbeddingStore":
+        return cls([], np.empty(0, dtype=np.int64), np.empty((0, dim), dtype=np.float32), [], [])
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+    @property
+    def dim(self) -> int:
+        return self.segments[0].shape[1]
+
+    @property
+    def n_vectors(self) -> int:
+        """살아 있는 이미지 벡터 수"""
+        return int(self.counts.sum())
+
+    @property
+    def dead_rows(self) -> int:
+        """다시 임베딩되거나 삭제된 상품이 남긴 행 수 (compaction 대상)"""
+        return sum(len(segment) for segment in self.segments) - self.n_vectors
+
+    def product_scores(self, query: np.ndarray) -> np.ndarray:
+        """모든 상품에 대한 코사인 유사도 (상품별 이미지 최댓값)"""
+        query = normalize_rows(np.asarray(query, dtype=np.float32).ravel())
+        if query.shape[0] != self.dim:
+            raise ValueError(f"Query dimension {query.shape[0]} does not match store dimension {self.dim}")
+        scores = np.empty(len(self), dtype=np.float32)
+        for segment, runs in zip(self.segments, self._runs):
+            if runs is None:
+                continue
+            boundaries, owners, live = runs
+            scores[owners] = np.maximum.reduceat(segment @ query, boundaries)[live]
+        return scores
+
+    def search(self, query: np.ndarray, top_k: int = 5,
+               category: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        쿼리 벡터와 가장 비슷한 상품을 찾습니다.
+
+        Args:
+            query: 쿼리 특성 벡터 (dim,)
+            top_k: 반환할 상위 개수
+            category: 특정 카테고리로 제한 (대소문자 무시)
+
+        Returns:
+            List[Tuple[str, float]]: (상품 id, 유사도) 목록, 유사도 내림차순
+        """
+        if len(self) == 0:
+            return []
+        if self.ann is not None:
+            results = self._search_ann(query, top_k, category)
+            if results is not None:
+                return results
+        scores = self.product_scores(query)
+        candidates = None
+        if category:
+            candidates = np.flatnonzero(self.categories == category.lower())
+            scores = scores[candidates]
+        picked = top_k_indices(scores, top_k)
+        rows = candidates[picked] if candidates is not None else picked
+        return [(str(self.product_ids[row]), float(scores[i])) for row, i in zip(rows, picked)]
+
+    def attach_index(self, index, candidates: int = 10) -> None:
+        """
+        ANN 인덱스를 붙입니다. 이후 search는 인덱스가 고른 후보 상품만 정확한 점수로 다시 매깁니다.
+
+        Args:
+            index: 상품 id를 라벨로 쓰는 ann_index.AnnIndex (None이면 떼어냄)
+            candidates: 결과 1개당 인덱스에 요청할 이미지 후보 수
+        """
+        self.ann = index
+        self.ann_candidates = candidates
+
+    def _search_ann(self, query: np.ndarray, top_k: int,
+                    category: Optional[str]) -> Optional[List[Tuple[str, float]]]:
+        """ANN 후보 재순위. 조건에 맞는 후보가 top_k보다 적으면 None (전수 검색으로 대체)"""
+        labels, _ = self.ann.search(query, top_k * self.ann_candidates)
+        rows = np.searchsorted(self.product_ids, labels)
+        rows = np.unique(rows[(rows < len(self)) & (self.product_ids[np.minimum(rows, len(self) - 1)] == labels)])
+        if category:
+            rows = rows[self.categories[rows] == category.lower()]
+        if len(rows) < top_k:
+            return None
+        query = normalize_rows(np.asarray(query, dtype=np.float32).ravel())
+        scores = np.array([
+            (self.segments[self.segment_ids[row]][self.offsets[row]:self.offsets[row] + self.counts[row]] @ query).max()
+            for row in rows
+        ], dtype=np.float32)
+        picked = top_k_indices(scores, top_k)
+        return [(str(self.product_ids[rows[i]]), float(scores[i])) for i in picked]
+
+    # ---- 디스크 형식 ----
+
+    @staticmethod
+    def exists(path: Union[str, Path]) -> bool:
+        return (Path(path) / SIDECAR_NAME).exists()
+
+    def save(self, path: Union[str, Path]) -> None:
+        """살아 있는 행만 새 세그먼트 하나로 다시 쓰고 (compaction) 나머지 세그먼트를 지웁니다"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        files = []
+        if self.n_vectors:
+            files.append(_write_segment(path, (vectors for *_, vectors in self.iter_products()),
+                                        self.n_vectors, self.dim))
+        offsets = np.concatenate([[0], np.cumsum(self.counts)[:-1]]).astype(np.int64)
+        self._commit(path, files, np.zeros(len(self), dtype=np.int64), offsets)
+        logger.info(f"Saved {len(self)} products / {self.n_vectors} image vectors to {path}")
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "EmbeddingStore":
+        """사이드카만 메모리로 읽고 세그먼트는 mmap으로 엽니다 (읽기 전용)"""
+        path = Path(path)
+        with np.load(path / SIDECAR_NAME, allow_pickle=False) as data:
+            sidecar = {name: data[name] for name in data.files}
+        files = [str(name) for name in sidecar["segment_files"]]
+        segments = [np.load(path / name, mmap_mode="r") for name in files]
+        store = cls(
+            sidecar["product_ids"], sidecar["offsets"],
+            segments or np.empty((0, int(sidecar["dim"])), dtype=np.float32),
+            sidecar["categories"], sidecar["fingerprints"],
+            segment_ids=sidecar["segment_ids"], counts=sidecar["counts"]
+        )
+        store.segment_files = files
+        return store
+
+    @classmethod
+    def append(cls, path: Union[str, Path], products: Iterable[Tuple[str, str, str, np.ndarray]],
+               remove: Iterable[str] = ()) -> "EmbeddingStore":
+        """
+        상품을 추가/교체하고 remove의 상품을 뺍니다. 새 벡터는 새 세그먼트 하나로만 쓰입니다.
+
+        Args:
+            path: 저장소 디렉터리 (없으면 새로 만듦)
+            products: (상품 id, 카테고리, fingerprint, (이미지 수, dim) 벡터) 목록
+            remove: 저장소에서 뺄 상품 id
+
+        Returns:
+            EmbeddingStore: 갱신된 저장소 (mmap)
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        current = cls.load(path) if cls.exists(path) else None
+        products = _sorted_products(products)
+        dim = products[0][3].shape[1] if products else (current.dim if current is not None else 0)
+        if current is not None and len(current) and current.dim != dim:
+            raise ValueError(f"Vector dimension {dim} does not match store dimension {current.dim}")
+
+        files, segments = [], []
+        table = {name: [] for name in ("ids", "categories", "fingerprints", "segment_ids", "offsets", "counts")}
+        if current is not None:
+            files, segments = list(current.segment_files), list(current.segments)
+            replaced = {pid for pid, _, _, _ in products} | {str(pid) for pid in remove}
+            keep = ~np.isin(current.product_ids, list(replaced)) if replaced else np.ones(len(current), bool)
+            for name, column in (("ids", current.product_ids), ("categories", current.categories),
+                                 ("fingerprints", current.fingerprints), ("segment_ids", current.segment_ids),
+                                 ("offsets", current.offsets), ("counts", current.counts)):
+                table[name].append(column[keep])
+
+        n_rows = sum(len(vectors) for _, _, _, vectors in products)
+        if n_rows:
+            files.append(_write_segment(path, (normalize_rows(vectors) for *_, vectors in products), n_rows, dim))
+            segments.append(np.load(path / files[-1], mmap_mode="r"))
+            counts = np.array([len(vectors) for _, _, _, vectors in products], dtype=np.int64)
+            table["ids"].append(np.array([pid for pid, _, _, _ in products], dtype=str))
+            table["categories"].append(np.array([(category or "").lower() for _, category, _, _ in products], dtype=str))
+            table["fingerprints"].append(np.array([fp or "" for _, _, fp, _ in products], dtype=str))
+            table["segment_ids"].append(np.full(len(products), len(files) - 1, dtype=np.int64))
+            table["offsets"].append(np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64))
+            table["counts"].append(counts)
+
+        columns = {name: (np.concatenate(parts) if parts else np.empty(0)) for name, parts in table.items()}
+        # 살아 있는 상품이 없는 세그먼트는 목록에서 빼고 번호를 다시 매김
+        used = np.unique(columns["segment_ids"]).astype(np.int64)
+        files = [files[i] for i in used]
+        segments = [segments[i] for i in used] or [np.empty((0, dim), dtype=np.float32)]
+        order = np.argsort(columns["ids"], kind="stable")
+        store = cls(
+            columns["ids"][order], columns["offsets"][order], segments,
+            columns["categories"][order], columns["fingerprints"][order],
+            segment_ids=np.searchsorted(used, columns["segment_ids"][order]),
+            counts=columns["counts"][order]
+        )
+
+        total_rows = store.n_vectors + store.dead_rows
+        if store.dead_rows > COMPACT_DEAD_FRACTION * total_rows or len(files) > COMPACT_MAX_SEGMENTS:
+            store.save(path)
+            return cls.load(path)
+        store._commit(path, files, store.segment_ids, store.offsets)
+        store.segment_files = files
+        logger.info(f"Appended {len(products)} products to {path} ({len(store)} products, {len(files)} segments)")
+        return store
+
+    def _commit(self, path: Path, files: List[str], segment_ids: np.ndarray, offsets: np.ndarray) -> None:
+        """사이드카를 원자적으로 교체한 뒤 참조되지 않는 세그먼트를 지웁니다"""
+        tmp_path = path / (SIDECAR_NAME + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, product_ids=self.product_ids, categories=self.categories, fingerprints=self.fingerprints,
+                     segment_ids=segment_ids, offsets=offsets, counts=self.counts,
+                     segment_files=np.asarray(files, dtype=str), dim=np.int64(self.dim))
+        os.replace(tmp_path, path / SIDECAR_NAME)
+        for name in _segment_numbers(path).values():
+            if name not in files:
+                (path / name).unlink(missing_ok=True)  # 열린 mmap은 POSIX에서 그대로 유효
+
+
+def _sorted_products(products: Iterable[Tuple[str, str, str, np.ndarray]]) -> List[Tuple[str, str, str, np.ndarray]]:
+    return sorted(((str(pid), category, fingerprint, np.atleast_2d(np.asarray(vectors, dtype=np.float32)))
+                   for pid, category, fingerprint, vectors in products), key=lambda p: p[0])
+
+
+def _segment_numbers(path: Path) -> Dict[int, str]:
+    matches = (SEGMENT_PATTERN.match(entry.name) for entry in path.iterdir())
+    return {int(match.group(1)): match.group(0) for match in matches if match}
+
+
+def _write_segment(path: Path, blocks: Iterable[np.ndarray], n_rows: int, dim: int) -> str:
+    """행 블록을 새 세그먼트 파일 하나로 씁니다 (임시 파일 → 교체). 파일 이름을 반환"""
+    name = SEGMENT_NAME.format(max(_segment_numbers(path), default=-1) + 1)
+    tmp_path = path / (name + ".tmp")
+    out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(n_rows, dim))
+    row = 0
+    for block in blocks:
+        out[row:row + len(block)] = block
+        row += len(block)
+    out.flush()
+    del out
+    os.replace(tmp_path, path / name)
+    return name
+
+
+class PartitionedStore:
+    """
+    카테고리별 EmbeddingStore 샤드 묶음
+
+    디렉터리: shards.json ({카테고리: 샤드 디렉터리}, 임베딩 모델 버전, 차원) + shard-NNN/ (각각 EmbeddingStore,
+    ANN 인덱스는 shard-NNN/ann). 모델 버전이나 차원이 다른 벡터는 섞지 않습니다 (append에서 ValueError).
+    카테고리 필터 검색은 그 샤드만 훑고, 전체 검색은 샤드별 top-k를 (점수 내림차순, 상품 id 오름차순)으로
+    힙 병합하므로 한 저장소에서 전수 검색한 결과와 같습니다.
+    """
+
+    def __init__(self, shards: Optional[Dict[str, EmbeddingStore]] = None,
+                 shard_dirs: Optional[Dict[str, str]] = None, model_version: Optional[str] = None):
+        self.shards: Dict[str, EmbeddingStore] = dict(shards or {})
+        self.shard_dirs: Dict[str, str] = dict(shard_dirs or {})
+        self.model_version = model_version
+
+    @classmethod
+    def from_products(cls, products: Iterable[Tuple[str, str, str, np.ndarray]],
+                      model_version: Optional[str] = None) -> "PartitionedStore":
+        """(상품 id, 카테고리, fingerprint, 벡터) 목록을 카테고리별 샤드로 나눕니다 (메모리)"""
+        by_category: Dict[str, list] = {}
+        for product in products:
+            by_category.setdefault((product[1] or "").lower(), []).append(product)
+        store = cls({category: EmbeddingStore.from_products(group) for category, group in by_category.items()},
+                    model_version=model_version)
+        store._check_dims()
+        return store
+
+    @classmethod
+    def empty(cls) -> "PartitionedStore":
+        return cls()
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards.values())
+
+    @property
+    def n_vectors(self) -> int:
+        return sum(shard.n_vectors for shard in self.shards.values())
+
+    @property
+    def dim(self) -> int:
+        """벡터 차원, 비어 있으면 0"""
+        return next((shard.dim for shard in self.shards.values() if len(shard)), 0)
+
+    def _check_dims(self) -> None:
+        dims = {shard.dim for shard in self.shards.values() if len(shard)}
+        if len(dims) > 1:
+            raise ValueError(f"Category shards have different embedding dimensions: {sorted(dims)}")
+
+    def iter_products(self) -> Iterator[Tuple[str, str, str, np.ndarray]]:
+        for category in sorted(self.shards):
+            yield from self.shards[category].iter_products()
+
+    def product_index(self) -> Dict[str, Tuple[str, str]]:
+        """상품 id → (카테고리, fingerprint)"""
+        return {
+            product_id: (category, fingerprint)
+            for category, shard in self.shards.items()
+            for product_id, fingerprint in zip(shard.product_ids.tolist(), shard.fingerprints.tolist())
+        }
+
+    def product_vectors(self, category: str, product_id: str) -> np.ndarray:
+        shard = self.shards[category]
+        row = int(np.searchsorted(shard.product_ids, product_id))
+        return shard.segments[shard.segment_ids[row]][shard.offsets[row]:shard.offsets[row] + shard.counts[row]]
+
+    def search(self, query: np.ndarray, top_k: int = 5,
+               category: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        쿼리 벡터와 가장 비슷한 상품을 찾습니다.
+
+        Args:
+            query: 쿼리 특성 벡터 (dim,)
+            top_k: 반환할 상위 개수
+            category: 이 카테고리 샤드만 검색 (대소문자 무시)
+
+        Returns:
+            List[Tuple[str, float]]: (상품 id, 유사도) 목록, 유사도 내림차순
+        """
+        if category:
+            shard = self.shards.get(category.lower())
+            return shard.search(query, top_k) if shard is not None else []
+        per_shard = [shard.search(query, top_k) for shard in self.shards.values()]
+        return list(itertools.islice(heapq.merge(*per_shard, key=lambda result: (-result[1], result[0])), top_k))
+
+    # ---- 디스크 형식 ----
+
+    @staticmethod
+    def exists(path: Union[str, Path]) -> bool:
+        return (Path(path) / MANIFEST_NAME).exists()
+
+    @staticmethod
+    def version(path: Union[str, Path]) -> Optional[int]:
+        """매니페스트 mtime (ns). 저장소가 바뀌었는지 확인하는 용도, 없으면 None"""
+        try:
+            return (Path(path) / MANIFEST_NAME).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "PartitionedStore":
+        path = Path(path)
+        with open(path / MANIFEST_NAME) as f:
+            manifest = json.load(f)
+        shard_dirs = manifest["shards"]
+        # 버전이 기록되지 않은 예전 저장소는 None - 어떤 모델 버전과도 맞지 않으므로 다시 만들어야 함
+        return cls({category: EmbeddingStore.load(path / name) for category, name in shard_dirs.items()}, shard_dirs,
+                   manifest.get("model_version"))
+
+    @staticmethod
+    def read_model_version(path: Union[str, Path]) -> Optional[str]:
+        """샤드를 열지 않고 매니페스트의 임베딩 모델 버전만 읽습니다 (저장소나 버전이 없으면 None)"""
+        try:
+            with open(Path(path) / MANIFEST_NAME) as f:
+                return json.load(f).get("model_version")
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def append(cls, path: Union[str, Path], products: Iterable[Tuple[str, str, str, np.ndarray]],
+               remove: Iterable[str] = (), model_version: Optional[str] = None) -> "PartitionedStore":
+        """
+        상품을 카테고리 샤드에 추가/교체하고 remove의 상품을 뺍니다 (EmbeddingStore.append).
+        카테고리가 바뀐 상품은 예전 샤드에서 빠집니다. 비게 된 샤드는 지웁니다.
+
+        Raises:
+            ValueError: 기존 저장소와 model_version이 다르거나 벡터 차원이 다를 때 (새 카테고리 샤드 포함)
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        current = cls.load(path) if cls.exists(path) else cls(model_version=model_version)
+        if model_version is not None and current.model_version != model_version:
+            raise ValueError(f"Store at {path} was built with embedding model {current.model_version}, "
+                             f"not {model_version}; rebuild it with a full run")
+        by_category: Dict[str, list] = {}
+        for product in products:
+            by_category.setdefault((product[1] or "").lower(), []).append(product)
+        dim = current.dim
+        for group in by_category.values():
+            for product in group:
+                vectors = np.asarray(product[3])
+                if vectors.size and dim and vectors.shape[-1] != dim:
+                    raise ValueError(f"Vector dimension {vectors.shape[-1]} does not match store dimension {dim}")
+                dim = dim or (vectors.shape[-1] if vectors.size else 0)
+        leaving = {str(product_id) for product_id in remove} | {
+            product[0] for group in by_category.values() for product in group
+        }
+        located = {product_id: category for product_id, (category, _) in current.product_index().items()
+                   if product_id in leaving}
+
+        shards, shard_dirs = dict(current.shards), dict(current.shard_dirs)
+        for category in sorted(set(by_category) | set(located.values())):
+            group = by_category.get(category, [])
+            staying = {product[0] for product in group}
+            shard_remove = [pid for pid, located_in in located.items() if located_in == category and pid not in staying]
+            if category not in shard_dirs:
+                shard_dirs[category] = _next_shard_dir(path, shard_dirs.values())
+            shards[category] = EmbeddingStore.append(path / shard_dirs[category], group, remove=shard_remove)
+
+        emptied = [category for category, shard in shards.items() if len(shard) == 0]
+        for category in emptied:
+            del shards[category]
+        store = cls(shards, {category: shard_dirs[category] for category in shards}, current.model_version)
+        store._commit(path)
+        return store
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        모든 샤드를 compaction해 path에 씁니다.
+        샤드는 path에 없던 새 디렉터리에 쓰고 매니페스트 교체로 한 번에 바꾸므로,
+        path가 서비스 중인 저장소여도 기존 샤드(다른 프로세스가 mmap 중)는 덮어쓰지 않습니다.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        shard_dirs = {}
+        for category in sorted(self.shards):
+            shard_dirs[category] = _next_shard_dir(path, shard_dirs.values())
+            self.shards[category].save(path / shard_dirs[category])
+        PartitionedStore(self.shards, shard_dirs, self.model_version)._commit(path)
+
+    def _commit(self, path: Path) -> None:
+        """매니페스트를 원자적으로 교체한 뒤 참조되지 않는 샤드 디렉터리를 지웁니다"""
+        tmp_path = path / (MANIFEST_NAME + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"shards": self.shard_dirs, "model_version": self.model_version, "dim": self.dim},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, path / MANIFEST_NAME)
+        for entry in path.glob("shard-*"):
+            if entry.is_dir() and entry.name not in self.shard_dirs.values():
+                shutil.rmtree(entry, ignore_errors=True)
+
+
+def _next_shard_dir(path: Path, taken: Iterable[str]) -> str:
+    used = set(taken) | {entry.name for entry in path.glob("shard-*")}
+    number = 0
+    while f"shard-{number:03d}" in used:
+        number += 1
+    return f"shard-{number:03d}"
@@ -0,0 +1,134 @@
+"""
+이벤트 루프 밖에서 도는 작업용 executor와 요청 동시성 제한
+
+- inference executor: 모델 배치(Detectron2 / VGG16)를 돌리는 스레드 INFERENCE_THREADS개.
+  PyTorch/TensorFlow가 각자 코어 수만큼 intra-op 스레드를 띄우면 서로 코어를 빼앗으므로
+  configure_intra_op_threads로 (코어 수 / INFERENCE_THREADS)개씩 나눠 줍니다.
+- blocking executor: 업로드 디코딩, 동기 SQLAlchemy 쿼리 같은 짧은 블로킹 작업 (BLOCKING_THREADS개)
+- RequestLimiter: 추론 엔드포인트의 동시 처리 수 제한. 대기열까지 차면 바로 Overloaded를 던져
+  (main에서 503) 요청이 무한히 쌓이지 않게 하고, /health 같은 가벼운 요청은 제한 없이 바로 응답합니다.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from config import BLOCKING_THREADS, INFERENCE_THREADS, INTRA_OP_THREADS
+
+logger = logging.getLogger(__name__)
+
+_inference_executor: Optional[ThreadPoolExecutor] = None
+_blocking_executor: Optional[ThreadPoolExecutor] = None
+
+
+class Overloaded(Exception):
+    """동시 처리 수와 대기열이 모두 찬 상태"""
+
+
+def inference_executor() -> ThreadPoolExecutor:
+    global _inference_executor
+    if _inference_executor is None:
+        _inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix="inference")
+    return _inference_executor
+
+
+def blocking_executor() -> ThreadPoolExecutor:
+    global _blocking_executor
+    if _blocking_executor is None:
+        _blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_THREADS, thread_name_prefix="blocking")
+    return _blocking_executor
+
+
+def shutdown_executors() -> None:
+    global _inference_executor, _blocking_executor
+    for executor in (_inference_executor, _blocking_executor):
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    _inference_executor = _blocking_executor = None
+
+
+async def run_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """블로킹 함수를 blocking executor에서 실행하고 결과를 기다립니다"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_executor(), functools.partial(fn, *args, **kwargs))
+
+
+def intra_op_threads(parallelism: int = INFERENCE_THREADS) -> int:
+    """
+    추론 스레드(또는 워커 프로세스) 하나가 쓸 연산 스레드 수
+    (INTRA_OP_THREADS, 0이면 코어 수 / 동시에 추론하는 스레드·프로세스 수)
+    """
+    return INTRA_OP_THREADS or max(1, (os.cpu_count() or 1) // parallelism)
+
+
+def configure_intra_op_threads(threads: Optional[int] = None) -> int:
+    """
+    PyTorch / TensorFlow 연산 스레드 수를 맞춥니다. 모델을 만들기 전에 호출해야 TensorFlow에 적용됩니다.
+    설치되지 않은 프레임워크는 건너뜁니다.
+
+    Args:
+        threads: 연산 스레드 수 (기본값: intra_op_threads(), 추론 워커 프로세스는 코어 수 / 워커 수)
+    """
+    threads = threads or intra_op_threads()
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    try:
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    except ImportError:
+        pass
+    except RuntimeError as e:  # TensorFlow가 이미 초기화됨
+        logger.warning(f"Could not set TensorFlow thread counts: {str(e)}")
+    logger.info(f"Using {threads} intra-op threads")
+    return threads
+
+
+class RequestLimiter:
+    """
+    동시에 처리할 요청 수(max_concurrent)와 기다릴 수 있는 요청 수(max_queued)를 제한합니다.
+
+        async with limiter:
+            ...
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    async def __aenter__(self) -> "RequestLimiter":
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        if self.active >= self.max_concurrent and self.waiting >= self.max_queued:
+            self.rejected += 1
+            raise Overloaded(f"{self.active} requests in progress and {self.waiting} queued")
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
@@ -8,14 +8,17 @@ from PIL import Image
 import io
 
 from models import DetectionItem
+from detection_postprocess import build_category_lut, postprocess_detections
 
 logger = logging.getLogger(__name__)
 
 # Detectron2 import with fallback
 try:
     from detectron2 import model_zoo
-    from detectron2.engine import DefaultPredictor
+    from detectron2.checkpoint import DetectionCheckpointer
     from detectron2.config import get_cfg
+    from detectron2.modeling import build_model
+    import detectron2.data.transforms as T
     from detectron2.utils.visualizer import Visualizer
     from detectron2.data import MetadataCatalog
     DETECTRON2_AVAILABLE = True
@@ -71,8 +74,15 @@ class FurnitureDetector:
             # COCO 데이터셋의 80개 클래스 사용 (가구 관련 클래스 포함)
             self.cfg.MODEL.ROI_HEADS.NUM_CLASSES = 80
             
-            # 예측기 초기화
-            self.predictor = DefaultPredictor(self.cfg)
+            # 모델 초기화 (DefaultPredictor는 이미지 1장씩만 받으므로 배치 추론용으로 직접 구성)
+            self.model = build_model(self.cfg)
+            self.model.eval()
+            DetectionCheckpointer(self.model).load(self.cfg.MODEL.WEIGHTS)
+            # 테스트 시 리사이즈 (DefaultPredictor와 같은 짧은 변 기준 리사이즈)
+            self.resize = T.ResizeShortestEdge(
+                [self.cfg.INPUT.MIN_SIZE_TEST, self.cfg.INPUT.MIN_SIZE_TEST], self.cfg.INPUT.MAX_SIZE_TEST
+            )
+            self.input_format = self.cfg.INPUT.FORMAT
             
             # COCO 클래스 매핑 (가구 관련 클래스들)
             self.coco_class_mapping = {
@@ -103,11 +113,15 @@ class FurnitureDetector:
                 60: 'dining table',  # 식탁
                 58: 'potted plant'   # 화분 (램프 대신)
             }
+            # COCO 클래스 id → 가구 카테고리 룩업 테이블 (배치 전체를 한 번에 마스킹)
+            self.category_lut, self.category_names = build_category_lut(
+                self.furniture_classes, self.cfg.MODEL.ROI_HEADS.NUM_CLASSES
+            )
             
             logger.info(f"FurnitureDetector initialized with Detectron2, device: {self.cfg.MODEL.DEVICE}")
         else:
             # Fallback: 간단한 객체 탐지 (OpenCV 기반)
-            self.predictor = None
+            self.model = None
             logger.info("FurnitureDetector initialized with fallback method (OpenCV)")
     
     def detect_furniture(self, image: np.ndarray) -> List[DetectionItem]:
@@ -120,87 +134,84 @@ class FurnitureDetector:
         Returns:
             List[DetectionItem]: 탐지된 가구 객체들의 정보
         """
+        return self.detect_furniture_batch([image])[0]
+
+    def detect_furniture_batch(self, images: List[np.ndarray]) -> List[List[DetectionItem]]:
+        """
+        여러 이미지에서 가구 객체를 탐지합니다 (마이크로배칭 진입점).
+
+        Args:
+            images: 입력 이미지 리스트 (BGR 형식)
+
+        Returns:
+            List[List[DetectionItem]]: 이미지별 탐지 결과 (입력 순서)
+        """
         try:
-            if DETECTRON2_AVAILABLE and self.predictor is not None:
-                # Detectron2를 사용한 객체 탐지
-                outputs = self.predictor(image)
-                detections = self._parse_detections(outputs, image)
+            if DETECTRON2_AVAILABLE and self.model is not None:
+                # Detectron2 배치 추론 (forward pass 한 번)
+                inputs = [self._prepare_input(image) for image in images]
+                with torch.inference_mode():
+                    outputs = self.model(inputs)
+                detections = self._parse_detections_batch(outputs)
             else:
                 # Fallback: 간단한 객체 탐지
-                detections = self._fallback_detection(image)
+                detections = [self._fallback_detection(image) for image in images]
             
-            logger.info(f"Detected {len(detections)} furniture items")
+            logger.info(f"Detected {sum(map(len, detections))} furniture items in {len(images)} images")
             return detections
             
         except Exception as e:
             logger.error(f"Detection failed: {str(e)}")
             raise e
-    
-    def _parse_detections(self, outputs: Dict, image: np.ndarray) -> List[DetectionItem]:
+
+    def _prepare_input(self, image: np.ndarray) -> Dict[str, Any]:
         """
-        Detectron2 출력을 파싱하여 DetectionItem 리스트로 변환합니다.
+        BGR 이미지 → Detectron2 모델 입력 (테스트 시 리사이즈 적용, CHW 텐서)
         
         Args:
-            outputs: Detectron2 모델 출력
-            image: 원본 이미지
+            image: 입력 이미지 (BGR 형식)
             
         Returns:
-            List[DetectionItem]: 파싱된 탐지 결과
+            Dict: {"image", "height", "width"} - height/width는 원본 크기 (박스가 원본 좌표로 복원됨)
         """
-        detections = []
-        
-        instances = outputs["instances"]
-        if len(instances) == 0:
-            return detections
-        
-        # 탐지된 객체들의 정보 추출
-        pred_classes = instances.pred_classes.cpu().numpy()
-        pred_boxes = instances.pred_boxes.tensor.cpu().numpy()
-        pred_scores = instances.scores.cpu().numpy()
+        height, width = image.shape[:2]
+        if self.input_format == "RGB":
+            image = image[:, :, ::-1]
+        resized = self.resize.get_transform(image).apply_image(image)
+        # uint8 그대로 넘기면 모델 전처리(정규화)에서 float로 바뀜 - float32 복사본을 따로 만들지 않음
+        tensor = torch.as_tensor(np.ascontiguousarray(resized.transpose(2, 0, 1)))
+        return {"image": tensor, "height": height, "width": width}
+
+    def _parse_detections_batch(self, outputs: List[Dict]) -> List[List[DetectionItem]]:
+        """
+        배치 전체의 Detectron2 출력을 이미지별 DetectionItem 리스트로 변환합니다.
         
-        for i in range(len(instances)):
-            # 신뢰도가 임계값 이상인 경우만 처리
-            if pred_scores[i] >= self.confidence_threshold:
-                class_id = pred_classes[i]
-                confidence = float(pred_scores[i])
-                bbox = pred_boxes[i].tolist()  # [x_min, y_min, x_max, y_max]
-                
-                # 가구 관련 클래스인지 확인
-                if class_id in self.furniture_classes:
-                    # COCO 클래스를 가구 클래스로 매핑
-                    coco_category = self.furniture_classes[class_id]
-                    
-                    # 가구 카테고리 매핑
-                    if coco_category == 'chair':
-                        category = 'chair'
-                    elif coco_category == 'couch':
-                        category = 'sofa'
-                    elif coco_category == 'bed':
-                        category = 'bed'
-                    elif coco_category == 'dining table':
-                        category = 'table'
-                    elif coco_category == 'potted plant':
-                        category = 'lamp'  # 화분을 램프로 매핑
-                    else:
-                        category = 'unknown'
-                    
-                    # DetectionItem 생성
-                    detection = DetectionItem(
-                        category=category,
-                        confidence=confidence,
-                        bbox=bbox
-                    )
-                    
-                    detections.append(detection)
+        Args:
+            outputs: 이미지별 Detectron2 모델 출력
+            
+        Returns:
+            List[List[DetectionItem]]: 이미지별 탐지 결과 (신뢰도 내림차순)
+        """
+        instances = [output["instances"] for output in outputs]
+        counts = [len(instance) for instance in instances]
+        if sum(counts) == 0:
+            return [[] for _ in outputs]
         
-        # 신뢰도 순으로 정렬
-        detections.sort(key=lambda x: x.confidence, reverse=True)
+        # 배치 전체 인스턴스를 이어 붙여 CPU로 한 번에 복사 (이미지당 최대 DETECTIONS_PER_IMAGE개라 작음)
+        pred_classes = torch.cat([instance.pred_classes for instance in instances]).cpu().numpy()
+        pred_scores = torch.cat([instance.scores for instance in instances]).cpu().numpy()
+        pred_boxes = torch.cat([instance.pred_boxes.tensor for instance in instances]).cpu().numpy()
         
-        return detections
+        # 룩업 테이블 마스킹 + 정렬 한 번 (점수 임계값은 SCORE_THRESH_TEST로 모델이 이미 적용)
+        return postprocess_detections(
+            pred_classes, pred_scores, pred_boxes, counts, self.category_lut, self.category_names
+        )
     
-    def crop_detected_furniture(self, image: np.ndarray, detections: List[DetectionItem]) -> List[np.ndarray]:
+    @staticmethod
+    def crop_detected_furniture(image: np.ndarray, detections: List[DetectionItem]) -> List[np.ndarray]:
         """
-        탐지된 가구 객체들을 크롭합니다.
+        탐지된 가구 객체들을 크롭합니다. 복사하지 않고 원본 이미지의 슬라이스 뷰를 돌려주며,
+        모델 없이 호출할 수 있습니다 (FurnitureDetector.crop_detected_furniture(image, detections)).
         
         Args:
             image: 원본 이미지
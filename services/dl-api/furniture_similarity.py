@@ -3,37 +3,112 @@ import numpy as np
 import tensorflow as tf
 from tensorflow.keras.models import Model
 from tensorflow.keras.applications import VGG16
-import pandas as pd
 import logging
 from typing import List, Dict, Any, Optional
 import os
-import pickle
-from scipy.spatial.distance import cosine
+from pathlib import Path
+from sqlalchemy import bindparam, text
 from sqlalchemy.orm import Session
 
 from models import FurnitureItem
+from config import (
+    ANN_CANDIDATES, ANN_INDEX, ANN_MIN_PRODUCTS, ANN_NPROBE, DETECTION_CATEGORY_MAP, EMBEDDING_DIM,
+    EMBEDDING_MODEL_VERSION, EMBEDDING_STORE_PATH, SIMILARITY_OVERFETCH
+)
+from ann_index import IVFIndex, load_ann_index
+from embedding_store import PartitionedStore, normalize_rows
+from image_fetcher import image_urls
 
 logger = logging.getLogger(__name__)
 
+def shard_category(category: Optional[str]) -> Optional[str]:
+    """요청 카테고리(탐지 클래스 또는 crud-api 카테고리 이름) → 임베딩 샤드 이름"""
+    if not category:
+        return None
+    category = category.strip().lower()
+    return DETECTION_CATEGORY_MAP.get(category, category)
+
+
 class FurnitureSimilarity:
     """가구 유사도 검색을 위한 VGG16 기반 클래스"""
     
-    def __init__(self, model_path: str = None, input_size: tuple = (224, 224)):
+    def __init__(self, model_path: str = None, input_size: tuple = (224, 224),
+                 embedding_store_path: str = None, with_embeddings: bool = True, with_model: bool = True):
         """
         FurnitureSimilarity 초기화
         
         Args:
             model_path: 사전 학습된 모델 경로
             input_size: 입력 이미지 크기
+            embedding_store_path: 상품 이미지 임베딩 파일 경로 (기본값: config.EMBEDDING_STORE_PATH)
+            with_embeddings: False면 특성 추출만 사용 (인덱서 워커)
+            with_model: False면 임베딩 검색만 사용 (특성 추출은 추론 워커 프로세스가 담당)
         """
         self.input_size = input_size
         self.feature_extractor = None
+        self.embedding_store = PartitionedStore.empty()
+        self.embedding_store_path = None
+        self.embedding_store_version = None
         
         # 모델 로드
-        self._load_model(model_path)
+        if with_model:
+            self._load_model(model_path)
+        
+        # 상품 임베딩 로드
+        if with_embeddings:
+            self.load_embeddings(embedding_store_path or EMBEDDING_STORE_PATH)
         
         logger.info("FurnitureSimilarity initialized successfully")
     
+    def load_embeddings(self, path) -> None:
+        """
+        상품 이미지 임베딩 저장소를 (다시) 로드합니다.
+        
+        Args:
+            path: PartitionedStore 디렉터리 (세그먼트는 mmap으로 열려 워커 간 페이지 캐시를 공유)
+        """
+        # 저장소가 아직 없어도 경로를 기억해 두면 인덱서가 처음 만든 뒤 reload_embeddings_if_changed로 로드됨
+        self.embedding_store_path = Path(path)
+        version = PartitionedStore.version(path)
+        if version is None:
+            logger.warning(f"Embedding store not found at {path}; recommendations will be empty")
+            return
+        store = PartitionedStore.load(path)
+        if store.model_version != EMBEDDING_MODEL_VERSION or store.dim not in (0, EMBEDDING_DIM):
+            # 다른 모델로 만든 벡터는 쿼리 벡터와 비교할 수 없음 - 인덱서가 다시 만들 때까지 이전 저장소 유지
+            logger.error(f"Embedding store at {path} was built with {store.model_version} ({store.dim}-d), "
+                         f"expected {EMBEDDING_MODEL_VERSION} ({EMBEDDING_DIM}-d); ignoring it")
+            self.embedding_store_version = version  # 인덱서가 다시 쓸 때까지 재시도하지 않음
+            return
+        if ANN_INDEX != "none":
+            for category, shard in store.shards.items():
+                if len(shard) < ANN_MIN_PRODUCTS:
+                    continue
+                index = load_ann_index(Path(path) / store.shard_dirs[category] / "ann")
+                if index is not None:
+                    if isinstance(index, IVFIndex):
+                        index.nprobe = ANN_NPROBE
+                    shard.attach_index(index, candidates=ANN_CANDIDATES)
+        self.embedding_store = store
+        self.embedding_store_version = version
+        logger.info(f"Loaded embeddings for {len(store)} products in {len(store.shards)} category shards from {path}")
+    
+    def reload_embeddings_if_changed(self) -> bool:
+        """
+        인덱서가 저장소를 갱신했으면(shards.json mtime 변경) 다시 로드합니다.
+        새 저장소를 다 읽은 뒤 참조만 바꾸므로 진행 중인 검색은 이전 저장소로 끝납니다.
+        
+        Returns:
+            bool: 다시 로드했는지 여부
+        """
+        if self.embedding_store_path is None:
+            return False
+        version = PartitionedStore.version(self.embedding_store_path)
+        if version is None or version == self.embedding_store_version:
+            return False
+        self.load_embeddings(self.embedding_store_path)
+        return True
+    
     def _load_model(self, model_path: str = None):
         """
         유사도 검색 모델을 로드합니다.
@@ -62,7 +137,12 @@ class FurnitureSimilarity:
             self._create_vgg16_model()
     
     def _create_vgg16_model(self):
-        """VGG16 기반 특성 추출 모델을 생성합니다."""
+        """
+        VGG16 기반 특성 추출 모델을 생성합니다.
+        
+        conv 출력의 GlobalAveragePooling(512차원)을 그대로 임베딩으로 씁니다. 학습하지 않은 Dense 층을
+        얹으면 프로세스마다 가중치가 무작위로 달라져(API, 인덱서 워커, 추론 워커) 벡터끼리 비교할 수 없음.
+        """
         try:
             # VGG16 모델 로드 (사전 학습된 가중치 사용)
             base_model = VGG16(
@@ -71,12 +151,8 @@ class FurnitureSimilarity:
                 input_shape=(*self.input_size, 3)
             )
             
-            # 특성 추출을 위한 모델 구성
-            x = base_model.output
-            x = tf.keras.layers.GlobalAveragePooling2D()(x)
-            x = tf.keras.layers.Dense(512, activation='relu')(x)
-            x = tf.keras.layers.Dropout(0.5)(x)
-            features = tf.keras.layers.Dense(256, activation='relu')(x)
+            # 특성 추출을 위한 모델 구성 (EMBEDDING_DIM = 512)
+            features = tf.keras.layers.GlobalAveragePooling2D()(base_model.output)
             
             self.feature_extractor = Model(inputs=base_model.input, outputs=features)
             
@@ -94,19 +170,29 @@ class FurnitureSimilarity:
             image: 입력 이미지 (BGR 형식)
             
         Returns:
-            np.ndarray: 추출된 특성 벡터
+            np.ndarray: 추출된 특성 벡터 (L2 정규화)
+        """
+        return self.extract_features_batch([image])[0]
+    
+    def extract_features_batch(self, images: List[np.ndarray]) -> np.ndarray:
+        """
+        여러 이미지의 특성 벡터를 한 번의 forward pass로 추출합니다.
+        
+        Args:
+            images: 입력 이미지 리스트 (BGR 형식)
+            
+        Returns:
+            np.ndarray: (len(images), dim) 특성 행렬 (행 단위 L2 정규화)
         """
         try:
             # 이미지 전처리
-            processed_image = self._preprocess_image(image)
+            batch = np.concatenate([self._preprocess_image(image) for image in images], axis=0)
             
             # 특성 추출
-            features = self.feature_extractor.predict(processed_image, verbose=0)
+            features = self.feature_extractor.predict(batch, verbose=0)
             
             # 정규화
-            features = features / np.linalg.norm(features)
-            
-            return features.flatten()
+            return normalize_rows(features)
             
         except Exception as e:
             logger.error(f"Feature extraction failed: {str(e)}")
@@ -150,91 +236,111 @@ class FurnitureSimilarity:
         Args:
             query_image: 쿼리 이미지
             db: SQLAlchemy 데이터베이스 세션
-            category: 특정 카테고리로 제한 (선택사항)
+            category: 특정 카테고리로 제한 (선택사항, bed/chair 등 탐지 클래스도 가능)
             top_k: 반환할 상위 개수
             
         Returns:
             List[FurnitureItem]: 유사한 가구 목록
         """
+        return self.recommend_for_features(self.extract_features(query_image), db, category=category, top_k=top_k)
+    
+    def recommend_for_features(
+        self,
+        query_features: np.ndarray,
+        db: Session,
+        category: str = None,
+        top_k: int = 5
+    ) -> List[FurnitureItem]:
+        """
+        이미 추출한 쿼리 특성 벡터로 유사한 가구를 찾습니다 (특성 추출은 마이크로배칭으로 따로 수행).
+        
+        Args:
+            query_features: extract_features 결과 (L2 정규화)
+            db: SQLAlchemy 데이터베이스 세션
+            category: 특정 카테고리로 제한 (선택사항, bed/chair 등 탐지 클래스도 가능)
+            top_k: 반환할 상위 개수
+            
+        Returns:
+            List[FurnitureItem]: 유사한 가구 목록
+        """
+        return self.recommend_for_features_batch([query_features], db, categories=[category], top_k=top_k)[0]
+    
+    def recommend_for_features_batch(
+        self,
+        query_features: List[np.ndarray],
+        db: Session,
+        categories: List[Optional[str]] = None,
+        top_k: int = 5
+    ) -> List[List[FurnitureItem]]:
+        """
+        쿼리 여러 개(예: 한 사진에서 탐지한 가구 crop들)의 유사 가구를 찾습니다.
+        쿼리별로 샤드를 검색한 뒤 후보 상품 정보는 DB 쿼리 한 번으로 조회합니다.
+        
+        Args:
+            query_features: 쿼리별 특성 벡터 (L2 정규화)
+            db: SQLAlchemy 데이터베이스 세션
+            categories: 쿼리별 카테고리 제한 (None이면 전체, bed/chair 등 탐지 클래스도 가능)
+            top_k: 쿼리별 반환할 상위 개수
+            
+        Returns:
+            List[List[FurnitureItem]]: 쿼리별 유사한 가구 목록 (입력 순서)
+        """
         try:
-            # 쿼리 이미지에서 특성 추출
-            query_features = self.extract_features(query_image)
+            categories = categories or [None] * len(query_features)
             
-            # PostgreSQL에서 제품 데이터 가져오기
-            from sqlalchemy import text
+            # 임베딩 저장소에서 후보 검색 (카테고리가 있으면 그 샤드만, 없으면 샤드별 top-k 병합)
+            # 재고 없는 상품이 빠질 수 있으므로 여유 있게 가져옴
+            candidate_lists = [
+                self.embedding_store.search(features, top_k=top_k * SIMILARITY_OVERFETCH,
+                                            category=shard_category(category))
+                for features, category in zip(query_features, categories)
+            ]
+            candidate_ids = sorted({product_id for candidates in candidate_lists for product_id, _ in candidates})
+            if not candidate_ids:
+                logger.warning(f"No indexed products found for categories: {categories}")
+                return [[] for _ in query_features]
             
-            # 기본 쿼리
-            query = """
+            # 후보 상품 정보만 조회
+            query = text("""
                 SELECT p.id, p.title, p.price_amount, p.images, c.name as category_name
                 FROM products p
                 LEFT JOIN categories c ON p.category_id = c.id
-                WHERE p.stock > 0
-            """
+                WHERE p.stock > 0 AND p.id IN :ids
+            """).bindparams(bindparam("ids", expanding=True))
+            rows = db.execute(query, {"ids": candidate_ids}).fetchall()
+            products = {str(row.id): row for row in rows}
             
-            # 카테고리 필터링
-            if category:
-                query += " AND LOWER(c.name) = LOWER(:category)"
-            
-            query += " LIMIT 1000"  # 성능을 위해 제한
-            
-            # 쿼리 실행
-            if category:
-                result = db.execute(text(query), {"category": category})
-            else:
-                result = db.execute(text(query))
-            
-            products = result.fetchall()
-            
-            if len(products) == 0:
-                logger.warning(f"No products found for category: {category}")
-                return []
-            
-            # 유사도 계산 (현재는 더미 구현 - 실제로는 이미지 특성 벡터 비교 필요)
-            similarities = []
-            for product in products:
-                try:
-                    # 실제 구현에서는 제품 이미지에서 특성 벡터를 추출하고 비교해야 함
-                    # 현재는 더미 유사도 점수 사용
-                    similarity = np.random.random()  # 더미 점수
+            # 유사도 순서를 유지하며 FurnitureItem 객체로 변환
+            results = []
+            for features, candidates in zip(query_features, candidate_lists):
+                style_features = features.tolist()
+                recommendations = []
+                for product_id, similarity in candidates:
+                    product = products.get(product_id)
+                    if product is None:
+                        continue
                     
-                    similarities.append({
-                        'product': product,
-                        'similarity': similarity
-                    })
-                except Exception as e:
-                    logger.warning(f"Error calculating similarity for product {product.id}: {str(e)}")
-                    continue
-            
-            # 유사도 순으로 정렬
-            similarities.sort(key=lambda x: x['similarity'], reverse=True)
-            
-            # 상위 k개 선택
-            top_similarities = similarities[:top_k]
-            
-            # FurnitureItem 객체로 변환
-            recommendations = []
-            for item in top_similarities:
-                product = item['product']
-                
-                # 이미지 URL 추출 (JSON 배열에서 첫 번째 이미지)
-                image_url = ""
-                if product.images and len(product.images) > 0:
-                    image_url = product.images[0] if isinstance(product.images, list) else str(product.images)
-                
-                furniture_item = FurnitureItem(
-                    id=str(product.id),
-                    name=str(product.title),
-                    category=str(product.category_name or 'unknown'),
-                    price=float(product.price_amount or 0.0),
-                    image_url=image_url,
-                    product_url=f"/products/{product.id}",  # API 엔드포인트
-                    similarity_score=float(item['similarity']),
-                    style_features=query_features.tolist()
-                )
-                recommendations.append(furniture_item)
+                    # 이미지 URL 추출 (JSON 배열에서 첫 번째 이미지)
+                    urls = image_urls(product.images)
+                    image_url = urls[0] if urls else ""
+                    
+                    furniture_item = FurnitureItem(
+                        id=str(product.id),
+                        name=str(product.title),
+                        category=str(product.category_name or 'unknown'),
+                        price=float(product.price_amount or 0.0),
+                        image_url=image_url,
+                        product_url=f"/products/{product.id}",  # API 엔드포인트
+                        similarity_score=similarity,
+                        style_features=style_features
+                    )
+                    recommendations.append(furniture_item)
+                    if len(recommendations) == top_k:
+                        break
+                results.append(recommendations)
             
-            logger.info(f"Found {len(recommendations)} similar furniture items")
-            return recommendations
+            logger.info(f"Found {sum(map(len, results))} similar furniture items for {len(results)} queries")
+            return results
             
         except Exception as e:
             logger.error(f"Similarity search failed: {str(e)}")
@@ -251,23 +357,10 @@ class FurnitureSimilarity:
             np.ndarray: 유사도 행렬
         """
         try:
-            n_images = len(images)
-            similarity_matrix = np.zeros((n_images, n_images))
-            
-            # 각 이미지의 특성 추출
-            features = []
-            for image in images:
-                feature = self.extract_features(image)
-                features.append(feature)
-            
-            # 유사도 행렬 계산
-            for i in range(n_images):
-                for j in range(n_images):
-                    if i == j:
-                        similarity_matrix[i][j] = 1.0
-                    else:
-                        similarity = 1 - cosine(features[i], features[j])
-                        similarity_matrix[i][j] = similarity
+            # 각 이미지의 특성 추출 (정규화된 벡터이므로 내적 = 코사인 유사도)
+            features = self.extract_features_batch(images)
+            similarity_matrix = features @ features.T
+            np.fill_diagonal(similarity_matrix, 1.0)
             
             return similarity_matrix
             
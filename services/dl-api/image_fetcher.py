@@ -0,0 +1,131 @@
+"""
+상품 이미지 가져오기
+
+products.images(JSON)에 저장된 이미지 URL에서 원본 바이트를 읽어 옵니다.
+IMAGE_FETCHER 환경 변수(config)로 구현을 고릅니다.
+- http (기본): URL을 그대로 GET
+- s3: S3_BUCKET에서 객체 키로 직접 읽기 (boto3 필요)
+- local: IMAGE_ROOT 아래 파일로 매핑 (개발/테스트용 S3 스텁)
+
+URL이 S3_PUBLIC_BASE_URL로 시작하면 그 뒤를 객체 키로 봅니다. crud-api의 상품 등록과 같은 규칙입니다.
+"""
+
+import json
+import logging
+import os
+import urllib.request
+from pathlib import Path
+from typing import Any, List, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def image_urls(images: Any) -> List[str]:
+    """products.images 값(JSON 문자열, URL 목록, {"url": ...} 목록)에서 URL만 뽑습니다"""
+    if not images:
+        return []
+    if isinstance(images, str):
+        try:
+            images = json.loads(images)
+        except json.JSONDecodeError:
+            return [images]
+    if isinstance(images, (str, dict)):
+        images = [images]
+    urls = []
+    for entry in images:
+        url = (entry.get("url") or entry.get("file_id")) if isinstance(entry, dict) else entry
+        if url:
+            urls.append(str(url))
+    return urls
+
+
+def decode_image(data: bytes) -> Optional[np.ndarray]:
+    """이미지 바이트 → BGR ndarray (디코딩 실패 시 None)"""
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+class ImageFetcher:
+    """이미지 URL → 바이트"""
+
+    def __init__(self, public_base_url: str = ""):
+        self.public_base_url = public_base_url.rstrip("/")
+
+    def object_key(self, url: str) -> str:
+        if self.public_base_url and url.startswith(self.public_base_url + "/"):
+            return url[len(self.public_base_url) + 1:]
+        if url.startswith("file://"):
+            return url[len("file://"):]
+        return url
+
+    def fetch(self, url: str) -> bytes:
+        raise NotImplementedError
+
+
+class HttpImageFetcher(ImageFetcher):
+    def __init__(self, public_base_url: str = "", timeout: float = 10.0):
+        super().__init__(public_base_url)
+        self.timeout = timeout
+
+    def fetch(self, url: str) -> bytes:
+        if not url.startswith(("http://", "https://")):
+            if not self.public_base_url:
+                raise ValueError(f"Cannot resolve relative image URL without S3_PUBLIC_BASE_URL: {url}")
+            url = f"{self.public_base_url}/{url.lstrip('/')}"
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            return response.read()
+
+
+class S3ImageFetcher(ImageFetcher):
+    def __init__(self, bucket: str, public_base_url: str = "", region: Optional[str] = None):
+        super().__init__(public_base_url)
+        self.bucket = bucket
+        self.region = region
+        self._client = None
+
+    def __getstate__(self):
+        # boto3 클라이언트는 프로세스마다 새로 만듭니다
+        state = self.__dict__.copy()
+        state["_client"] = None
+        return state
+
+    def fetch(self, url: str) -> bytes:
+        if self._client is None:
+            import boto3
+
+            self._client = boto3.client("s3", region_name=self.region)
+        response = self._client.get_object(Bucket=self.bucket, Key=self.object_key(url))
+        return response["Body"].read()
+
+
+class LocalImageFetcher(ImageFetcher):
+    """IMAGE_ROOT/<객체 키> 파일을 읽는 S3 스텁"""
+
+    def __init__(self, root: str, public_base_url: str = ""):
+        super().__init__(public_base_url)
+        self.root = Path(root)
+
+    def fetch(self, url: str) -> bytes:
+        key = self.object_key(url)
+        if key.startswith(("http://", "https://")):
+            key = key.split("://", 1)[1].split("/", 1)[-1]  # 호스트를 떼고 경로만 사용
+        path = self.root / key.lstrip("/")
+        return path.read_bytes()
+
+
+def create_image_fetcher() -> ImageFetcher:
+    """IMAGE_FETCHER (http | s3 | local) 설정으로 이미지 fetcher를 만듭니다"""
+    from config import IMAGE_FETCHER, IMAGE_ROOT
+
+    public_base_url = os.getenv("S3_PUBLIC_BASE_URL", "")
+    if IMAGE_FETCHER == "s3":
+        return S3ImageFetcher(
+            bucket=os.getenv("S3_BUCKET", ""),
+            public_base_url=public_base_url,
+            region=os.getenv("S3_REGION", "ap-northeast-2")
+        )
+    if IMAGE_FETCHER == "local":
+        return LocalImageFetcher(IMAGE_ROOT, public_base_url=public_base_url)
+    return HttpImageFetcher(public_base_url=public_base_url)
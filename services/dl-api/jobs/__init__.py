@@ -0,0 +1 @@
+"""Batch jobs. Run from the service root, e.g. ``python -m jobs.index_embeddings``."""
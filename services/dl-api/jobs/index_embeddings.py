@@ -0,0 +1,310 @@
+"""
+상품 이미지 임베딩 인덱서
+
+products 테이블을 id 순으로 훑으며 이미지를 가져와 FurnitureSimilarity.extract_features_batch로
+특성 벡터를 뽑고, 결과를 EMBEDDING_STORE_PATH(카테고리별 샤드, PartitionedStore)에 저장합니다.
+
+- 증분: 상품별 이미지 URL 목록의 해시(fingerprint)가 기존 저장소와 같으면 다시 계산하지 않습니다.
+  삭제된 상품은 저장소에서 빠집니다.
+- 재개: 결과를 APPEND_EVERY개 상품마다 저장소에 새 세그먼트로 추가(PartitionedStore.append)하므로
+  중간에 멈춘 실행을 다시 돌리면 fingerprint가 맞는 상품은 건너뜁니다. --full은
+  EMBEDDING_STAGING_DIR에 새 저장소를 쌓은 뒤 마지막에 EMBEDDING_STORE_PATH로 옮깁니다.
+- 병렬: 워커 프로세스마다 모델을 한 번만 로드하고 상품 배치 단위로 나눠 처리합니다.
+- ANN: 새로 임베딩된 상품을 샤드별 ANN 인덱스(shard-NNN/ann)에 추가합니다 (--rebuild-ann이면 재학습).
+- 모델 버전: 저장소는 EMBEDDING_MODEL_VERSION을 기록합니다. 기존 저장소의 버전이 다르면 벡터를 섞을 수 없으므로
+  자동으로 --full처럼 재구축하고, 버전이 다른 staging은 버립니다.
+
+    python -m jobs.index_embeddings --workers 4 --batch-size 32
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from ann_index import AnnIndex, IVFIndex, PQIndex, create_ann_index, load_ann_index, save_ann_index
+from config import (
+    ANN_INDEX, ANN_NPROBE, EMBEDDING_BATCH_SIZE, EMBEDDING_MODEL_VERSION, EMBEDDING_STAGING_DIR,
+    EMBEDDING_STORE_PATH, EMBEDDING_WORKERS, PQ_SUBSPACES
+)
+from embedding_store import MANIFEST_NAME, EmbeddingStore, PartitionedStore
+from image_fetcher import ImageFetcher, create_image_fetcher, decode_image, image_urls
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PRODUCT_PAGE_SIZE = 1000  # products 테이블을 한 번에 읽는 행 수
+APPEND_EVERY = 1024  # 이만큼 상품이 모이면 저장소에 추가 (중단 시 최대 이만큼만 다시 계산)
+ANN_REBUILD_RATIO = 1.25  # ANN 인덱스 벡터 수가 저장소의 이 배수를 넘으면 (예전 벡터 누적) 재빌드
+ANN_PARAMS = {IVFIndex.kind: {"nprobe": ANN_NPROBE}, PQIndex.kind: {"m": PQ_SUBSPACES}}  # 새로 빌드할 때의 파라미터
+
+# (상품 id, 카테고리, fingerprint, 이미지 URL 목록)
+ProductRow = Tuple[str, str, str, List[str]]
+# (상품 id, 카테고리, fingerprint, (이미지 수, dim) 벡터)
+ProductVectors = Tuple[str, str, str, np.ndarray]
+
+
+def fingerprint(urls: List[str]) -> str:
+    """이미지 URL 목록 해시 - 이미지가 바뀐 상품만 다시 임베딩하기 위한 키"""
+    return hashlib.sha1(json.dumps(urls).encode("utf-8")).hexdigest()
+
+
+def stream_products(engine, page_size: int = PRODUCT_PAGE_SIZE) -> Iterator[ProductRow]:
+    """이미지가 있는 상품을 id 순 keyset 페이지로 읽습니다 (전체를 메모리에 올리지 않음)"""
+    query = text(
+        "SELECT p.id, p.images, c.name FROM products p "
+        "LEFT JOIN categories c ON c.id = p.category_id "
+        "WHERE p.id > :last_id ORDER BY p.id LIMIT :limit"
+    )
+    last_id = ""
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(query, {"last_id": last_id, "limit": page_size}).fetchall()
+        for product_id, images, category in rows:
+            urls = image_urls(images)
+            if urls:
+                yield str(product_id), category or "", fingerprint(urls), urls
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1][0]
+
+
+# ---- 워커 프로세스 ----
+
+_fetcher: Optional[ImageFetcher] = None
+_embed: Optional[Callable[[List[np.ndarray]], np.ndarray]] = None
+
+
+def vgg_embedder() -> Callable[[List[np.ndarray]], np.ndarray]:
+    """
+    워커마다 한 번 호출되는 기본 임베더 팩토리 (무거운 import는 워커 안에서).
+    VGG16 GAP 출력은 imagenet 가중치만으로 정해지므로 워커끼리, API 프로세스와도 같은 벡터를 냅니다.
+    """
+    from furniture_similarity import FurnitureSimilarity
+
+    return FurnitureSimilarity(with_embeddings=False).extract_features_batch
+
+
+def _init_worker(fetcher: ImageFetcher, embedder_factory: Callable) -> None:
+    global _fetcher, _embed
+    _fetcher = fetcher
+    _embed = embedder_factory()
+
+
+def _embed_batch(products: List[ProductRow], batch_size: int) -> Tuple[List[ProductVectors], int]:
+    """상품 배치의 이미지를 가져와 batch_size씩 forward pass. (결과, 실패한 이미지 수)"""
+    images, owners, failed = [], [], 0
+    for index, (product_id, _, _, urls) in enumerate(products):
+        for url in urls:
+            try:
+                image = decode_image(_fetcher.fetch(url))
+            except Exception as e:
+                logger.warning(f"Failed to fetch image for product {product_id} ({url}): {str(e)}")
+                image = None
+            if image is None:
+                failed += 1
+                continue
+            images.append(image)
+            owners.append(index)
+
+    if not images:
+        return [], failed
+    vectors = np.concatenate([
+        np.asarray(_embed(images[start:start + batch_size]), dtype=np.float32)
+        for start in range(0, len(images), batch_size)
+    ], axis=0)
+
+    owners = np.asarray(owners)
+    results = []
+    for index in np.unique(owners):
+        product_id, category, product_fingerprint, _ = products[index]
+        results.append((product_id, category, product_fingerprint, vectors[owners == index]))
+    return results, failed
+
+
+def _store_vectors(store: EmbeddingStore, product_ids: Optional[Set[str]] = None) -> Tuple[np.ndarray, List[str]]:
+    """저장소의 이미지 벡터와 벡터별 상품 id (product_ids가 주어지면 그 상품만)"""
+    blocks, labels = [], []
+    for product_id, _, _, vectors in store.iter_products():
+        if product_ids is None or product_id in product_ids:
+            blocks.append(vectors)
+            labels.extend([product_id] * len(vectors))
+    return (np.concatenate(blocks) if blocks else np.empty((0, store.dim), dtype=np.float32)), labels
+
+
+def update_ann_index(store: EmbeddingStore, path: Path, fresh_ids: Set[str],
+                     rebuild: bool = False) -> Optional[AnnIndex]:
+    """
+    새로 임베딩된 상품을 샤드의 ANN 인덱스에 추가합니다. 인덱스가 없거나 종류가 바뀌었거나
+    예전 벡터가 ANN_REBUILD_RATIO 이상 쌓였으면 저장소 전체로 다시 빌드합니다.
+    """
+    if not len(store):
+        return None
+    index = None if rebuild else load_ann_index(path)
+    if index is not None and index.kind == ANN_INDEX:
+        if not fresh_ids:
+            return index
+        vectors, labels = _store_vectors(store, fresh_ids)
+        if not labels:
+            return index
+        index.add(vectors, labels)
+        if len(index) <= ANN_REBUILD_RATIO * store.n_vectors:
+            save_ann_index(index, path)
+            return index
+
+    vectors, labels = _store_vectors(store)
+    index = create_ann_index(ANN_INDEX, **ANN_PARAMS.get(ANN_INDEX, {}))
+    index.build(vectors, labels)
+    save_ann_index(index, path)
+    return index
+
+
+def run(engine, fetcher: ImageFetcher, store_path: Path = EMBEDDING_STORE_PATH,
+        staging_dir: Path = EMBEDDING_STAGING_DIR, batch_size: int = EMBEDDING_BATCH_SIZE,
+        workers: int = EMBEDDING_WORKERS, full: bool = False, rebuild_ann: bool = False,
+        embedder_factory: Callable = vgg_embedder,
+        model_version: str = EMBEDDING_MODEL_VERSION) -> Dict[str, int]:
+    """
+    상품 임베딩을 갱신합니다.
+
+    Args:
+        engine: products 테이블을 읽을 SQLAlchemy 엔진
+        fetcher: 이미지 fetcher (워커 프로세스로 pickle 됨)
+        store_path: 저장소 디렉터리
+        staging_dir: --full 재구축 중인 저장소 디렉터리
+        batch_size: forward pass 한 번의 이미지 수 (워커 작업 단위도 이 수의 상품)
+        workers: 워커 프로세스 수 (1 이하면 현재 프로세스에서 처리)
+        full: 기존 저장소를 무시하고 전부 다시 계산
+        rebuild_ann: ANN 인덱스를 증분 추가 대신 새로 빌드 (k-means 재학습)
+        embedder_factory: 이미지 목록 → (n, dim) 벡터 함수를 만드는 팩토리
+        model_version: 임베더의 모델 버전 (저장소에 기록, 기존 저장소와 다르면 전체 재구축)
+
+    Returns:
+        Dict[str, int]: products, embedded, reused, moved, failed_images, removed
+    """
+    store_path, staging_dir = Path(store_path), Path(staging_dir)
+    if not full and PartitionedStore.exists(store_path):
+        stored_version = PartitionedStore.read_model_version(store_path)
+        if stored_version != model_version:
+            logger.warning(f"Store at {store_path} was built with embedding model {stored_version}, "
+                           f"not {model_version}; rebuilding it")
+            full = True
+    if full and PartitionedStore.exists(staging_dir) \
+            and PartitionedStore.read_model_version(staging_dir) != model_version:
+        shutil.rmtree(staging_dir)  # 다른 모델로 쌓던 staging은 재개할 수 없음
+    target = staging_dir if full else store_path
+
+    current = {product[0]: product for product in stream_products(engine)}
+    built = PartitionedStore.load(target) if PartitionedStore.exists(target) else PartitionedStore.empty()
+    done = built.product_index()
+
+    # 이미지는 그대로이고 카테고리만 바뀐 상품은 벡터를 새 샤드로 옮기기만 함
+    todo, moved = [], []
+    for product_id, (_, category, product_fingerprint, _) in sorted(current.items()):
+        known = done.get(product_id)
+        if known == (category.lower(), product_fingerprint):
+            continue
+        if known is not None and known[1] == product_fingerprint:
+            moved.append((product_id, category, product_fingerprint, built.product_vectors(known[0], product_id)))
+        else:
+            todo.append(current[product_id])
+    removed = [product_id for product_id in done if product_id not in current]
+    logger.info(f"{len(current)} products with images, {len(todo)} to embed, {len(moved)} changed category, "
+                f"{len(removed)} to remove ({target})")
+
+    batches = [todo[start:start + batch_size] for start in range(0, len(todo), batch_size)]
+    pending: List[ProductVectors] = list(moved)
+    fresh_ids: Set[str] = {product[0] for product in moved}
+    embedded, failed_images = 0, 0
+
+    def flush() -> None:
+        if pending:
+            PartitionedStore.append(target, pending, model_version=model_version)
+            pending.clear()
+
+    def stage(results: List[ProductVectors], failed: int) -> None:
+        nonlocal embedded, failed_images
+        failed_images += failed
+        pending.extend(results)
+        fresh_ids.update(product[0] for product in results)
+        embedded += len(results)
+        if len(pending) >= APPEND_EVERY:
+            flush()
+            logger.info(f"Embedded {embedded}/{len(todo)} products")
+
+    if batches and workers <= 1:
+        _init_worker(fetcher, embedder_factory)
+        for batch in batches:
+            stage(*_embed_batch(batch, batch_size))
+    elif batches:
+        # TF/torch는 fork 후 안전하지 않으므로 spawn
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(fetcher, embedder_factory)) as pool:
+            futures = [pool.submit(_embed_batch, batch, batch_size) for batch in batches]
+            for future in as_completed(futures):
+                stage(*future.result())
+    flush()
+
+    store = PartitionedStore.append(target, [], remove=removed, model_version=model_version)
+    if full:
+        store.save(store_path)
+        shutil.rmtree(staging_dir)
+        store = PartitionedStore.load(store_path)
+    if ANN_INDEX != "none":
+        for category, shard in store.shards.items():
+            update_ann_index(shard, store_path / store.shard_dirs[category] / "ann", fresh_ids,
+                             rebuild=full or rebuild_ann)
+        # ANN 인덱스까지 쓴 뒤 매니페스트 mtime을 갱신해 API가 새 인덱스와 함께 다시 로드하게 함
+        (store_path / MANIFEST_NAME).touch()
+
+    stats = {
+        "products": len(store),
+        "embedded": embedded,
+        "reused": len(current) - len(todo) - len(moved),
+        "moved": len(moved),
+        "failed_images": failed_images,
+        "removed": len(removed)
+    }
+    logger.info(f"Embedding index updated: {stats}")
+    return stats
+
+
+def main(argv=None) -> Dict[str, int]:
+    parser = argparse.ArgumentParser(description="Build or update the product image embedding store")
+    parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE, help="images per forward pass")
+    parser.add_argument("--workers", type=int, default=EMBEDDING_WORKERS, help="embedding worker processes")
+    parser.add_argument("--full", action="store_true", help="ignore the existing store and re-embed everything")
+    parser.add_argument("--rebuild-ann", action="store_true", help="retrain the ANN index instead of adding to it")
+    parser.add_argument("--store", default=str(EMBEDDING_STORE_PATH), help="embedding store path")
+    parser.add_argument("--staging-dir", default=str(EMBEDDING_STAGING_DIR), help="store directory used while rebuilding with --full")
+    args = parser.parse_args(argv)
+
+    from database import engine
+
+    return run(
+        engine,
+        create_image_fetcher(),
+        store_path=Path(args.store),
+        staging_dir=Path(args.staging_dir),
+        batch_size=args.batch_size,
+        workers=args.workers,
+        full=args.full,
+        rebuild_ann=args.rebuild_ann
+    )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        logger.error(f"Embedding indexing failed: {str(e)}")
+        sys.exit(1)
@@ -1,23 +1,33 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends
+from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
+import asyncio
 import os
 import cv2
 import numpy as np
 from PIL import Image
 import io
+import functools
 import pandas as pd
-import pickle
 from typing import List, Dict, Any
 import logging
 from sqlalchemy.orm import Session
 
+from batching import MicroBatcher
+from executors import (
+    Overloaded, RequestLimiter, configure_intra_op_threads, inference_executor, intra_op_threads, run_blocking,
+    shutdown_executors
+)
 from furniture_detection import FurnitureDetector
-from furniture_similarity import FurnitureSimilarity
-from models import DetectionResponse, SimilarityResponse, FurnitureItem
+from furniture_similarity import FurnitureSimilarity, shard_category
+from models import (
+    DetectionResponse, SimilarityResponse, FurnitureItem, DetectionRecommendation, DetectAndRecommendResponse
+)
 from config import *
 from database import get_db
+from result_cache import ResultCache, cache_key, content_digest
+from worker_pool import InferenceWorkerPool
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -41,18 +51,101 @@ app.add_middleware(
 # 전역 변수로 모델 인스턴스 저장
 detector = None
 similarity_model = None
+worker_pool = None  # INFERENCE_WORKERS > 0이면 모델은 워커 프로세스에만 있음
+
+# 동시 요청을 모아 한 번에 추론하는 마이크로배처
+detection_batcher = None
+feature_batcher = None
+
+# 인덱서(jobs.index_embeddings)가 갱신한 임베딩 저장소를 다시 로드하는 백그라운드 태스크
+embedding_reloader = None
+
+# 추론 엔드포인트 동시 처리 제한 (/health 등은 제한 없음)
+request_limiter = RequestLimiter(MAX_CONCURRENT_REQUESTS, MAX_QUEUED_REQUESTS)
+
+# 같은 사진 재업로드용 결과 캐시 (탐지 결과 / 쿼리 임베딩 / 추천 결과)
+result_cache = ResultCache(
+    max_entries=RESULT_CACHE_MAX_ENTRIES,
+    max_bytes=RESULT_CACHE_MAX_MB * 1024 * 1024,
+    disk_dir=RESULT_CACHE_DIR or None,
+    disk_max_bytes=RESULT_CACHE_DISK_MAX_MB * 1024 * 1024
+)
+
+def decode_upload(contents: bytes) -> np.ndarray:
+    """업로드 이미지 바이트 → BGR ndarray (blocking executor에서 실행)"""
+    image = Image.open(io.BytesIO(contents)).convert('RGB')
+    return cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+
+async def cache_get(key: str):
+    """메모리 tier만 쓰면 바로, 디스크 tier가 있으면 blocking executor에서 조회"""
+    if result_cache.disk_dir is None:
+        return result_cache.get(key)
+    return await run_blocking(result_cache.get, key)
+
+async def cache_put(key: str, value, ttl: float = None) -> None:
+    if result_cache.disk_dir is None:
+        result_cache.put(key, value, ttl=ttl)
+    else:
+        await run_blocking(result_cache.put, key, value, ttl=ttl)
+
+def detection_cache_key(digest: str) -> str:
+    return cache_key("detect", digest, MODEL_VERSION, DETECTION_CONFIDENCE_THRESHOLD)
+
+async def reload_embeddings_periodically() -> None:
+    """EMBEDDING_RELOAD_INTERVAL마다 shards.json mtime을 확인해 바뀌었으면 저장소를 다시 로드"""
+    while True:
+        await asyncio.sleep(EMBEDDING_RELOAD_INTERVAL)
+        try:
+            await run_blocking(similarity_model.reload_embeddings_if_changed)
+        except Exception as e:
+            logger.error(f"Error reloading embeddings: {str(e)}")
+
+def overloaded_error(e: Overloaded) -> HTTPException:
+    logger.warning(f"Rejecting request: {str(e)}")
+    return HTTPException(status_code=503, detail="Server is busy, please retry", headers={"Retry-After": "1"})
 
 @app.on_event("startup")
 async def startup_event():
     """애플리케이션 시작 시 모델 로드"""
-    global detector, similarity_model
+    global detector, similarity_model, worker_pool, detection_batcher, feature_batcher, embedding_reloader
     
     try:
-        logger.info("Loading furniture detection model...")
-        detector = FurnitureDetector()
+        if INFERENCE_WORKERS > 0:
+            # 워커 프로세스에 모델 로드, API 프로세스는 디코딩·임베딩 검색·응답만 담당
+            logger.info(f"Starting {INFERENCE_WORKERS} inference worker processes...")
+            worker_pool = InferenceWorkerPool(
+                INFERENCE_WORKERS, threads_per_worker=intra_op_threads(INFERENCE_WORKERS),
+                task_timeout=INFERENCE_TASK_TIMEOUT
+            )
+            similarity_model = FurnitureSimilarity(with_model=False)
+            detect_batch = functools.partial(worker_pool.run, "detect")
+            features_batch = functools.partial(worker_pool.run, "features")
+            executor, concurrent_batches = worker_pool.executor, INFERENCE_WORKERS
+        else:
+            configure_intra_op_threads()
+            
+            logger.info("Loading furniture detection model...")
+            detector = FurnitureDetector(confidence_threshold=DETECTION_CONFIDENCE_THRESHOLD)
+            
+            logger.info("Loading furniture similarity model...")
+            similarity_model = FurnitureSimilarity()
+            detect_batch = detector.detect_furniture_batch
+            features_batch = similarity_model.extract_features_batch
+            executor, concurrent_batches = inference_executor(), 1
+        
+        detection_batcher = MicroBatcher(
+            "detection", detect_batch,
+            max_batch_size=DETECTION_MAX_BATCH_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS,
+            executor=executor, max_concurrent_batches=concurrent_batches
+        )
+        feature_batcher = MicroBatcher(
+            "features", features_batch,
+            max_batch_size=FEATURE_MAX_BATCH_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS,
+            executor=executor, max_concurrent_batches=concurrent_batches
+        )
         
-        logger.info("Loading furniture similarity model...")
-        similarity_model = FurnitureSimilarity()
+        if EMBEDDING_RELOAD_INTERVAL > 0:
+            embedding_reloader = asyncio.create_task(reload_embeddings_periodically())
         
         logger.info("All models loaded successfully!")
         
@@ -60,6 +153,18 @@ async def startup_event():
         logger.error(f"Error loading models: {str(e)}")
         raise e
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """대기 중인 배치 요청, 추론 워커, executor 정리"""
+    if embedding_reloader is not None:
+        embedding_reloader.cancel()
+    for batcher in (detection_batcher, feature_batcher):
+        if batcher is not None:
+            await batcher.stop()
+    if worker_pool is not None:
+        worker_pool.close()
+    shutdown_executors()
+
 @app.get("/")
 async def root():
     """API 상태 확인"""
@@ -71,7 +176,7 @@ async def health_check(db: Session = Depends(get_db)):
     try:
         # 데이터베이스 연결 테스트
         from sqlalchemy import text
-        db.execute(text("SELECT 1"))
+        await run_blocking(db.execute, text("SELECT 1"))
         db_connected = True
     except Exception as e:
         logger.error(f"Database connection failed: {str(e)}")
@@ -79,7 +184,9 @@ async def health_check(db: Session = Depends(get_db)):
     
     return {
         "status": "healthy",
-        "detector_loaded": detector is not None,
+        # 워커 모드에서는 모델 로드를 마친 워커가 있어야 로드된 것으로 봄
+        "detector_loaded": detector is not None or (worker_pool is not None and worker_pool.ready_workers() > 0),
+        "inference_workers_ready": worker_pool.ready_workers() if worker_pool is not None else None,
         "similarity_model_loaded": similarity_model is not None,
         "database_connected": db_connected
     }
@@ -100,13 +207,19 @@ async def detect_furniture(file: UploadFile = File(...)):
         if not file.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        # 이미지 읽기
+        # 같은 사진이면 캐시된 탐지 결과로 응답 (업로드 해시 + 모델 버전 + 신뢰도 임계값)
         contents = await file.read()
-        image = Image.open(io.BytesIO(contents))
-        image_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+        key = detection_cache_key(await run_blocking(content_digest, contents))
+        detections = await cache_get(key)
         
-        # 가구 탐지 수행
-        detections = detector.detect_furniture(image_cv)
+        if detections is None:
+            async with request_limiter:
+                # 이미지 디코딩은 이벤트 루프 밖에서
+                image_cv = await run_blocking(decode_upload, contents)
+                
+                # 가구 탐지 수행 (동시 요청과 함께 배치 처리)
+                detections = await detection_batcher.submit(image_cv)
+            await cache_put(key, detections)
         
         # 응답 생성
         response = DetectionResponse(
@@ -119,6 +232,8 @@ async def detect_furniture(file: UploadFile = File(...)):
         logger.info(f"Detection completed: {len(detections)} items found")
         return response
         
+    except Overloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         logger.error(f"Detection error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
@@ -127,7 +242,7 @@ async def detect_furniture(file: UploadFile = File(...)):
 async def recommend_similar_furniture(
     file: UploadFile = File(...),
     category: str = None,
-    top_k: int = 5,
+    top_k: int = Query(DEFAULT_TOP_K, ge=1, le=MAX_TOP_K),
     db: Session = Depends(get_db)
 ):
     """
@@ -136,7 +251,7 @@ async def recommend_similar_furniture(
     Args:
         file: 가구 이미지 파일
         category: 특정 카테고리로 제한 (선택사항)
-        top_k: 추천할 상위 개수 (기본값: 5)
+        top_k: 추천할 상위 개수 (기본값: DEFAULT_TOP_K, 1~MAX_TOP_K)
         
     Returns:
         SimilarityResponse: 추천된 가구 목록
@@ -146,18 +261,33 @@ async def recommend_similar_furniture(
         if not file.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        # 이미지 읽기
+        # 같은 사진 + 같은 파라미터면 캐시된 추천 결과로 응답 (재고 변경 반영을 위해 TTL 적용)
         contents = await file.read()
-        image = Image.open(io.BytesIO(contents))
-        image_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-        
-        # 유사도 기반 추천 수행
-        recommendations = similarity_model.find_similar_furniture(
-            image_cv, 
-            db, 
-            category=category, 
-            top_k=top_k
-        )
+        digest = await run_blocking(content_digest, contents)
+        # "Chair" / "chair" / "의자"는 같은 샤드를 검색하므로 샤드 이름으로 키를 만듦
+        key = cache_key("recommend", digest, MODEL_VERSION, shard_category(category), top_k)
+        recommendations = await cache_get(key)
+        
+        if recommendations is None:
+            async with request_limiter:
+                # 쿼리 임베딩은 따로 캐시하므로 category/top_k만 바뀌면 특성 추출 없이 검색만 다시 함
+                features_key = cache_key("features", digest, MODEL_VERSION)
+                query_features = await cache_get(features_key)
+                if query_features is None:
+                    # 이미지 디코딩은 이벤트 루프 밖에서, 특성 추출은 동시 요청과 함께 배치 처리
+                    image_cv = await run_blocking(decode_upload, contents)
+                    query_features = await feature_batcher.submit(image_cv)
+                    await cache_put(features_key, query_features)
+                
+                # 유사도 기반 추천 수행 (검색 + 동기 DB 쿼리)
+                recommendations = await run_blocking(
+                    similarity_model.recommend_for_features,
+                    query_features, 
+                    db, 
+                    category=category, 
+                    top_k=top_k
+                )
+            await cache_put(key, recommendations, ttl=RESULT_CACHE_TTL_SECONDS)
         
         # 응답 생성
         response = SimilarityResponse(
@@ -170,15 +300,103 @@ async def recommend_similar_furniture(
         logger.info(f"Recommendation completed: {len(recommendations)} items found")
         return response
         
+    except Overloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         logger.error(f"Recommendation error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Recommendation failed: {str(e)}")
 
+@app.post("/detect-and-recommend", response_model=DetectAndRecommendResponse)
+async def detect_and_recommend(
+    file: UploadFile = File(...),
+    top_k: int = Query(DEFAULT_TOP_K, ge=1, le=MAX_TOP_K),
+    db: Session = Depends(get_db)
+):
+    """
+    사진 한 장에서 가구를 탐지하고, 탐지된 객체마다 유사한 가구를 추천합니다.
+    /detect와 /recommend를 따로 부르는 것과 달리 업로드는 한 번만 디코딩하고,
+    crop은 원본 이미지의 뷰로 잘라 모든 crop의 특성을 한 배치로 추출합니다.
+    
+    Args:
+        file: 업로드된 이미지 파일
+        top_k: 객체별 추천할 상위 개수 (기본값: DEFAULT_TOP_K, 1~MAX_TOP_K)
+        
+    Returns:
+        DetectAndRecommendResponse: 탐지 결과별 추천 가구 목록 (신뢰도 순,
+            최대 DETECT_RECOMMEND_MAX_DETECTIONS개)
+    """
+    try:
+        # 이미지 파일 검증
+        if not file.content_type.startswith('image/'):
+            raise HTTPException(status_code=400, detail="File must be an image")
+        
+        async with request_limiter:
+            # 이미지 읽기 (디코딩은 이벤트 루프 밖에서, 한 번만)
+            contents = await file.read()
+            image_cv = await run_blocking(decode_upload, contents)
+            
+            # 가구 탐지 (신뢰도 내림차순, /detect와 같은 캐시 사용) 후 상위 객체만 crop
+            # (복사 없는 슬라이스 뷰, 빈 영역 제외)
+            key = detection_cache_key(await run_blocking(content_digest, contents))
+            detections = await cache_get(key)
+            if detections is None:
+                detections = await detection_batcher.submit(image_cv)
+                await cache_put(key, detections)
+            detections = detections[:DETECT_RECOMMEND_MAX_DETECTIONS]
+            crops = FurnitureDetector.crop_detected_furniture(image_cv, detections)
+            detections, crops = [d for d, c in zip(detections, crops) if c.size], [c for c in crops if c.size]
+            
+            results = []
+            if crops:
+                # 모든 crop을 같은 배치로 특성 추출한 뒤, 객체 카테고리 샤드별 검색 + DB 조회 한 번
+                query_features = await feature_batcher.submit_many(crops)
+                recommendations = await run_blocking(
+                    similarity_model.recommend_for_features_batch,
+                    query_features,
+                    db,
+                    categories=[detection.category for detection in detections],
+                    top_k=top_k
+                )
+                results = [
+                    DetectionRecommendation(detection=detection, recommendations=items)
+                    for detection, items in zip(detections, recommendations)
+                ]
+        
+        # 응답 생성
+        response = DetectAndRecommendResponse(
+            success=True,
+            message=f"Detected {len(results)} furniture items with recommendations",
+            results=results,
+            total_count=len(results)
+        )
+        
+        logger.info(f"Detect-and-recommend completed: {len(results)} items found")
+        return response
+        
+    except Overloaded as e:
+        raise overloaded_error(e)
+    except Exception as e:
+        logger.error(f"Detect-and-recommend error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Detect-and-recommend failed: {str(e)}")
+
+@app.get("/inference/stats")
+async def inference_stats():
+    """마이크로배칭 큐 대기 시간, 배치 처리 시간, 평균 배치 크기, 요청 동시성과 결과 캐시 적중률"""
+    stats = {
+        batcher.name: batcher.stats()
+        for batcher in (detection_batcher, feature_batcher) if batcher is not None
+    }
+    stats["requests"] = request_limiter.stats()
+    stats["result_cache"] = result_cache.stats()
+    if worker_pool is not None:
+        stats["workers"] = worker_pool.stats()
+    return stats
+
 @app.get("/categories")
 async def get_categories():
     """사용 가능한 가구 카테고리 목록을 반환합니다."""
     categories = ["bed", "chair", "dresser", "lamp", "sofa", "table"]
-    return {"categories": categories}
+    return {"categories": categories, "category_mapping": DETECTION_CATEGORY_MAP}
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
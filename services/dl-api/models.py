@@ -43,6 +43,18 @@ class SimilarityResponse(BaseModel):
     recommendations: List[FurnitureItem]
     total_count: int
 
+class DetectionRecommendation(BaseModel):
+    """탐지된 가구 객체 1개와 그 crop 기준 추천 가구"""
+    detection: DetectionItem
+    recommendations: List[FurnitureItem]
+
+class DetectAndRecommendResponse(BaseModel):
+    """탐지 + 객체별 추천 API 응답"""
+    success: bool
+    message: str
+    results: List[DetectionRecommendation]
+    total_count: int
+
 class ErrorResponse(BaseModel):
     """에러 응답"""
     success: bool = False
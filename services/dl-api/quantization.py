@@ -0,0 +1,129 @@
+"""
+임베딩 압축 (int8 스칼라 양자화 / Product Quantization)
+
+float32 512차원 벡터(EMBEDDING_DIM)는 이미지 1장당 2KB입니다. 압축 코드는 메모리에 올려 후보를 고르는 데만 쓰고,
+최종 점수는 EmbeddingStore가 mmap된 원본 벡터로 다시 계산합니다 (ann_index의 sq8/pq 백엔드).
+
+- ScalarQuantizer: 차원별 스케일로 int8 부호화 (4배 압축). 점수 = codes @ (query * scale)
+- ProductQuantizer: 벡터를 m개 부분공간으로 나눠 부분공간마다 256개 중심 중 하나(uint8)로 부호화
+  (512차원, m=32이면 64배 압축). 점수는 쿼리마다 만드는 (m, 256) 내적 룩업 테이블의 합 (ADC)
+"""
+
+from typing import Optional
+
+import numpy as np
+
+SCORE_CHUNK = 1024  # int8 → float32 변환 단위 (변환한 블록이 캐시에 남아 있을 때 곱함)
+
+
+def kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 15, seed: int = 0) -> np.ndarray:
+    """유클리드 k-means. 빈 클러스터는 임의의 점으로 다시 뽑습니다."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = nearest_centroids(vectors, centroids)
+        counts = np.bincount(assignments, minlength=n_clusters)
+        filled = counts > 0
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        sums = np.add.reduceat(vectors[np.argsort(assignments, kind="stable")], starts)
+        centroids[filled] = sums / counts[filled, None]
+        centroids[~filled] = vectors[rng.choice(len(vectors), int((~filled).sum()), replace=False)]
+    return centroids
+
+
+def nearest_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """유클리드 거리 최소 중심 번호 (argmax x·c - |c|²/2)"""
+    bias = 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+    return np.argmax(vectors @ centroids.T - bias, axis=1)
+
+
+class ScalarQuantizer:
+    """차원별 대칭 int8 양자화: x ≈ scale * code"""
+
+    def __init__(self, scale: Optional[np.ndarray] = None):
+        self.scale = scale
+
+    def train(self, vectors: np.ndarray) -> None:
+        peak = np.abs(np.asarray(vectors, dtype=np.float32)).max(axis=0)
+        self.scale = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.rint(np.asarray(vectors, dtype=np.float32) / self.scale)
+        return np.clip(codes, -127, 127).astype(np.int8)  # 학습 범위를 넘는 추가 벡터는 잘림
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return codes.astype(np.float32) * self.scale
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """모든 코드와 쿼리의 근사 내적"""
+        scaled = (np.asarray(query, dtype=np.float32) * self.scale).astype(np.float32)
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_CHUNK):
+            out[start:start + SCORE_CHUNK] = codes[start:start + SCORE_CHUNK].astype(np.float32) @ scaled
+        return out
+
+
+class ProductQuantizer:
+    """
+    Product Quantization (부분공간당 256개 중심, uint8 코드)
+
+    코드는 (m, n) 전치 배열로 들고 있어 부분공간별 테이블 조회가 연속 메모리에서 일어납니다.
+    """
+
+    def __init__(self, m: int = 32, n_centroids: int = 256, iterations: int = 15, seed: int = 0):
+        """
+        Args:
+            m: 부분공간 수 (dim의 약수) - 벡터당 바이트 수
+            n_centroids: 부분공간당 중심 수 (≤ 256, uint8 코드)
+            iterations: 부분공간 k-means 반복 수
+            seed: 시드
+        """
+        if not 1 <= n_centroids <= 256:
+            raise ValueError("n_centroids must be between 1 and 256")
+        self.m = m
+        self.n_centroids = n_centroids
+        self.iterations = iterations
+        self.seed = seed
+        self.codebooks: Optional[np.ndarray] = None  # (m, n_centroids, dim / m)
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, dim) → (m, n, dim / m)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape[1] % self.m:
+            raise ValueError(f"Dimension {vectors.shape[1]} is not divisible by m={self.m}")
+        return vectors.reshape(len(vectors), self.m, -1).transpose(1, 0, 2)
+
+    def train(self, vectors: np.ndarray) -> None:
+        parts = self._split(vectors)
+        self.codebooks = np.stack([
+            kmeans(part, self.n_centroids, self.iterations, self.seed + j) for j, part in enumerate(parts)
+        ])
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, dim) → (m, n) uint8 코드"""
+        parts = self._split(vectors)
+        return np.stack([
+            nearest_centroids(part, codebook) for part, codebook in zip(parts, self.codebooks)
+        ]).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """(m, n) 코드 → (n, dim) 근사 벡터"""
+        parts = [codebook[code] for codebook, code in zip(self.codebooks, codes)]
+        return np.concatenate(parts, axis=1)
+
+    def lookup_table(self, query: np.ndarray) -> np.ndarray:
+        """(m, n_centroids) 부분공간별 쿼리-중심 내적"""
+        query_parts = np.asarray(query, dtype=np.float32).reshape(self.m, -1)
+        return np.einsum("mkd,md->mk", self.codebooks, query_parts)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """비대칭 거리 계산(ADC): 테이블 조회 m번의 합"""
+        table = self.lookup_table(query)
+        out = np.take(table[0], codes[0])
+        looked_up = np.empty_like(out)
+        for j in range(1, self.m):
+            np.take(table[j], codes[j], out=looked_up)
+            out += looked_up
+        return out
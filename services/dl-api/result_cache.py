@@ -0,0 +1,261 @@
+"""
+업로드 내용 해시 기반 결과 캐시
+
+같은 사진을 다시 올리는 요청(재시도, 뒤로 가기)은 Detectron2 / VGG16을 다시 돌리지 않고 캐시에서 응답합니다.
+키는 업로드 바이트의 SHA-256 + 모델 버전 + 결과에 영향을 주는 파라미터(카테고리, top_k, 신뢰도 임계값)입니다.
+
+- 메모리 tier: 항목 수(max_entries)와 바이트 수(max_bytes)로 제한하는 LRU
+- 디스크 tier (선택, disk_dir): 메모리에서 밀려난 항목과 재시작 후에도 남는 항목.
+  disk_max_bytes를 넘으면 오래 안 쓴 파일부터 지움. 여러 uvicorn 워커가 같은 디렉터리를 쓰므로
+  크기는 disk_rescan_interval마다 디렉터리를 다시 훑어 다른 프로세스가 쓴 파일까지 셈
+- 항목마다 만료 시간(ttl)을 줄 수 있음. 재고/인덱스에 따라 바뀌는 추천 결과는 짧게,
+  입력과 모델만으로 정해지는 탐지 결과와 쿼리 임베딩은 만료 없이 둠
+
+값은 pickle한 바이트로 저장하므로 크기를 정확히 셀 수 있고, 꺼낸 값을 고쳐도 캐시는 바뀌지 않습니다.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (만료 시각 또는 None, pickle된 값)
+_Entry = Tuple[Optional[float], bytes]
+
+
+def content_digest(contents: bytes) -> str:
+    """업로드 바이트의 SHA-256 (blocking executor에서 실행)"""
+    return hashlib.sha256(contents).hexdigest()
+
+
+def cache_key(namespace: str, digest: str, *params: Any) -> str:
+    """
+    캐시 키: 네임스페이스(detect/features/recommend), 업로드 해시, 모델 버전과 파라미터를 합친 SHA-256
+
+        cache_key("recommend", digest, MODEL_VERSION, category, top_k)
+    """
+    return hashlib.sha256(repr((namespace, digest) + params).encode()).hexdigest()
+
+
+class ResultCache:
+    """메모리 LRU + 선택적 디스크 tier. 여러 스레드에서 호출해도 안전합니다."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+                 disk_dir: Optional[Path] = None, disk_max_bytes: int = 1024 * 1024 * 1024,
+                 disk_rescan_interval: float = 10.0):
+        """
+        Args:
+            max_entries: 메모리에 둘 최대 항목 수 (0이면 캐시 사용 안 함)
+            max_bytes: 메모리에 둘 값의 최대 바이트 수
+            disk_dir: 디스크 tier 디렉터리 (None이면 메모리만)
+            disk_max_bytes: 디스크 tier 최대 바이트 수
+            disk_rescan_interval: 디렉터리 크기를 다시 셀 최소 간격 (초, 0이면 쓸 때마다)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_rescan_interval = disk_rescan_interval
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._disk_scanned_at = 0.0
+
+        # 통계
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = self._disk_usage()
+            self._disk_scanned_at = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """값을 찾아 돌려줍니다 (없거나 만료되면 None). 디스크에서 찾은 값은 메모리로 올림."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] is None or entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return pickle.loads(entry[1])
+                self._drop(key)
+
+        entry = self._disk_get(key, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._memory_put(key, entry)
+        return pickle.loads(entry[1])
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Args:
+            key: cache_key 결과
+            value: pickle 가능한 값
+            ttl: 만료까지 초 (None이면 만료 없음, LRU로만 밀려남)
+        """
+        if not self.enabled:
+            return
+        entry = (time.time() + ttl if ttl else None, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            self._memory_put(key, entry)
+        self._disk_put(key, entry)
+
+    def _memory_put(self, key: str, entry: _Entry) -> None:
+        if len(entry[1]) > self.max_bytes:
+            return
+        if key in self._memory:
+            self._drop(key)
+        self._memory[key] = entry
+        self._memory_bytes += len(entry[1])
+        while len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes:
+            self._drop(next(iter(self._memory)))
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        _, data = self._memory.pop(key)
+        self._memory_bytes -= len(data)
+
+    # 디스크 tier: disk_dir/<키 앞 2글자>/<키>, 내용은 pickle((만료 시각, 값 바이트))
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / key
+
+    def _disk_files(self):
+        return (path for path in self.disk_dir.glob("*/*") if path.is_file() and not path.name.startswith("."))
+
+    def _disk_usage(self) -> int:
+        """디스크 tier 디렉터리의 실제 크기 (다른 워커 프로세스가 쓰고 지운 파일 포함)"""
+        total = 0
+        for path in self._disk_files():
+            try:
+                total += path.stat().st_size
+            except FileNotFoundError:
+                continue
+        return total
+
+    def _disk_get(self, key: str, now: float) -> Optional[_Entry]:
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cache file {path}: {str(e)}")
+            self._disk_remove(path)
+            return None
+        if entry[0] is not None and entry[0] <= now:
+            self._disk_remove(path)
+            return None
+        try:
+            os.utime(path)  # 최근 사용 시각 = 디스크 tier LRU 기준
+        except FileNotFoundError:
+            # 읽는 사이 다른 워커가 지움 - 미스로 처리
+            return None
+        return entry
+
+    def _disk_put(self, key: str, entry: _Entry) -> None:
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            # 다른 워커가 읽는 중에도 반쯤 쓴 파일이 보이지 않도록 임시 파일에 쓰고 교체
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            previous = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache file {path}: {str(e)}")
+            return
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:  # 바로 다른 워커가 지움
+            size = 0
+        with self._lock:
+            self._disk_bytes += size - previous
+            over = self._disk_bytes > self.disk_max_bytes
+            rescan = not over and time.monotonic() - self._disk_scanned_at >= self.disk_rescan_interval
+        if rescan:
+            # 이 프로세스의 집계만으로는 한도 아래여도 다른 워커가 쓴 파일로 넘었을 수 있음
+            total = self._disk_usage()
+            with self._lock:
+                self._disk_bytes = total
+                self._disk_scanned_at = time.monotonic()
+                over = total > self.disk_max_bytes
+        if over:
+            self._disk_evict()
+
+    def _disk_remove(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._disk_bytes -= size
+
+    def _disk_evict(self) -> None:
+        """오래 안 쓴 파일부터 지워 disk_max_bytes의 90% 아래로 줄임"""
+        files = []
+        for path in self._disk_files():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        target = self.disk_max_bytes * 0.9
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+        with self._lock:
+            self._disk_bytes = total
+            self._disk_scanned_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._memory),
+                "bytes": self._memory_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "disk_bytes": self._disk_bytes if self.disk_dir is not None else None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from ann_index import IVFIndex, PQIndex, SQ8Index, create_ann_index, load_ann_index, save_ann_index
+from embedding_store import EmbeddingStore, normalize_rows
+
+DIM = 32
+K = 10
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    """군집된 정규화 벡터 2000개와 그 근처의 쿼리 50개 (benchmarks/ann_bench.py와 같은 방식)"""
+    rng = np.random.default_rng(0)
+    centers = normalize_rows(rng.standard_normal((20, DIM)).astype(np.float32))
+    vectors = normalize_rows(centers[rng.integers(0, len(centers), 2000)]
+                             + rng.standard_normal((2000, DIM)).astype(np.float32) * 0.1)
+    queries = normalize_rows(vectors[rng.integers(0, len(vectors), 50)]
+                             + rng.standard_normal((50, DIM)).astype(np.float32) * 0.05)
+    labels = [f"p-{i:05d}" for i in range(len(vectors))]
+    return vectors, labels, queries
+
+
+def recall(index, dataset, fetch=K):
+    """정확한 top-K 중 인덱스가 고른 fetch개 후보에 든 비율"""
+    vectors, labels, queries = dataset
+    labels = np.asarray(labels)
+    hits = 0
+    for query in queries:
+        truth = set(labels[np.argsort(-(vectors @ query), kind="stable")[:K]])
+        found, _ = index.search(query, fetch)
+        hits += len(truth & set(found.tolist()))
+    return hits / (K * len(queries))
+
+
+def built(index, dataset):
+    vectors, labels, _ = dataset
+    index.build(vectors, labels)
+    return index
+
+
+class TestAnnIndex:
+    """Test the NumPy ANN backends: recall on clustered data, incremental adds and save/load."""
+
+    @pytest.mark.parametrize("index, fetch, min_recall", [
+        (IVFIndex(nlist=40, nprobe=8), K, 0.9),
+        (SQ8Index(), K, 0.95),
+        # pq 근사 점수는 거칠어서 저장소처럼 top_k보다 많은 후보를 받아 재순위하는 것을 전제로 함
+        (PQIndex(m=8, train_size=2000), 5 * K, 0.95),
+    ], ids=["ivf", "sq8", "pq"])
+    def test_recall_above_threshold(self, dataset, index, fetch, min_recall):
+        """Test that each backend finds most of the exact top-k on clustered vectors."""
+        assert recall(built(index, dataset), dataset, fetch) >= min_recall
+
+    def test_ivf_full_probe_is_exact(self, dataset):
+        """Test that probing every IVF list returns the exact top-k and scores."""
+        vectors, labels, queries = dataset
+        index = built(IVFIndex(nlist=16, nprobe=16), dataset)
+        for query in queries[:10]:
+            scores = vectors @ query
+            expected = np.argsort(-scores, kind="stable")[:K]
+            found, found_scores = index.search(query, K)
+            assert set(found.tolist()) == {labels[i] for i in expected}
+            np.testing.assert_allclose(np.sort(found_scores)[::-1], scores[expected], rtol=1e-5)
+
+    @pytest.mark.parametrize("kind", ["ivf", "sq8", "pq"])
+    def test_add_without_retraining(self, dataset, kind):
+        """Test that vectors added after build are searchable."""
+        vectors, labels, _ = dataset
+        params = {"pq": {"m": 8, "train_size": 2000}}.get(kind, {})
+        index = create_ann_index(kind, **params)
+        index.build(vectors[:1500], labels[:1500])
+        index.add(vectors[1500:], labels[1500:])
+
+        assert len(index) == len(vectors)
+        for row in (1500, 1700, 1999):
+            found, _ = index.search(vectors[row], 5)
+            assert labels[row] in found.tolist()
+
+    @pytest.mark.parametrize("kind", ["ivf", "sq8", "pq"])
+    def test_save_load_round_trip(self, dataset, tmp_path, kind):
+        """Test that a saved index loads as the same backend and returns the same results."""
+        _, _, queries = dataset
+        params = {"ivf": {"nprobe": 4}, "pq": {"m": 8, "train_size": 2000}}.get(kind, {})
+        index = built(create_ann_index(kind, **params), dataset)
+        save_ann_index(index, tmp_path / "ann")
+        loaded = load_ann_index(tmp_path / "ann")
+
+        assert type(loaded) is type(index) and len(loaded) == len(index)
+        for query in queries[:5]:
+            expected, expected_scores = index.search(query, K)
+            found, found_scores = loaded.search(query, K)
+            assert found.tolist() == expected.tolist()
+            np.testing.assert_allclose(found_scores, expected_scores, rtol=1e-6)
+
+    def test_missing_index_loads_as_none(self, tmp_path):
+        """Test that loading a directory without an index returns None."""
+        assert load_ann_index(tmp_path / "ann") is None
+
+    def test_unknown_kind_rejected(self):
+        """Test that an unknown ANN_INDEX name raises ValueError."""
+        with pytest.raises(ValueError):
+            create_ann_index("annoy")
+
+    def test_store_reranks_ann_candidates(self, dataset):
+        """Test that a store with an attached index returns exact scores for the candidates it finds."""
+        vectors, labels, queries = dataset
+        store = EmbeddingStore.from_products((label, "chair", "", vector[None])
+                                             for label, vector in zip(labels, vectors))
+        exact = [store.search(query, top_k=5) for query in queries[:10]]
+        store.attach_index(built(IVFIndex(nlist=40, nprobe=40), dataset), candidates=10)
+
+        for query, expected in zip(queries[:10], exact):
+            found = store.search(query, top_k=5)
+            assert [pid for pid, _ in found] == [pid for pid, _ in expected]
+            np.testing.assert_allclose([s for _, s in found], [s for _, s in expected], rtol=1e-5)
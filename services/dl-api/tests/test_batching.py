@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from batching import MicroBatcher
+
+
+class RecordingBatchFn:
+    """입력 리스트를 기록하고 입력별 결과를 돌려주는 stub 모델"""
+
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.fail_on = fail_on
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        if self.fail_on is not None and self.fail_on in items:
+            raise ValueError(f"bad input {self.fail_on}")
+        return [item * 10 for item in items]
+
+
+class TestMicroBatcher:
+    """Test MicroBatcher batching, ordering and failure isolation."""
+
+    def test_submit_many_keeps_input_order_across_batches(self):
+        """Test that results come back in input order when items span several batches."""
+        batch_fn = RecordingBatchFn()
+
+        async def scenario():
+            batcher = MicroBatcher("test", batch_fn, max_batch_size=4, max_wait_ms=50)
+            try:
+                return await batcher.submit_many(list(range(10)))
+            finally:
+                await batcher.stop()
+
+        assert asyncio.run(scenario()) == [item * 10 for item in range(10)]
+        assert batch_fn.batches == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+
+    def test_concurrent_submits_share_a_batch(self):
+        """Test that requests arriving within max_wait_ms are run as one batch in arrival order."""
+        batch_fn = RecordingBatchFn()
+
+        async def scenario():
+            batcher = MicroBatcher("test", batch_fn, max_batch_size=8, max_wait_ms=50)
+            try:
+                return await asyncio.gather(*(batcher.submit(item) for item in range(5)))
+            finally:
+                await batcher.stop()
+
+        assert asyncio.run(scenario()) == [0, 10, 20, 30, 40]
+        assert batch_fn.batches == [[0, 1, 2, 3, 4]]
+
+    def test_full_batch_runs_without_waiting(self):
+        """Test that a full batch is not held back for max_wait_ms."""
+        batch_fn = RecordingBatchFn()
+
+        async def scenario():
+            batcher = MicroBatcher("test", batch_fn, max_batch_size=2, max_wait_ms=10_000)
+            try:
+                return await asyncio.wait_for(batcher.submit_many([1, 2]), timeout=5)
+            finally:
+                await batcher.stop()
+
+        assert asyncio.run(scenario()) == [10, 20]
+
+    def test_failed_batch_retries_items_one_at_a_time(self):
+        """Test that one bad input fails only its own request."""
+        batch_fn = RecordingBatchFn(fail_on=3)
+
+        async def scenario():
+            batcher = MicroBatcher("test", batch_fn, max_batch_size=8, max_wait_ms=50)
+            try:
+                results = await asyncio.gather(*(batcher.submit(item) for item in (1, 2, 3, 4)),
+                                               return_exceptions=True)
+                return results, batcher.failed_batches
+            finally:
+                await batcher.stop()
+
+        results, failed_batches = asyncio.run(scenario())
+
+        assert results[:2] == [10, 20]
+        assert isinstance(results[2], ValueError)
+        assert results[3] == 40
+        assert failed_batches == 1
+        assert batch_fn.batches == [[1, 2, 3, 4], [1], [2], [3], [4]]
+
+    def test_wrong_result_count_fails_the_batch(self):
+        """Test that a batch_fn returning too few results is treated as a failed batch."""
+        async def scenario():
+            batcher = MicroBatcher("test", lambda items: [0], max_batch_size=8, max_wait_ms=50)
+            try:
+                return await asyncio.gather(batcher.submit(1), batcher.submit(2))
+            finally:
+                await batcher.stop()
+
+        # 하나씩 다시 실행하면 결과가 하나씩 나오므로 요청은 성공
+        assert asyncio.run(scenario()) == [0, 0]
+
+    def test_stop_cancels_pending_requests(self):
+        """Test that requests still waiting for a batch are cancelled on shutdown."""
+        async def scenario():
+            batcher = MicroBatcher("test", RecordingBatchFn(), max_batch_size=8, max_wait_ms=10_000)
+            pending = asyncio.ensure_future(batcher.submit(1))
+            await asyncio.sleep(0.01)
+            await batcher.stop()
+            with pytest.raises(asyncio.CancelledError):
+                await pending
+
+        asyncio.run(scenario())
@@ -0,0 +1,124 @@
+import cv2
+import numpy as np
+import pytest
+
+# main은 탐지(torch/detectron2)와 특성 추출(tensorflow) 모듈을 import하므로 둘 다 있어야 함
+pytest.importorskip("torch")
+pytest.importorskip("tensorflow")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from database import get_db  # noqa: E402
+from models import DetectionItem, FurnitureItem  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+
+
+class StubDetectionBatcher:
+    def __init__(self, detections):
+        self.detections = detections
+        self.images = []
+
+    async def submit(self, image):
+        self.images.append(image)
+        return list(self.detections)
+
+
+class StubFeatureBatcher:
+    def __init__(self):
+        self.calls = []
+
+    async def submit_many(self, crops):
+        self.calls.append([crop.shape for crop in crops])
+        return [np.full(4, i, dtype=np.float32) for i in range(len(crops))]
+
+
+class StubSimilarity:
+    def __init__(self):
+        self.calls = []
+
+    def recommend_for_features_batch(self, query_features, db, categories=None, top_k=5):
+        self.calls.append({"queries": len(query_features), "categories": categories, "top_k": top_k})
+        return [
+            [FurnitureItem(id=f"{category}-{i}", name=category, category=category, price=1.0, image_url="",
+                           product_url="", similarity_score=1.0 - i / 10) for i in range(top_k)]
+            for category in categories
+        ]
+
+
+def upload(width=200, height=100, seed=0):
+    image = np.random.default_rng(seed).integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    return {"file": ("room.png", cv2.imencode(".png", image)[1].tobytes(), "image/png")}
+
+
+@pytest.fixture
+def stubs(monkeypatch):
+    detections = [
+        DetectionItem(category="sofa", confidence=0.95, bbox=[10, 20, 110, 80]),
+        DetectionItem(category="chair", confidence=0.9, bbox=[300, 20, 350, 60]),  # 이미지 밖 → 빈 crop
+        DetectionItem(category="lamp", confidence=0.8, bbox=[150.7, 0, 200, 40.2]),
+    ]
+    detection_batcher, feature_batcher, similarity = (
+        StubDetectionBatcher(detections), StubFeatureBatcher(), StubSimilarity())
+    monkeypatch.setattr(main, "detection_batcher", detection_batcher)
+    monkeypatch.setattr(main, "feature_batcher", feature_batcher)
+    monkeypatch.setattr(main, "similarity_model", similarity)
+    monkeypatch.setattr(main, "result_cache", ResultCache())
+    main.app.dependency_overrides[get_db] = lambda: None
+    yield detection_batcher, feature_batcher, similarity
+    main.app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def client():
+    # with 블록 없이 만들어 startup의 모델 로드를 건너뜀
+    return TestClient(main.app)
+
+
+class TestDetectAndRecommend:
+    """Test /detect-and-recommend with stubbed detection, feature and search backends."""
+
+    def test_recommends_for_each_non_empty_crop(self, client, stubs):
+        """Test that every detection with a non-empty crop gets recommendations from one feature batch."""
+        _, feature_batcher, similarity = stubs
+
+        response = client.post("/detect-and-recommend", files=upload(), params={"top_k": 2})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["total_count"] == 2
+        assert [result["detection"]["category"] for result in body["results"]] == ["sofa", "lamp"]
+        assert [[item["id"] for item in result["recommendations"]] for result in body["results"]] == [
+            ["sofa-0", "sofa-1"], ["lamp-0", "lamp-1"]]
+        assert feature_batcher.calls == [[(60, 100, 3), (40, 50, 3)]]
+        assert similarity.calls == [{"queries": 2, "categories": ["sofa", "lamp"], "top_k": 2}]
+
+    def test_limits_detections(self, client, stubs, monkeypatch):
+        """Test that only the DETECT_RECOMMEND_MAX_DETECTIONS most confident detections are used."""
+        monkeypatch.setattr(main, "DETECT_RECOMMEND_MAX_DETECTIONS", 1)
+
+        body = client.post("/detect-and-recommend", files=upload()).json()
+
+        assert [result["detection"]["category"] for result in body["results"]] == ["sofa"]
+        assert len(body["results"][0]["recommendations"]) == main.DEFAULT_TOP_K
+
+    def test_reuses_cached_detections(self, client, stubs):
+        """Test that the same upload is detected once and later served from the detection cache."""
+        detection_batcher, feature_batcher, _ = stubs
+
+        first = client.post("/detect-and-recommend", files=upload(seed=1)).json()
+        second = client.post("/detect-and-recommend", files=upload(seed=1)).json()
+
+        assert len(detection_batcher.images) == 1
+        assert len(feature_batcher.calls) == 2
+        assert first == second
+
+    @pytest.mark.parametrize("top_k", [0, main.MAX_TOP_K + 1])
+    def test_rejects_out_of_range_top_k(self, client, stubs, top_k):
+        """Test that top_k outside 1..MAX_TOP_K is rejected before any inference."""
+        detection_batcher, _, _ = stubs
+
+        response = client.post("/detect-and-recommend", files=upload(), params={"top_k": top_k})
+
+        assert response.status_code == 422
+        assert detection_batcher.images == []
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from detection_postprocess import COCO_TO_FURNITURE, build_category_lut, postprocess_detections
+from models import DetectionItem
+
+FURNITURE_CLASSES = {56: 'chair', 57: 'couch', 58: 'potted plant', 59: 'bed', 60: 'dining table', 61: 'toilet'}
+
+
+def per_image_detections(pred_classes, boxes, scores):
+    """예전 이미지별 후처리: 인스턴스마다 매핑해 DetectionItem을 만들고 신뢰도 내림차순 (stable) 정렬"""
+    detections = []
+    for class_id, box, score in zip(pred_classes.tolist(), boxes, scores):
+        if class_id in FURNITURE_CLASSES:
+            category = COCO_TO_FURNITURE.get(FURNITURE_CLASSES[class_id], 'unknown')
+            detections.append(DetectionItem(category=category, confidence=float(score), bbox=box.tolist()))
+    detections.sort(key=lambda item: item.confidence, reverse=True)
+    return detections
+
+
+def make_outputs(counts, seed=0):
+    """이미지별 (classes, boxes, scores). 가구/비가구 클래스와 같은 점수를 섞음"""
+    rng = np.random.default_rng(seed)
+    outputs = []
+    for n in counts:
+        classes = np.where(rng.random(n) < 0.6, rng.choice(sorted(FURNITURE_CLASSES), n), rng.integers(0, 80, n))
+        scores = np.round(rng.uniform(0.7, 1.0, n), 2).astype(np.float32)  # 반올림으로 동점을 만듦
+        corners = rng.uniform(0, 500, (n, 2)).astype(np.float32)
+        boxes = np.concatenate([corners, corners + rng.uniform(5, 200, (n, 2)).astype(np.float32)], axis=1)
+        outputs.append((classes.astype(np.int64), boxes.reshape(n, 4), scores))
+    return outputs
+
+
+def batched(outputs):
+    counts = [len(classes) for classes, _, _ in outputs]
+    return (np.concatenate([o[0] for o in outputs]), np.concatenate([o[2] for o in outputs]),
+            np.concatenate([o[1] for o in outputs]).reshape(-1, 4), counts)
+
+
+class TestDetectionPostprocess:
+    """Test that batched post-processing matches the per-image path."""
+
+    @pytest.mark.parametrize("counts", [[30], [12, 0, 40, 1, 7], [0, 0]])
+    def test_matches_per_image_path(self, counts):
+        """Test that every image gets the same detections, in the same order, as processing it alone."""
+        outputs = make_outputs(counts)
+        lut, names = build_category_lut(FURNITURE_CLASSES)
+        classes, scores, boxes, counts = batched(outputs)
+
+        found = postprocess_detections(classes, scores, boxes, counts, lut, names)
+
+        assert len(found) == len(outputs)
+        for items, output in zip(found, outputs):
+            assert [item.model_dump() for item in items] == [item.model_dump() for item in per_image_detections(*output)]
+
+    def test_ties_keep_model_order(self):
+        """Test that detections with equal scores keep the model output order."""
+        lut, names = build_category_lut(FURNITURE_CLASSES)
+        classes = np.array([56, 59, 1, 57], dtype=np.int64)
+        scores = np.array([0.8, 0.9, 0.95, 0.8], dtype=np.float32)
+        boxes = np.arange(16, dtype=np.float32).reshape(4, 4)
+
+        [items] = postprocess_detections(classes, scores, boxes, [4], lut, names)
+
+        assert [item.category for item in items] == ['bed', 'chair', 'sofa']
+        assert items[1].bbox == [0.0, 1.0, 2.0, 3.0]
+
+    def test_category_lut(self):
+        """Test that COCO classes map to furniture categories and everything else to -1."""
+        lut, names = build_category_lut(FURNITURE_CLASSES)
+
+        assert names[lut[57]] == 'sofa' and names[lut[58]] == 'lamp' and names[lut[60]] == 'table'
+        assert names[lut[61]] == 'unknown'
+        assert lut[0] == -1 and (lut >= 0).sum() == len(FURNITURE_CLASSES)
@@ -0,0 +1,143 @@
+import json
+
+import numpy as np
+import pytest
+
+import embedding_store
+from embedding_store import MANIFEST_NAME, EmbeddingStore, PartitionedStore, normalize_rows
+
+DIM = 8
+
+
+def vectors(seed, n_images=1):
+    return normalize_rows(np.random.default_rng(seed).standard_normal((n_images, DIM)).astype(np.float32))
+
+
+def product(product_id, category="chair", seed=None, n_images=1, fingerprint="f"):
+    seed = int(product_id.split("-")[-1]) if seed is None else seed
+    return product_id, category, fingerprint, vectors(seed, n_images)
+
+
+def exact_search(products, query, top_k):
+    """상품별 이미지 최대 내적 → (점수 내림차순, id 오름차순)"""
+    scores = {pid: float((normalize_rows(vecs) @ query).max()) for pid, _, _, vecs in products}
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+
+
+def assert_same_results(found, expected):
+    assert [pid for pid, _ in found] == [pid for pid, _ in expected]
+    np.testing.assert_allclose([score for _, score in found], [score for _, score in expected], rtol=1e-5)
+
+
+class TestEmbeddingStore:
+    """Test the segmented embedding store: append, search, removal and reload from disk."""
+
+    def test_append_search_reload_round_trip(self, tmp_path):
+        """Test that appended products are found by search and survive a reload."""
+        first = [product(f"p-{i}", n_images=1 + i % 3) for i in range(10)]
+        second = [product(f"p-{i}", category="sofa") for i in range(10, 20)]
+        EmbeddingStore.append(tmp_path, first)
+        store = EmbeddingStore.append(tmp_path, second)
+        query = vectors(3)[0]
+
+        assert len(store) == 20 and store.dim == DIM
+        assert store.n_vectors == sum(len(vecs) for *_, vecs in first + second)
+        expected = exact_search(first + second, query, 5)
+        for loaded in (store, EmbeddingStore.load(tmp_path)):
+            assert_same_results(loaded.search(query, top_k=5), expected)
+
+    def test_category_filter(self, tmp_path):
+        """Test that a category search only returns products of that category."""
+        products = [product(f"p-{i}", category="Chair" if i % 2 else "sofa") for i in range(10)]
+        store = EmbeddingStore.append(tmp_path, products)
+
+        found = store.search(vectors(0)[0], top_k=10, category="CHAIR")
+        assert sorted(pid for pid, _ in found) == [f"p-{i}" for i in range(1, 10, 2)]
+
+    def test_replace_and_remove(self, tmp_path):
+        """Test that re-appending a product replaces its vectors and remove drops it."""
+        EmbeddingStore.append(tmp_path, [product(f"p-{i}") for i in range(12)])
+        replaced = product("p-1", seed=99, n_images=2, fingerprint="g")
+        store = EmbeddingStore.append(tmp_path, [replaced], remove=["p-3"])
+
+        assert "p-3" not in store.product_ids.tolist() and len(store) == 11
+        assert store.fingerprints[store.product_ids == "p-1"].tolist() == ["g"]
+        assert store.dead_rows == 2
+        found = store.search(vectors(99)[0], top_k=1)
+        assert found[0][0] == "p-1" and found[0][1] == pytest.approx(1.0, abs=1e-5)
+        assert "p-3" not in [pid for pid, _ in EmbeddingStore.load(tmp_path).search(vectors(3)[0], top_k=4)]
+
+    def test_compaction_drops_dead_rows(self, tmp_path, monkeypatch):
+        """Test that append compacts into one segment once enough rows are dead."""
+        monkeypatch.setattr(embedding_store, "COMPACT_DEAD_FRACTION", 0.1)
+        EmbeddingStore.append(tmp_path, [product(f"p-{i}") for i in range(10)])
+        store = EmbeddingStore.append(tmp_path, [product("p-0", seed=50), product("p-1", seed=51)])
+
+        assert store.dead_rows == 0
+        assert len(store.segment_files) == 1
+        assert sorted(entry.name for entry in tmp_path.glob("vectors-*.npy")) == store.segment_files
+        assert store.search(vectors(50)[0], top_k=1)[0][0] == "p-0"
+
+    def test_dimension_mismatch_rejected(self, tmp_path):
+        """Test that vectors of another dimension cannot be appended."""
+        EmbeddingStore.append(tmp_path, [product("p-0")])
+        with pytest.raises(ValueError):
+            EmbeddingStore.append(tmp_path, [("p-1", "chair", "f", np.ones((1, DIM * 2), dtype=np.float32))])
+
+
+class TestPartitionedStore:
+    """Test the category-sharded store: merged search, category moves and the manifest."""
+
+    def test_merged_search_matches_single_store(self, tmp_path):
+        """Test that searching every shard returns the same ranking as one unsharded store."""
+        products = [product(f"p-{i}", category=["chair", "sofa", "bed"][i % 3], n_images=1 + i % 2)
+                    for i in range(30)]
+        PartitionedStore.append(tmp_path, products, model_version="v1")
+        store = PartitionedStore.load(tmp_path)
+        single = EmbeddingStore.from_products(products)
+
+        assert sorted(store.shards) == ["bed", "chair", "sofa"]
+        for seed in range(5):
+            query = vectors(100 + seed)[0]
+            assert_same_results(store.search(query, top_k=7), single.search(query, top_k=7))
+            assert_same_results(store.search(query, top_k=3, category="Sofa"),
+                                single.search(query, top_k=3, category="sofa"))
+
+    def test_category_change_moves_product(self, tmp_path):
+        """Test that a product appended under a new category leaves its old shard, and empty shards are dropped."""
+        PartitionedStore.append(tmp_path, [product("p-0", "chair"), product("p-1", "sofa")], model_version="v1")
+        store = PartitionedStore.append(tmp_path, [product("p-1", "chair")], model_version="v1")
+
+        assert list(store.shards) == ["chair"]
+        assert store.product_index() == {"p-0": ("chair", "f"), "p-1": ("chair", "f")}
+        assert [entry.name for entry in tmp_path.glob("shard-*")] == [store.shard_dirs["chair"]]
+
+    def test_manifest_records_model_version_and_dim(self, tmp_path):
+        """Test that the manifest records the embedding model and dimension, and append rejects a mismatch."""
+        PartitionedStore.append(tmp_path, [product("p-0")], model_version="v1")
+        with open(tmp_path / MANIFEST_NAME) as f:
+            manifest = json.load(f)
+
+        assert manifest["model_version"] == "v1" and manifest["dim"] == DIM
+        assert PartitionedStore.read_model_version(tmp_path) == "v1"
+        with pytest.raises(ValueError):
+            PartitionedStore.append(tmp_path, [product("p-1")], model_version="v2")
+        with pytest.raises(ValueError):
+            PartitionedStore.append(tmp_path, [("p-2", "sofa", "f", np.ones((1, DIM * 2), dtype=np.float32))],
+                                    model_version="v1")
+        assert PartitionedStore.load(tmp_path).product_index() == {"p-0": ("chair", "f")}
+
+    def test_save_writes_fresh_shard_dirs(self, tmp_path):
+        """Test that saving over a live store writes new shard directories instead of overwriting mapped ones."""
+        PartitionedStore.append(tmp_path, [product(f"p-{i}", ["chair", "sofa"][i % 2]) for i in range(6)],
+                                model_version="v1")
+        store = PartitionedStore.load(tmp_path)
+        old_dirs = set(store.shard_dirs.values())
+        store.save(tmp_path)
+        saved = PartitionedStore.load(tmp_path)
+
+        assert not old_dirs & set(saved.shard_dirs.values())
+        assert {entry.name for entry in tmp_path.glob("shard-*")} == set(saved.shard_dirs.values())
+        assert saved.model_version == "v1"
+        query = vectors(7)[0]
+        assert saved.search(query, top_k=6) == store.search(query, top_k=6)
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from executors import Overloaded, RequestLimiter
+
+
+class TestRequestLimiter:
+    """Test the concurrency and queue limits that back the 503 responses."""
+
+    def test_rejects_when_active_and_queue_are_full(self):
+        """Test that a request is rejected with Overloaded once both limits are reached."""
+        async def scenario():
+            limiter = RequestLimiter(max_concurrent=1, max_queued=1)
+            release = asyncio.Event()
+
+            async def hold():
+                async with limiter:
+                    await release.wait()
+
+            active = asyncio.ensure_future(hold())
+            queued = asyncio.ensure_future(hold())
+            await asyncio.sleep(0.01)
+            assert (limiter.active, limiter.waiting) == (1, 1)
+
+            with pytest.raises(Overloaded):
+                async with limiter:
+                    pass
+
+            release.set()
+            await asyncio.gather(active, queued)
+            return limiter.stats()
+
+        stats = asyncio.run(scenario())
+
+        assert stats["rejected"] == 1
+        assert (stats["active"], stats["waiting"]) == (0, 0)
+
+    def test_queued_requests_run_after_release(self):
+        """Test that requests within max_queued wait for a slot instead of failing."""
+        async def scenario():
+            limiter = RequestLimiter(max_concurrent=2, max_queued=8)
+            running, peak = 0, 0
+
+            async def work():
+                nonlocal running, peak
+                async with limiter:
+                    running += 1
+                    peak = max(peak, running)
+                    await asyncio.sleep(0.01)
+                    running -= 1
+
+            await asyncio.gather(*(work() for _ in range(10)))
+            return peak, limiter.rejected
+
+        assert asyncio.run(scenario()) == (2, 0)
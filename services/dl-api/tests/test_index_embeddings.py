@@ -0,0 +1,224 @@
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, text
+
+from embedding_store import PartitionedStore
+from image_fetcher import LocalImageFetcher
+from jobs import index_embeddings
+from jobs.index_embeddings import _embed_batch, _init_worker, fingerprint, run, vgg_embedder
+
+
+def color_embedder():
+    """VGG 대신 워커에서 만드는 임베더: 채널 평균/표준편차 (spawn으로 넘기려면 모듈 최상위 함수)"""
+    def embed(images):
+        features = [np.concatenate([image.reshape(-1, 3).mean(axis=0), image.reshape(-1, 3).std(axis=0)])
+                    for image in images]
+        vectors = np.asarray(features, dtype=np.float32) + 1.0
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    return embed
+
+
+def crashing_embedder():
+    """검은 이미지를 만나면 실패하는 임베더 (인덱서가 중간에 죽는 경우)"""
+    embed = color_embedder()
+
+    def crash_on_black(images):
+        if any(image.max() == 0 for image in images):
+            raise RuntimeError("worker crashed")
+        return embed(images)
+
+    return crash_on_black
+
+
+def write_image(root, name, seed):
+    image = np.random.default_rng(seed).integers(0, 256, size=(32, 32, 3), dtype=np.uint8)
+    cv2.imwrite(str(root / name), image)
+    return name
+
+
+def write_black_image(root, name):
+    cv2.imwrite(str(root / name), np.zeros((32, 32, 3), dtype=np.uint8))
+    return name
+
+
+def make_engine(path, products):
+    """products / categories 테이블만 있는 SQLite DB. products: (id, 카테고리, 이미지 URL 목록)"""
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE categories (id TEXT PRIMARY KEY, name TEXT)"))
+        conn.execute(text("CREATE TABLE products (id TEXT PRIMARY KEY, images TEXT, category_id TEXT)"))
+    set_products(engine, products)
+    return engine
+
+
+def set_products(engine, products):
+    """products 테이블 내용을 바꿉니다"""
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM products"))
+        conn.execute(text("DELETE FROM categories"))
+        for category in sorted({category for _, category, _ in products}):
+            conn.execute(text("INSERT INTO categories VALUES (:id, :name)"), {"id": f"c-{category}", "name": category})
+        for product_id, category, urls in products:
+            conn.execute(text("INSERT INTO products VALUES (:id, :images, :category_id)"),
+                         {"id": product_id, "images": json.dumps(urls), "category_id": f"c-{category}"})
+
+
+def embed_in_new_worker(fetcher, embedder_factory, products):
+    """워커 프로세스를 새로 띄워 (모델을 새로 로드해) 상품 배치를 임베딩"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(fetcher, embedder_factory)) as pool:
+        results, failed = pool.submit(_embed_batch, products, 4).result()
+    assert failed == 0
+    return results[0][3]
+
+
+@pytest.fixture
+def image_root(tmp_path):
+    root = tmp_path / "images"
+    root.mkdir()
+    return root
+
+
+@pytest.fixture
+def indexer(tmp_path, image_root):
+    """상품 10개(이미지 1~2장, 카테고리 3개)와 그 DB, 인덱서 실행 함수"""
+    products = [(f"p-{i:02d}", ["chair", "sofa", "bed"][i % 3],
+                 [write_image(image_root, f"{i}-{j}.png", 10 * i + j) for j in range(1 + i % 2)])
+                for i in range(10)]
+    engine = make_engine(tmp_path / "products.db", products)
+    fetcher = LocalImageFetcher(str(image_root))
+
+    def index(full=False, embedder_factory=color_embedder, model_version="color-v1"):
+        return run(engine, fetcher, store_path=tmp_path / "store", staging_dir=tmp_path / "staging",
+                   batch_size=1, workers=1, full=full, embedder_factory=embedder_factory,
+                   model_version=model_version)
+
+    index.engine, index.products = engine, products
+    index.store_path, index.staging_dir = tmp_path / "store", tmp_path / "staging"
+    return index
+
+
+@pytest.fixture
+def vgg_weights():
+    """VGG16 imagenet 가중치를 받아 둡니다 (TensorFlow나 가중치를 받을 수 없으면 skip)"""
+    tf = pytest.importorskip("tensorflow")
+    try:
+        tf.keras.applications.VGG16(weights="imagenet", include_top=False)
+    except Exception as e:
+        pytest.skip(f"VGG16 imagenet weights unavailable: {e}")
+
+
+class TestWorkerDeterminism:
+    """Test that every indexer worker process produces the same vector for the same image"""
+
+    def test_vgg_vectors_match_across_worker_processes(self, vgg_weights, image_root):
+        """Test that two freshly spawned workers loading the VGG16 embedder return equal vectors."""
+        urls = [write_image(image_root, "chair.png", 0)]
+        product = ("p1", "chair", fingerprint(urls), urls)
+        fetcher = LocalImageFetcher(str(image_root))
+
+        first = embed_in_new_worker(fetcher, vgg_embedder, [product])
+        second = embed_in_new_worker(fetcher, vgg_embedder, [product])
+
+        assert first.shape == (1, 512)
+        np.testing.assert_allclose(first, second, rtol=1e-5, atol=1e-6)
+
+    def test_same_image_in_two_workers_stores_equal_vectors(self, tmp_path, image_root):
+        """Test that two products sharing an image get equal vectors when embedded by different workers."""
+        shared = write_image(image_root, "shared.png", 0)
+        engine = make_engine(tmp_path / "products.db", [("p1", "chair", [shared]), ("p2", "sofa", [shared])])
+
+        stats = run(engine, LocalImageFetcher(str(image_root)), store_path=tmp_path / "store",
+                    staging_dir=tmp_path / "staging", batch_size=1, workers=2,
+                    embedder_factory=color_embedder, model_version="color-v1")
+
+        store = PartitionedStore.load(tmp_path / "store")
+        assert stats["embedded"] == 2
+        np.testing.assert_array_equal(store.product_vectors("chair", "p1"), store.product_vectors("sofa", "p2"))
+
+
+class TestIndexer:
+    """Test incremental, full and resumed indexer runs against a SQLite products table."""
+
+    def test_incremental_run_reuses_unchanged_products(self, indexer, image_root):
+        """Test that a second run only embeds changed products, moves recategorized ones and drops deleted ones."""
+        first = indexer()
+        assert first["embedded"] == 10 and first["products"] == 10
+
+        products = dict((pid, (category, urls)) for pid, category, urls in indexer.products)
+        products["p-01"] = ("sofa", [write_image(image_root, "new.png", 99)])  # 이미지 변경
+        products["p-02"] = ("chair", products["p-02"][1])  # 카테고리만 변경
+        del products["p-03"]
+        set_products(indexer.engine, [(pid, category, urls) for pid, (category, urls) in products.items()])
+        before = PartitionedStore.load(indexer.store_path)
+        second = indexer()
+
+        assert second == {"products": 9, "embedded": 1, "reused": 7, "moved": 1, "failed_images": 0, "removed": 1}
+        store = PartitionedStore.load(indexer.store_path)
+        index = store.product_index()
+        assert "p-03" not in index and index["p-02"][0] == "chair"
+        np.testing.assert_array_equal(store.product_vectors("chair", "p-02"), before.product_vectors("bed", "p-02"))
+        assert store.search(color_embedder()([cv2.imread(str(image_root / "new.png"))])[0], top_k=1)[0][0] == "p-01"
+        assert all((indexer.store_path / name / "ann").exists() for name in store.shard_dirs.values())
+
+    def test_resume_after_crash(self, indexer, image_root, monkeypatch):
+        """Test that a crashed run keeps what it appended and the next run embeds only the rest."""
+        monkeypatch.setattr(index_embeddings, "APPEND_EVERY", 1)
+        broken = [(pid, category, [write_black_image(image_root, "black.png")] if pid == "p-06" else urls)
+                  for pid, category, urls in indexer.products]
+        set_products(indexer.engine, broken)
+        with pytest.raises(RuntimeError):
+            indexer(embedder_factory=crashing_embedder)
+        assert sorted(PartitionedStore.load(indexer.store_path).product_index()) == [f"p-{i:02d}" for i in range(6)]
+
+        stats = indexer()
+
+        assert stats["embedded"] == 4 and stats["reused"] == 6 and stats["products"] == 10
+
+    def test_full_run_rebuilds_through_staging(self, indexer):
+        """Test that a full run re-embeds everything into staging, swaps it in and removes staging."""
+        indexer()
+        stats = indexer(full=True)
+
+        assert stats["embedded"] == 10 and stats["reused"] == 0
+        assert not indexer.staging_dir.exists()
+        assert len(PartitionedStore.load(indexer.store_path)) == 10
+
+    def test_full_run_resumes_from_staging(self, indexer, image_root, monkeypatch):
+        """Test that an interrupted full run resumes from its staging store without touching the live store."""
+        monkeypatch.setattr(index_embeddings, "APPEND_EVERY", 1)
+        indexer()
+        live = PartitionedStore.load(indexer.store_path).product_index()
+        broken = [(pid, category, [write_black_image(image_root, "black.png")] if pid == "p-04" else urls)
+                  for pid, category, urls in indexer.products]
+        set_products(indexer.engine, broken)
+        with pytest.raises(RuntimeError):
+            indexer(full=True, embedder_factory=crashing_embedder)
+        assert PartitionedStore.load(indexer.store_path).product_index() == live
+
+        set_products(indexer.engine, indexer.products)
+        stats = indexer(full=True)
+
+        assert stats["embedded"] == 6 and stats["reused"] == 4
+        assert not indexer.staging_dir.exists()
+
+    def test_model_version_change_rebuilds_store(self, indexer, monkeypatch):
+        """Test that a store built with another embedding model is rebuilt and stale staging is discarded."""
+        monkeypatch.setattr(index_embeddings, "APPEND_EVERY", 1)
+        indexer()
+        indexer.staging_dir.mkdir()
+        PartitionedStore.append(indexer.staging_dir, [("p-00", "chair", "stale", np.ones((1, 6), np.float32))],
+                                model_version="color-v0")
+
+        stats = indexer(model_version="color-v2")
+
+        assert stats["embedded"] == 10 and stats["reused"] == 0
+        assert PartitionedStore.read_model_version(indexer.store_path) == "color-v2"
+        assert not indexer.staging_dir.exists()
+        assert indexer(model_version="color-v2")["embedded"] == 0
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from embedding_store import normalize_rows
+from quantization import ProductQuantizer, ScalarQuantizer, kmeans, nearest_centroids
+
+DIM = 16
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return normalize_rows(np.random.default_rng(0).standard_normal((1000, DIM)).astype(np.float32))
+
+
+class TestKMeans:
+    """Test the Euclidean k-means used for PQ codebooks."""
+
+    def test_recovers_separated_clusters(self):
+        """Test that well separated clusters each get their own centroid."""
+        rng = np.random.default_rng(1)
+        centers = np.array([[10.0, 0.0], [0.0, 10.0], [-10.0, -10.0]], dtype=np.float32)
+        points = np.repeat(centers, 50, axis=0) + rng.standard_normal((150, 2)).astype(np.float32) * 0.1
+        centroids = kmeans(points, 3, seed=0)
+
+        assignments = nearest_centroids(points, centroids)
+        assert len(set(assignments.tolist())) == 3
+        for cluster in range(3):
+            assert len(set(assignments[cluster * 50:(cluster + 1) * 50].tolist())) == 1
+        np.testing.assert_allclose(np.sort(centroids, axis=0), np.sort(centers, axis=0), atol=0.1)
+
+    def test_same_seed_same_centroids(self, vectors):
+        """Test that training is deterministic for a fixed seed."""
+        np.testing.assert_array_equal(kmeans(vectors, 8, seed=3), kmeans(vectors, 8, seed=3))
+
+
+class TestScalarQuantizer:
+    """Test int8 scalar quantization."""
+
+    def test_round_trip_error_within_half_step(self, vectors):
+        """Test that decode(encode(x)) is within half a quantization step per dimension."""
+        quantizer = ScalarQuantizer()
+        quantizer.train(vectors)
+        codes = quantizer.encode(vectors)
+
+        assert codes.dtype == np.int8 and codes.shape == vectors.shape
+        assert np.all(np.abs(quantizer.decode(codes) - vectors) <= quantizer.scale / 2 + 1e-7)
+
+    def test_scores_match_decoded_dot_product(self, vectors):
+        """Test that the chunked int8 scores equal the dot product with the decoded vectors."""
+        quantizer = ScalarQuantizer()
+        quantizer.train(vectors)
+        codes = quantizer.encode(vectors)
+        query = vectors[7]
+
+        np.testing.assert_allclose(quantizer.scores(codes, query), quantizer.decode(codes) @ query,
+                                   rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(quantizer.scores(codes, query), vectors @ query, atol=0.02)
+
+    def test_out_of_range_vectors_are_clipped(self, vectors):
+        """Test that vectors beyond the trained range saturate instead of wrapping around."""
+        quantizer = ScalarQuantizer()
+        quantizer.train(vectors)
+        codes = quantizer.encode(np.stack([vectors[0] * 10, -vectors[0] * 10]))
+        assert codes.min() >= -127 and codes.max() <= 127
+        np.testing.assert_array_equal(np.sign(codes[0]), np.sign(np.rint(vectors[0] / quantizer.scale)))
+
+
+class TestProductQuantizer:
+    """Test product quantization and asymmetric distance computation."""
+
+    def test_adc_scores_match_decoded_dot_product(self, vectors):
+        """Test that lookup-table scores equal the dot product with the reconstructed vectors."""
+        quantizer = ProductQuantizer(m=4, n_centroids=64, seed=0)
+        quantizer.train(vectors)
+        codes = quantizer.encode(vectors)
+        query = vectors[3]
+
+        assert codes.dtype == np.uint8 and codes.shape == (4, len(vectors))
+        np.testing.assert_allclose(quantizer.scores(codes, query), quantizer.decode(codes) @ query,
+                                   rtol=1e-4, atol=1e-5)
+
+    def test_reconstruction_beats_random_codes(self, vectors):
+        """Test that the trained codebooks reconstruct vectors much better than random codes."""
+        quantizer = ProductQuantizer(m=4, n_centroids=64, seed=0)
+        quantizer.train(vectors)
+        codes = quantizer.encode(vectors)
+        random_codes = np.random.default_rng(0).integers(0, 64, codes.shape).astype(np.uint8)
+
+        error = np.linalg.norm(quantizer.decode(codes) - vectors, axis=1).mean()
+        random_error = np.linalg.norm(quantizer.decode(random_codes) - vectors, axis=1).mean()
+        assert error < 0.6 * random_error
+
+    def test_rejects_indivisible_dimension(self, vectors):
+        """Test that m must divide the vector dimension."""
+        with pytest.raises(ValueError):
+            ProductQuantizer(m=5).train(vectors)
+
+    def test_rejects_too_many_centroids(self):
+        """Test that codes must fit in uint8."""
+        with pytest.raises(ValueError):
+            ProductQuantizer(n_centroids=257)
@@ -0,0 +1,147 @@
+import os
+
+import pytest
+
+import result_cache
+from result_cache import ResultCache, cache_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(result_cache, "time", clock)
+    return clock
+
+
+def key(name):
+    return cache_key("test", name)
+
+
+class TestResultCache:
+    """Test the upload-hash result cache: expiry, LRU limits and the disk tier."""
+
+    def test_cache_key_depends_on_params(self):
+        """Test that model version and parameters are part of the key."""
+        assert cache_key("recommend", "abc", "v1", 5) == cache_key("recommend", "abc", "v1", 5)
+        assert cache_key("recommend", "abc", "v1", 5) != cache_key("recommend", "abc", "v2", 5)
+        assert cache_key("recommend", "abc", "v1", 5) != cache_key("detect", "abc", "v1", 5)
+
+    def test_entry_expires_after_ttl(self, clock):
+        """Test that an entry with a ttl is served until it expires and missed after."""
+        cache = ResultCache()
+        cache.put(key("a"), [1, 2], ttl=10)
+        cache.put(key("b"), "forever")
+
+        clock.now += 9
+        assert cache.get(key("a")) == [1, 2]
+        clock.now += 2
+        assert cache.get(key("a")) is None
+        assert cache.get(key("b")) == "forever"
+        assert cache.stats()["entries"] == 1
+
+    def test_least_recently_used_entry_evicted(self):
+        """Test that reading an entry protects it from eviction."""
+        cache = ResultCache(max_entries=2)
+        cache.put(key("a"), 1)
+        cache.put(key("b"), 2)
+        cache.get(key("a"))
+        cache.put(key("c"), 3)
+
+        assert cache.get(key("a")) == 1
+        assert cache.get(key("b")) is None
+        assert cache.get(key("c")) == 3
+        assert cache.evictions == 1
+
+    def test_byte_limit_evicts_oldest(self):
+        """Test that the memory tier stays under max_bytes."""
+        cache = ResultCache(max_entries=100, max_bytes=3000)
+        for name in "abcd":
+            cache.put(key(name), b"x" * 1000)
+
+        assert cache.stats()["bytes"] <= 3000
+        assert cache.get(key("a")) is None
+        assert cache.get(key("d")) == b"x" * 1000
+
+    def test_returned_values_are_copies(self):
+        """Test that mutating a cached value does not change the cache."""
+        cache = ResultCache()
+        cache.put(key("a"), {"items": [1]})
+        cache.get(key("a"))["items"].append(2)
+
+        assert cache.get(key("a")) == {"items": [1]}
+
+    def test_disabled_cache_stores_nothing(self):
+        """Test that max_entries=0 turns the cache off."""
+        cache = ResultCache(max_entries=0)
+        cache.put(key("a"), 1)
+
+        assert cache.get(key("a")) is None
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Test that entries evicted from memory are read back from disk by a new instance."""
+        ResultCache(max_entries=1, disk_dir=tmp_path).put(key("a"), "value")
+        cache = ResultCache(max_entries=1, disk_dir=tmp_path)
+
+        assert cache.get(key("a")) == "value"
+        assert cache.disk_hits == 1
+
+    def test_expired_disk_entry_removed(self, tmp_path, clock):
+        """Test that an expired file is deleted when it is read."""
+        cache = ResultCache(disk_dir=tmp_path)
+        cache.put(key("a"), "value", ttl=10)
+        clock.now += 11
+
+        assert ResultCache(disk_dir=tmp_path).get(key("a")) is None
+        assert not any(path.is_file() for path in tmp_path.glob("*/*"))
+
+    def test_disk_tier_evicts_least_recently_used(self, tmp_path, clock):
+        """Test that the disk tier drops the files read longest ago once over disk_max_bytes."""
+        cache = ResultCache(max_entries=1, disk_dir=tmp_path, disk_max_bytes=5000)
+        for index, name in enumerate("abcd"):
+            cache.put(key(name), b"x" * 1000)
+            os.utime(cache._disk_path(key(name)), (clock.now + index, clock.now + index))
+        cache._memory.clear()
+        cache._memory_bytes = 0
+        # a를 읽어 최근 사용으로
+        assert cache.get(key("a")) is not None
+        cache.put(key("e"), b"x" * 1000)
+
+        remaining = {path.name for path in tmp_path.glob("*/*")}
+        assert key("a") in remaining
+        assert key("b") not in remaining
+        assert cache.stats()["disk_bytes"] <= 5000
+
+    def test_file_removed_by_another_worker_is_a_miss(self, tmp_path, monkeypatch):
+        """Test that a file deleted between read and touch is treated as a miss."""
+        cache = ResultCache(max_entries=1, disk_dir=tmp_path)
+        cache.put(key("a"), "value")
+        cache.put(key("b"), "other")
+
+        def evicted(path, *args, **kwargs):
+            raise FileNotFoundError(path)
+
+        monkeypatch.setattr(result_cache.os, "utime", evicted)
+
+        assert cache.get(key("a")) is None
+        assert cache.misses == 1
+
+    def test_disk_limit_counts_other_workers_files(self, tmp_path):
+        """Test that eviction sees files written by other processes sharing the directory."""
+        first = ResultCache(max_entries=1, disk_dir=tmp_path, disk_max_bytes=20000, disk_rescan_interval=0)
+        second = ResultCache(max_entries=1, disk_dir=tmp_path, disk_max_bytes=20000, disk_rescan_interval=0)
+        for index in range(30):
+            (first if index % 2 else second).put(key(str(index)), b"x" * 1000)
+
+        total = sum(path.stat().st_size for path in tmp_path.glob("*/*"))
+        assert total <= 20000
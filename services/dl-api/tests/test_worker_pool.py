@@ -0,0 +1,148 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+import worker_pool
+from worker_pool import InferenceWorkerPool
+
+
+def stub_handlers():
+    """워커 프로세스 안에서 모델 대신 로드하는 handler (spawn으로 넘기려면 모듈 최상위 함수)"""
+    def total(images):
+        return [float(image.sum()) for image in images]
+
+    def shapes(images):
+        return [image.shape for image in images]
+
+    def fail(images):
+        raise ValueError("model error")
+
+    def hang(images):
+        time.sleep(60)
+        return [None for _ in images]
+
+    def nap(images):
+        time.sleep(0.8)
+        return [len(images)]
+
+    return {"total": total, "shapes": shapes, "fail": fail, "hang": hang, "nap": nap}
+
+
+def slow_loading_handlers():
+    """첫 모델 로드(가중치 다운로드)가 task_timeout보다 오래 걸리는 워커"""
+    time.sleep(2.5)
+    return stub_handlers()
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = InferenceWorkerPool(2, handler_factory=stub_handlers, task_timeout=5)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def segment_names(monkeypatch):
+    """run()이 만든 공유 메모리 세그먼트 이름을 기록"""
+    names = []
+
+    class RecordingSharedMemory(shared_memory.SharedMemory):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            if kwargs.get("create"):
+                names.append(self.name)
+
+    monkeypatch.setattr(worker_pool.shared_memory, "SharedMemory", RecordingSharedMemory)
+    return names
+
+
+def assert_unlinked(names):
+    assert names
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+class TestInferenceWorkerPool:
+    """Test the multi-process inference pool with stub handlers."""
+
+    def test_run_returns_results_in_image_order(self, pool):
+        """Test that each image's result comes back in input order."""
+        images = [np.full((4, 4, 3), value, dtype=np.uint8) for value in (1, 2, 3)]
+
+        assert pool.run("total", images) == [48.0, 96.0, 144.0]
+
+    def test_images_keep_shape_and_dtype(self, pool):
+        """Test that arrays passed through shared memory keep their shape."""
+        images = [np.zeros((5, 7, 3), dtype=np.uint8), np.zeros((2, 3), dtype=np.float32)]
+
+        assert pool.run("shapes", images) == [(5, 7, 3), (2, 3)]
+
+    def test_segments_unlinked_after_run(self, pool, segment_names):
+        """Test that shared-memory segments are removed once results are back."""
+        pool.run("total", [np.ones((8, 8), dtype=np.float32), np.ones(3, dtype=np.float32)])
+
+        assert_unlinked(segment_names)
+
+    def test_handler_error_raised_and_segments_unlinked(self, pool, segment_names):
+        """Test that a model error fails the call without leaking segments or killing the worker."""
+        with pytest.raises(RuntimeError, match="model error"):
+            pool.run("fail", [np.ones((2, 2), dtype=np.uint8)])
+
+        assert_unlinked(segment_names)
+        assert pool.alive_workers() == 2
+        assert pool.run("total", [np.ones(2)]) == [2.0]
+
+    def test_stuck_worker_killed_and_replaced(self, segment_names):
+        """Test that a batch past task_timeout fails, and the worker is respawned."""
+        pool = InferenceWorkerPool(1, handler_factory=stub_handlers, task_timeout=1)
+        try:
+            pool.run("total", [np.ones(1)])
+            stuck_pid = pool._workers[0].process.pid
+
+            with pytest.raises(RuntimeError, match="timed out"):
+                pool.run("hang", [np.ones(1)])
+
+            assert_unlinked(segment_names)
+            assert pool._workers[0].process.pid != stuck_pid
+            assert pool.run("total", [np.ones(3)]) == [3.0]
+        finally:
+            pool.close()
+
+    def test_slow_model_load_not_counted_against_timeout(self):
+        """Test that a request arriving during a cold start waits for the worker instead of killing it."""
+        pool = InferenceWorkerPool(1, handler_factory=slow_loading_handlers, task_timeout=1)
+        try:
+            assert pool.stats()["ready"] == 0
+            pid = pool._workers[0].process.pid
+
+            assert pool.run("total", [np.ones(2)]) == [2.0]
+            assert pool._workers[0].process.pid == pid
+            assert pool.stats()["ready"] == 1
+        finally:
+            pool.close()
+
+    def test_queue_wait_not_counted_against_timeout(self):
+        """Test that a batch queued behind another one is timed from when the worker takes it."""
+        pool = InferenceWorkerPool(1, handler_factory=stub_handlers, task_timeout=1.2)
+        try:
+            pool.run("total", [np.ones(1)])
+            pid = pool._workers[0].process.pid
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                # 세 번째 배치는 보낸 지 약 2.4초 뒤에 끝나지만 워커가 꺼낸 뒤로는 0.8초
+                futures = [executor.submit(pool.run, "nap", [np.ones(1)]) for _ in range(3)]
+                assert [future.result() for future in futures] == [[1], [1], [1]]
+            assert pool._workers[0].process.pid == pid
+        finally:
+            pool.close()
+
+    def test_run_after_close_rejected(self):
+        """Test that a closed pool refuses new work."""
+        pool = InferenceWorkerPool(1, handler_factory=stub_handlers)
+        pool.close()
+
+        with pytest.raises(RuntimeError, match="closed"):
+            pool.run("total", [np.ones(1)])
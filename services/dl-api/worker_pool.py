@@ -0,0 +1,315 @@
+"""
+다중 프로세스 추론 워커 (INFERENCE_WORKERS > 0)
+
+Detectron2(PyTorch)와 VGG16(TensorFlow)을 웹 서버 프로세스 밖의 워커 프로세스 N개에 올립니다.
+API 프로세스는 업로드를 디코딩해 큐에 넣고 응답만 만들고, GIL과 두 프레임워크의 스레드 풀은
+워커마다 따로 돌기 때문에 처리량이 코어 수에 비례해 늘어납니다.
+
+이미지 전달: 디코딩한 픽셀 배열은 multiprocessing.shared_memory 세그먼트에 한 번 복사하고,
+큐로는 (세그먼트 이름, shape, dtype)만 보냅니다. 워커는 세그먼트를 붙여 복사 없이 ndarray로
+읽습니다. 픽셀 배열은 pickle되지 않습니다. 결과(탐지 목록, 특성 벡터)는 작아서 큐로 돌려받습니다.
+
+워커마다 작업 큐가 따로 있어 모델 로드를 마친(ready) 워커 중 진행 중인 작업이 가장 적은 워커로
+보냅니다. 워커는 작업을 꺼낼 때 알리고, task_timeout은 그때부터 잽니다 (큐 대기와 모델 로드는 제외).
+워커가 죽거나 작업이 task_timeout 안에 끝나지 않으면(모델이 멈춤) 그 워커의 작업은 실패로 끝내고
+워커를 다시 띄웁니다.
+
+결과 큐 메시지: ("ready", 워커 id, pid) / ("started", task_id) / ("done", task_id, 성공 여부, 결과 또는 오류)
+"""
+
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_INTERVAL = 1.0  # 워커 생존 확인 주기 (초)
+STOP_TIMEOUT = 10.0  # 종료 시 워커를 기다리는 시간 (초)
+TASK_TIMEOUT = 120.0  # 워커가 꺼낸 배치 하나를 기다리는 기본 최대 시간 (초, config.INFERENCE_TASK_TIMEOUT)
+READY_TIMEOUT = 600.0  # 준비된 워커가 하나도 없을 때 기다리는 최대 시간 (초, 첫 모델 다운로드 포함)
+
+# (세그먼트 이름, shape, dtype 문자열)
+ImageSpec = Tuple[str, Tuple[int, ...], str]
+
+
+def load_models() -> Dict[str, Callable[[List[np.ndarray]], Sequence[Any]]]:
+    """워커 프로세스 안에서 모델을 로드하고 작업 종류 → 배치 함수를 돌려줍니다"""
+    from config import DETECTION_CONFIDENCE_THRESHOLD
+    from furniture_detection import FurnitureDetector
+    from furniture_similarity import FurnitureSimilarity
+
+    detector = FurnitureDetector(confidence_threshold=DETECTION_CONFIDENCE_THRESHOLD)
+    similarity_model = FurnitureSimilarity(with_embeddings=False)
+    return {
+        "detect": detector.detect_furniture_batch,
+        "features": similarity_model.extract_features_batch,
+    }
+
+
+def _worker_main(worker_id: int, handler_factory: Callable[[], Dict[str, Callable]], threads: int,
+                 tasks: multiprocessing.Queue, results: multiprocessing.Queue) -> None:
+    """워커 프로세스: 작업 큐에서 (task_id, 종류, 이미지 스펙)을 받아 결과를 results로 보냄"""
+    from executors import configure_intra_op_threads
+
+    logging.basicConfig(level=logging.INFO)
+    configure_intra_op_threads(threads)
+    handlers = handler_factory()
+    logger.info(f"Inference worker {worker_id} ready ({sorted(handlers)})")
+    results.put(("ready", worker_id, os.getpid()))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, kind, specs = task
+        results.put(("started", task_id))
+        segments = []
+        try:
+            segments = [shared_memory.SharedMemory(name=name) for name, _, _ in specs]
+            images = [
+                np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+                for segment, (_, shape, dtype) in zip(segments, specs)
+            ]
+            output = handlers[kind](images)
+            del images  # 세그먼트를 닫기 전에 버퍼 참조를 놓아야 함
+            results.put(("done", task_id, True, list(output)))
+        except Exception as e:
+            results.put(("done", task_id, False, f"{type(e).__name__}: {str(e)}"))
+        finally:
+            for segment in segments:
+                segment.close()
+
+
+class _Worker:
+    def __init__(self, worker_id: int, process: multiprocessing.Process, tasks: multiprocessing.Queue):
+        self.worker_id = worker_id
+        self.process = process
+        self.tasks = tasks
+        self.ready = False  # handler_factory()를 마치고 "ready"를 보냄
+        self.in_flight: Dict[int, Future] = {}
+        self.started: Dict[int, float] = {}  # task_id → 워커가 꺼낸 시각 (monotonic)
+
+
+class InferenceWorkerPool:
+    """
+    모델을 올린 워커 프로세스 N개와, 공유 메모리로 이미지를 넘기는 동기 run() API
+
+        pool = InferenceWorkerPool(4)
+        detections = pool.run("detect", images)  # 이미지별 결과 리스트
+    """
+
+    def __init__(self, n_workers: int, threads_per_worker: int = 1,
+                 handler_factory: Callable[[], Dict[str, Callable]] = load_models,
+                 task_timeout: float = TASK_TIMEOUT, ready_timeout: float = READY_TIMEOUT):
+        """
+        Args:
+            n_workers: 워커 프로세스 수
+            threads_per_worker: 워커당 PyTorch/TensorFlow 연산 스레드 수
+            handler_factory: 워커 안에서 호출할 모델 로더 (모듈 최상위 함수여야 spawn으로 전달 가능)
+            task_timeout: 워커가 꺼낸 배치 하나를 기다리는 최대 시간 (초). 넘으면 워커를 종료하고 다시 띄움
+            ready_timeout: 준비된 워커가 없을 때 작업을 보내기 전에 기다리는 최대 시간 (초)
+        """
+        if n_workers < 1:
+            raise ValueError("n_workers must be at least 1")
+        self.n_workers = n_workers
+        self.threads_per_worker = threads_per_worker
+        self.handler_factory = handler_factory
+        self.task_timeout = task_timeout
+        self.ready_timeout = ready_timeout
+        self._context = multiprocessing.get_context("spawn")  # CUDA/TensorFlow는 fork 후 사용 불가
+        self._results = self._context.Queue()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)  # 워커가 준비되면 notify
+        self._task_ids = itertools.count()
+        self._owners: Dict[int, _Worker] = {}
+        self._closed = False
+        self._workers = [self._spawn(worker_id) for worker_id in range(n_workers)]
+        self._reader = threading.Thread(target=self._read_results, name="inference-results", daemon=True)
+        self._reader.start()
+        # run()은 결과를 기다리며 블로킹되므로 마이크로배처가 워커마다 배치를 하나씩 넣을 수 있게
+        # 종류(탐지/특성 추출)별로 워커 수만큼 대기 스레드를 둠
+        self.executor = ThreadPoolExecutor(max_workers=2 * n_workers, thread_name_prefix="inference-wait")
+
+    def _spawn(self, worker_id: int) -> _Worker:
+        tasks = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main, name=f"inference-worker-{worker_id}", daemon=True,
+            args=(worker_id, self.handler_factory, self.threads_per_worker, tasks, self._results)
+        )
+        process.start()
+        return _Worker(worker_id, process, tasks)
+
+    def alive_workers(self) -> int:
+        return sum(worker.process.is_alive() for worker in self._workers)
+
+    def ready_workers(self) -> int:
+        """모델 로드를 마치고 작업을 받을 수 있는 워커 수"""
+        return sum(worker.ready and worker.process.is_alive() for worker in self._workers)
+
+    def run(self, kind: str, images: List[np.ndarray]) -> List[Any]:
+        """이미지들을 공유 메모리로 넘겨 워커 하나에서 배치 처리하고 결과를 기다립니다 (블로킹)"""
+        if self._closed:
+            raise RuntimeError("Inference worker pool is closed")
+        segments = []
+        try:
+            specs = []
+            for image in images:
+                image = np.ascontiguousarray(image)
+                segment = shared_memory.SharedMemory(create=True, size=max(1, image.nbytes))
+                segments.append(segment)
+                np.ndarray(image.shape, dtype=image.dtype, buffer=segment.buf)[...] = image
+                specs.append((segment.name, image.shape, image.dtype.str))
+            task_id, future = self._dispatch(kind, specs)
+            while True:
+                # 워커가 작업을 꺼낸 뒤부터 task_timeout (그 전에는 생존 확인 주기마다 다시 봄)
+                with self._lock:
+                    worker = self._owners.get(task_id)
+                    started = worker.started.get(task_id) if worker is not None else None
+                wait = HEALTH_CHECK_INTERVAL if started is None else started + self.task_timeout - time.monotonic()
+                try:
+                    return future.result(timeout=max(wait, 0))
+                except FutureTimeoutError:
+                    if started is None:
+                        continue
+                if not self._abandon(task_id):
+                    # 기다리는 사이 결과가 도착함
+                    return future.result()
+                raise RuntimeError(f"Inference {kind} batch timed out after {self.task_timeout}s")
+        finally:
+            # 워커가 결과를 보냈거나 죽은 뒤이므로 세그먼트를 지워도 안전
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+    def _dispatch(self, kind: str, specs: List[ImageSpec]) -> Tuple[int, Future]:
+        future = Future()
+        with self._lock:
+            # 모델을 로드 중인 워커에는 보내지 않음 (콜드 스타트 중 요청은 준비될 때까지 대기)
+            if not self._ready.wait_for(lambda: self._closed or any(w.ready for w in self._workers),
+                                        timeout=self.ready_timeout):
+                raise RuntimeError(f"No inference worker ready after {self.ready_timeout}s")
+            if self._closed:
+                raise RuntimeError("Inference worker pool is closed")
+            worker = min((w for w in self._workers if w.ready), key=lambda w: len(w.in_flight))
+            task_id = next(self._task_ids)
+            worker.in_flight[task_id] = future
+            self._owners[task_id] = worker
+            worker.tasks.put((task_id, kind, specs))
+        return task_id, future
+
+    def _abandon(self, task_id: int) -> bool:
+        """
+        시간 안에 끝나지 않은 작업의 워커를 종료하고 다시 띄웁니다 (공유 메모리 세그먼트를 지우기 전에
+        워커가 더는 읽지 않도록). 그 사이 결과가 이미 도착했으면 False.
+        """
+        with self._lock:
+            worker = self._owners.get(task_id)
+            if worker is None or self._closed:
+                return False
+            worker.process.kill()
+            worker.process.join(STOP_TIMEOUT)
+            self._replace(worker, f"task {task_id} timed out after {self.task_timeout}s")
+            return True
+
+    def _read_results(self) -> None:
+        last_check = time.monotonic()
+        while not self._closed:
+            # 결과가 계속 들어와도 주기적으로 워커 생존을 확인
+            if time.monotonic() - last_check >= HEALTH_CHECK_INTERVAL:
+                self._restart_dead_workers()
+                last_check = time.monotonic()
+            try:
+                message = self._results.get(timeout=HEALTH_CHECK_INTERVAL)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            if message[0] == "ready":
+                self._mark_ready(*message[1:])
+                continue
+            if message[0] == "started":
+                with self._lock:
+                    worker = self._owners.get(message[1])
+                    if worker is not None:
+                        worker.started[message[1]] = time.monotonic()
+                continue
+            _, task_id, ok, payload = message
+            with self._lock:
+                worker = self._owners.pop(task_id, None)
+                future = worker.in_flight.pop(task_id, None) if worker is not None else None
+                if worker is not None:
+                    worker.started.pop(task_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(payload))
+
+    def _mark_ready(self, worker_id: int, pid: int) -> None:
+        with self._lock:
+            for worker in self._workers:
+                # 종료시킨 이전 프로세스가 남긴 메시지는 무시
+                if worker.worker_id == worker_id and worker.process.pid == pid:
+                    worker.ready = True
+                    self._ready.notify_all()
+
+    def _restart_dead_workers(self) -> None:
+        with self._lock:
+            for worker in list(self._workers):
+                if self._closed or worker.process.is_alive():
+                    continue
+                self._replace(worker, f"exited with code {worker.process.exitcode}")
+
+    def _replace(self, worker: _Worker, reason: str) -> None:
+        """죽은(또는 종료시킨) 워커의 작업을 실패로 끝내고 같은 번호로 다시 띄웁니다 (self._lock 안에서 호출)"""
+        logger.error(f"Inference worker {worker.worker_id} {reason}; "
+                     f"failing {len(worker.in_flight)} tasks and restarting")
+        for task_id, future in worker.in_flight.items():
+            self._owners.pop(task_id, None)
+            if not future.done():
+                future.set_exception(RuntimeError(f"Inference worker {worker.worker_id} {reason}"))
+        worker.in_flight.clear()
+        worker.started.clear()
+        # 종료된 워커에 남은 작업은 읽을 프로세스가 없으므로 큐를 닫음 (종료 시 feeder 스레드 대기 방지)
+        worker.tasks.cancel_join_thread()
+        worker.tasks.close()
+        self._workers[self._workers.index(worker)] = self._spawn(worker.worker_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.n_workers,
+                "alive": self.alive_workers(),
+                "ready": self.ready_workers(),
+                "in_flight": [len(worker.in_flight) for worker in self._workers],
+            }
+
+    def close(self) -> None:
+        """워커에 종료 신호를 보내고 기다립니다. 끝나지 않은 작업은 실패로 끝냅니다."""
+        if self._closed:
+            return
+        with self._lock:
+            self._closed = True
+            self._ready.notify_all()
+        for worker in self._workers:
+            worker.tasks.put(None)
+        for worker in self._workers:
+            worker.process.join(STOP_TIMEOUT)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            for future in worker.in_flight.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("Inference worker pool closed"))
+            worker.in_flight.clear()
+        self._reader.join(HEALTH_CHECK_INTERVAL * 2)
+        self.executor.shutdown(wait=False, cancel_futures=True)